@@ -7,6 +7,9 @@ from ._core import (
 from ._core import (
     Byte as Byte,
 )
+from ._core import (
+    CompactSequenceItem as CompactSequenceItem,
+)
 from ._core import (
     Component as Component,
 )
@@ -79,6 +82,9 @@ from ._core import (
 from ._core import (
     List as List,
 )
+from ._core import (
+    ListConstraints as ListConstraints,
+)
 from ._core import (
     Log as Log,
 )
@@ -109,6 +115,9 @@ from ._core import (
 from ._core import (
     Queue as Queue,
 )
+from ._core import (
+    RandomizationPool as RandomizationPool,
+)
 from ._core import (
     Scoreboard as Scoreboard,
 )
@@ -145,6 +154,9 @@ from ._core import (
 from ._core import (
     Uint64 as Uint64,
 )
+from ._core import (
+    VarArray as VarArray,
+)
 from ._core import (
     Visualization as Visualization,
 )
@@ -1,5 +1,6 @@
 from .agent import Agent
 from .bool import Bool
+from .compact_sequence_item import CompactSequenceItem
 from .component import Component
 from .coverage import Coverage
 from .coverbin import Coverbin
@@ -14,6 +15,7 @@ from .fifo import Fifo
 from .float import Double, Float, Fp16, Fp32, Fp64, Half
 from .int import Byte, Int, Int8, Int16, Int32, Int64
 from .list import List, Queue
+from .list_constraints import ListConstraints
 from .log import Log
 from .logic import Logic
 from .memory import Memory
@@ -22,6 +24,7 @@ from .monitor import Monitor
 from .object import Object
 from .phase import Phase
 from .phase_manager import PhaseManager
+from .pool import RandomizationPool
 from .port import Port
 from .scoreboard import Scoreboard
 from .scoreboard_indexed import IndexedScoreboard
@@ -32,6 +35,7 @@ from .struct import Struct
 from .trace import Trace
 from .transaction import Transaction
 from .uint import Uint, Uint8, Uint16, Uint32, Uint64
+from .var_array import VarArray
 from .visualization import Visualization
 
 # Enable logging
@@ -65,6 +69,7 @@ __all__ = [
     "Agent",
     "Env",
     "SequenceItem",
+    "CompactSequenceItem",
     "Sequence",
     "Logic",
     "Bool",
@@ -96,4 +101,7 @@ __all__ = [
     "Trace",
     "Memory",
     "Struct",
+    "RandomizationPool",
+    "VarArray",
+    "ListConstraints",
 ]
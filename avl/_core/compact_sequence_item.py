@@ -0,0 +1,99 @@
+# Copyright 2024 Apheleia
+#
+# Description:
+# Apheleia Verification Library Compact Sequence Item
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from cocotb.triggers import Event
+
+from .log import Log
+from .sequence_item import SequenceItem
+from .sequencer import Sequencer
+
+if TYPE_CHECKING:
+    from .component import Component
+
+def _new_events_() -> dict[str, list[Any]]:
+    """
+    Create the events every sequence item has ("done" and "response").
+
+    :return: The events, as created by Transaction.add_event().
+    :rtype: dict[str, list[Any]]
+    """
+    return {"done": [0, Event(), []], "response": [0, Event(), []]}
+
+class CompactSequenceItem(SequenceItem):
+    # Internal state created on first use - see __getattr__
+    _lazy_attributes_ = {
+        "_field_attributes_": dict,
+        "_constraints_": lambda: {True: {}, False: {}},
+        "_free_vars_": list,
+        "_arrays_": list,
+        "_randomize_paths_": dict,
+        "_events_": _new_events_,
+    }
+
+    # Internal state with immutable defaults - only stored on the instance when changed
+    _id_ = -1
+    _frozen_constraints_ = False
+    _groups_ = None
+    _parent_sequence_ = None
+    _parent_sequencer_ = None
+    _table_fmt_ = "grid"
+    _table_transpose_ = False
+    _table_recurse_ = True
+
+    # Logger - shared by all instances rather than bound to each
+    debug = staticmethod(Log.debug)
+    info = staticmethod(Log.info)
+    warn = staticmethod(Log.warn)
+    warning = staticmethod(Log.warning)
+    error = staticmethod(Log.error)
+    critical = staticmethod(Log.critical)
+    fatal = staticmethod(Log.fatal)
+
+    def __init__(self, name: str, parent: Component) -> None:
+        """
+        Initializes a compact SequenceItem with a name and an optional parent component.
+
+        API compatible with SequenceItem, for items created in high volumes (e.g. by monitors).
+        Only the name and parent are stored on creation - events, constraints, field attributes and
+        randomization state are created on first use, and the logger methods are class attributes.
+
+        :param name: Name of the sequence item.
+        :type name: str
+        :param parent: Parent component (optional).
+        :type parent: Component
+        """
+        self.name = name
+        self._parent_ = parent
+
+        if isinstance(parent, SequenceItem):
+            self._parent_sequence_ = parent
+            self._parent_sequencer_ = parent.get_sequencer()
+        elif isinstance(parent, Sequencer):
+            self._parent_sequencer_ = parent
+
+    def __getattr__(self, name: str) -> Any:
+        """
+        Create internal state on first use.
+
+        :param name: The attribute name.
+        :type name: str
+        :return: The attribute value.
+        :rtype: Any
+        :raises AttributeError: If the attribute doesn't exist.
+        """
+        factory = CompactSequenceItem._lazy_attributes_.get(name)
+        if factory is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+        value = factory()
+        self.__dict__[name] = value
+        return value
+
+
+__all__ = ["CompactSequenceItem"]
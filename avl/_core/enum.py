@@ -5,35 +5,106 @@
 
 import random
 import warnings
+from bisect import bisect_left, bisect_right
 from collections.abc import Callable
 from typing import Any
 
-from z3 import Int, Or
+from z3 import UGE, ULE, And, BoolRef, Int, Or, is_bv
 
 from .var import Var
 
 
+class _EnumDomain_:
+    """
+    Precomputed lookups of a set of enumeration values, shared by all Enums with the same values.
+    """
+
+    def __init__(self, items: tuple[tuple[str, Any], ...]) -> None:
+        """
+        Build the lookups.
+
+        :param items: The (name, value) pairs of the enumeration.
+        :type items: tuple[tuple[str, Any], ...]
+        """
+        self.items = items
+        self.by_name = dict(items)
+        self.choices = tuple(self.by_name.values())
+        self.ordered = sorted(set(self.choices))
+        self.range = (self.ordered[0], self.ordered[-1])
+
+        # Name of each value (the first name, if values repeat)
+        self.names = {}
+        for k, v in items:
+            self.names.setdefault(v, k)
+
+        # Width of the HDL representation
+        self.width = self.range[1].bit_length()
+
+        # Cast of names and values to values
+        self.lookup = {v: v for v in self.ordered}
+        self.lookup.update(self.by_name)
+
+        # Contiguous runs of values, for a compact range constraint
+        self.runs = []
+        for v in self.ordered:
+            if self.runs and self.runs[-1][1] == v - 1:
+                self.runs[-1][1] = v
+            else:
+                self.runs.append([v, v])
+
+    def constraint(self, x: Any) -> BoolRef:
+        """
+        Restrict a z3 integer (or bit-vector) to the values.
+
+        On bit-vectors, runs of non-negative values use unsigned comparisons, so also apply to field views
+        without a sign bit (see StructVar).
+
+        :param x: The z3 integer or bit-vector.
+        :type x: Any
+        :return: The constraint.
+        :rtype: BoolRef
+        """
+        terms = []
+        for lo, hi in self.runs:
+            if lo == hi:
+                terms.append(x == lo)
+            elif lo >= 0 and is_bv(x):
+                terms.append(And(UGE(x, lo), ULE(x, hi)))
+            else:
+                terms.append(And(x >= lo, x <= hi))
+        return terms[0] if len(terms) == 1 else Or(terms)
+
+# Domains by (name, value) pairs
+_domains_: dict[tuple[tuple[str, Any], ...], _EnumDomain_] = {}
+
+def _domain_(values: dict[str, Any]) -> _EnumDomain_:
+    """
+    Get the shared domain of a set of enumeration values.
+
+    :param values: The enumeration values by name.
+    :type values: dict[str, Any]
+    :return: The domain.
+    :rtype: _EnumDomain_
+    """
+    items = tuple(values.items())
+    domain = _domains_.get(items)
+    if domain is None:
+        domain = _domains_[items] = _EnumDomain_(items)
+    return domain
+
 class Enum(Var):
+    _range_constraints_ = ("_c_range_",)
 
     def __copy__(self):
         """
-        Copy the Logic - always make a copy to ensure randomness is preserved.
-
-        Slightly unusual. Explicitly create an enum, then change type.
-        This is to allow a user to subclass an enum with a pre-defined set of values.
+        Copy the Enum - always make a copy to ensure randomness is preserved.
 
         :return: Copied Var.
         :rtype: Var
         """
-        new_obj = Enum(self.value,
-                       self.values.copy(),
-                       auto_random=self._auto_random_,
-                       fmt=self._fmt_)
-        new_obj._constraints_ = {
-            k: v.copy() for k, v in self._constraints_.items()
-        }
-        new_obj.__class__ = self.__class__
-        return  new_obj
+        new_obj = super().__copy__()
+        new_obj.values = self.values.copy()
+        return new_obj
 
     def __init__(
         self,
@@ -65,22 +136,37 @@ class Enum(Var):
         value = args[-2]
         values = args[-1]
 
-        # Define the values
+        # Define the values - names are available as attributes (see __getattr__)
         self.values = values
-        for k, v in values.items():
-            setattr(self, k, v)
-
-        if value in values.keys():
-            self.value = values[value]
-        elif value in values.values():
-            self.value = value
-        else:
-            raise ValueError(f"Value {value} is not in the list of values {values}")
+        self._domain_ = _domain_(values)
 
         super().__init__(value, auto_random=auto_random, fmt=fmt)
 
         # Define a width - in case use in Struct
-        self.width = max(values.values()).bit_length()
+        self.width = self._domain_.width
+
+        # Restrict the z3 representation to the values
+        if self._auto_random_:
+            self.add_constraint(
+                "_c_range_",
+                lambda x: self._domain_.constraint(x),
+                hard=True,
+            )
+
+    def __getattr__(self, name: str) -> Any:
+        """
+        Look up the value of an enumeration name (e.g. e.A).
+
+        :param name: The attribute name.
+        :type name: str
+        :return: The attribute value.
+        :rtype: Any
+        :raises AttributeError: If the attribute doesn't exist.
+        """
+        domain = self.__dict__.get("_domain_")
+        if domain is not None and name in domain.by_name:
+            return domain.by_name[name]
+        return super().__getattr__(name)
 
     def _cast_(self, other: Any) -> Any:
         """
@@ -92,12 +178,10 @@ class Enum(Var):
         :rtype: Any
         """
         v = other.value if isinstance(other, type(self)) else other
-        if v in self.values.keys():
-            return self.values[v]
-        elif v in self.values.values():
-            return v
-        else:
-            raise ValueError(f"Value {v} is not in the list of values {self.values}")
+        try:
+            return self._domain_.lookup[v]
+        except (KeyError, TypeError):
+            raise ValueError(f"Value {v} is not in the list of values {self.values}") from None
 
     def _wrap_(self, result):
         """
@@ -117,47 +201,53 @@ class Enum(Var):
         :return: A tuple containing the minimum and maximum values of the variable.
         :rtype: tuple[Any, Any]
         """
-        return (min(self.values.values()), max(self.values.values()))
+        return self._domain_.range
 
     def _z3_(self) -> Int:
         """
-        Return the Z3 representation of the variable.
+        Return the Z3 representation of the variable - an integer, so Enums with different values can be compared,
+        and constants in constraints are never truncated.
         :return: The Z3 representation of the variable.
-        :rtype: BoolRef | IntNumRef | BitVecNumRef | RatNumRef
+        :rtype: Int
         """
-        self.add_constraint(
-            "_c_range_",
-            lambda x: Or([x == v for v in self.values.values()]),
-            hard=True,
-        )
         return Int(f"{self._idx_}")
 
+    def _signature_(self) -> tuple:
+        """
+        Get the structural signature of the variable - type, values and constraint functions.
+
+        :return: The signature.
+        :rtype: tuple
+        """
+        return (*super()._signature_(), self._domain_.items)
+
     # Type Conversions
     def __str__(self) -> str:
         """
         Returns the string representation of the current instance.
 
-        Iterates through the `values` dictionary and returns the key
-        corresponding to the current `value`.
+        Returns the name corresponding to the current `value`.
 
         :return: The string representation of the current instance.
         :rtype: str
         """
-        for k, v in self.values.items():
-            if v == self.value:
-                return self._fmt_(k)
+        return self._fmt_(self._domain_.names[self.value])
 
     def _random_value_(self, bounds: tuple[Any, Any] = None) -> Any:
         """
         Randomize the value of the variable.
+
+        :param bounds: Optional tuple containing the minimum and maximum bounds for the random value.
+        :type bounds: tuple[Any, Any], optional
+        :return: A random value, within the bounds if any value is.
+        :rtype: Any
         """
+        domain = self._domain_
         if bounds is not None:
-            values = []
-            for v in self.values.values():
-                if v >= min(bounds) and v <= max(bounds):
-                    values.append(v)
-            return random.choice(values)
-        else:
-            return random.choice(list(self.values.values()))
+            lo = bisect_left(domain.ordered, min(bounds))
+            hi = bisect_right(domain.ordered, max(bounds))
+            if lo < hi:
+                return domain.ordered[random.randrange(lo, hi)]
+        return random.choice(domain.choices)
 
 __all__ = ["Enum"]
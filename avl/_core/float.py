@@ -5,6 +5,7 @@
 
 from __future__ import annotations
 
+import random
 import warnings
 from collections.abc import Callable
 from typing import Any
@@ -14,8 +15,41 @@ from z3 import And, Real
 
 from .var import Var
 
+# Classes of values sampled by bit pattern (see Fp16.set_class_weights())
+FP_CLASSES = ("normal", "subnormal", "zero", "inf", "nan")
+
+def _cumulative_weights_(weights: dict[str, float] | None) -> tuple[tuple[str, ...], list[float]] | None:
+    """
+    Check the weights of the classes of values, and convert them to cumulative weights.
+
+    :param weights: Weight of each class (see FP_CLASSES), or None.
+    :type weights: dict[str, float] | None
+    :return: The classes and their cumulative weights, or None.
+    :rtype: tuple[tuple[str, ...], list[float]] | None
+    :raises ValueError: If a class is unknown, or no class has a positive weight.
+    """
+    if weights is None:
+        return None
+
+    unknown = set(weights) - set(FP_CLASSES)
+    if unknown:
+        raise ValueError(f"Unknown floating-point classes {sorted(unknown)} - expected {FP_CLASSES}")
+    classes = tuple(k for k, w in weights.items() if w > 0)
+    if not classes:
+        raise ValueError("At least one floating-point class must have a positive weight")
+
+    cum_weights = []
+    for k in classes:
+        cum_weights.append((cum_weights[-1] if cum_weights else 0) + weights[k])
+    return classes, cum_weights
 
 class Fp16(Var):
+    _range_constraints_ = ("c_range_",)
+    # Classes and cumulative weights of unconstrained bit pattern sampling - None to sample uniformly over the range
+    _class_weights_ = None
+    # (exponent bits, mantissa bits) of the format
+    _format_ = (5, 10)
+
     def __init__(self, *args, auto_random: bool = True, fmt: Callable[..., float] = str) -> None:
         """
         Initialize an instance of the class.
@@ -30,6 +64,14 @@ class Fp16(Var):
         super().__init__(*args, auto_random=auto_random, fmt=fmt)
         self._bits_ = np.uint16(0)
 
+        # Restrict the z3 representation to the finite range
+        if self._auto_random_:
+            self.add_constraint(
+                "c_range_",
+                lambda x: And(x >= self._range_()[0], x <= self._range_()[1]),
+                hard=True,
+            )
+
     def _cast_(self, other: Any) -> Any:
         """
         Cast the other value to the type of this variable's value.
@@ -61,12 +103,6 @@ class Fp16(Var):
         :return: The Z3 FP representation of the variable.
         :rtype: FP
         """
-        self.add_constraint(
-            "c_range_",
-            lambda x: And(x >= self._range_()[0], x <= self._range_()[1]),
-            hard=True,
-        )
-
         return Real(f"{self._idx_}")
 
     def _random_value_(self, bounds: tuple[float, float] = None) -> float:
@@ -75,14 +111,68 @@ class Fp16(Var):
 
         :param bounds: Optional bounds for the random value.
         :type bounds: tuple[float, float], optional
-        :return: A random float value within the specified bounds or the maximum value.
+        :return: A random float value within the specified bounds, or sampled by class (see set_class_weights()).
         :rtype: float
         """
         if bounds is None:
+            if self._class_weights_ is not None:
+                return self._random_bits_()
             bounds = self._range_()
         x = np.random.uniform(min(bounds), max(bounds))
         return self._cast_(x)
 
+    def _random_bits_(self) -> Any:
+        """
+        Sample a value as a bit pattern - a class of value by weight (see set_class_weights()), then a random
+        sign, exponent and mantissa within the class.
+
+        :return: The value.
+        :rtype: Any
+        """
+        ebits, mbits = self._format_
+        emax = (1 << ebits) - 1
+        classes, cum_weights = self._class_weights_
+        cls = random.choices(classes, cum_weights=cum_weights)[0]
+
+        if cls == "normal":
+            exponent, mantissa = random.randint(1, emax - 1), random.getrandbits(mbits)
+        elif cls == "subnormal":
+            exponent, mantissa = 0, random.randint(1, (1 << mbits) - 1)
+        elif cls == "zero":
+            exponent, mantissa = 0, 0
+        elif cls == "inf":
+            exponent, mantissa = emax, 0
+        else:
+            exponent, mantissa = emax, random.randint(1, (1 << mbits) - 1)
+
+        raw = (random.getrandbits(1) << (ebits + mbits)) | (exponent << mbits) | mantissa
+        return type(self._bits_)(raw).view(type(self.value))
+
+    def set_class_weights(self, weights: dict[str, float] | None) -> None:
+        """
+        Sample unconstrained values as bit patterns, by class of value, rather than uniformly over the range.
+
+        Each randomization picks a class by weight - "normal", "subnormal", "zero", "inf" or "nan" - then a random
+        sign, exponent and mantissa within the class, e.g. {"normal": 90, "subnormal": 5, "zero": 3, "inf": 1, "nan": 1}.
+        Classes not listed are never sampled. Constrained values are always finite and within the range.
+
+        :param weights: Weight of each class, or None to sample uniformly over the range.
+        :type weights: dict[str, float] | None
+        :raises ValueError: If a class is unknown, or no class has a positive weight.
+        """
+        self._class_weights_ = _cumulative_weights_(weights)
+
+    @staticmethod
+    def set_default_class_weights(weights: dict[str, float] | None) -> None:
+        """
+        Set the class weights (see set_class_weights()) of all floating-point variables without their own.
+
+        :param weights: Weight of each class, or None to sample uniformly over the range.
+        :type weights: dict[str, float] | None
+        :raises ValueError: If a class is unknown, or no class has a positive weight.
+        """
+        Fp16._class_weights_ = _cumulative_weights_(weights)
+
     def to_bits(self) -> int:
         """
         Get the raw representation of the variable.
@@ -144,6 +234,8 @@ class Fp16(Var):
         return not (np.isnan(self.value) or np.isnan(other_val)) and self.value >= other_val
 
 class Fp32(Fp16):
+    _format_ = (8, 23)
+
     def __init__(self, *args, auto_random: bool = True, fmt: Callable[..., float] = str) -> None:
         """
         Initialize an instance of the class.
@@ -174,6 +266,8 @@ class Fp32(Fp16):
             return np.float32(v)
 
 class Fp64(Fp16):
+    _format_ = (11, 52)
+
     def __init__(self, *args, auto_random: bool = True, fmt: Callable[..., float] = str) -> None:
         """
         Initialize an instance of the class.
@@ -216,4 +310,4 @@ Half = Fp16
 Float = Fp32
 Double = Fp64
 
-__all__ = ["Fp16", "Fp32", "Fp64", "Half", "Float", "Double"]
+__all__ = ["FP_CLASSES", "Fp16", "Fp32", "Fp64", "Half", "Float", "Double"]
@@ -0,0 +1,324 @@
+# Copyright 2024 Apheleia
+#
+# Description:
+# Apheleia Verification Library List Constraints
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+from z3 import UGT, ULE, ULT, And, BitVecVal, BoolRef, BoolVal, Distinct, If, Implies, IntVal, Not, SignExt, ZeroExt, is_bv, is_expr
+
+# Smallest width of ListConstraints.count() - so it can be compared with any reasonable constant
+COUNT_WIDTH = 32
+
+def _coerce_(xs: list[Any]) -> list[Any]:
+    """
+    Convert the constant elements of a list (e.g. the values of non-random Vars) to z3 values of the same sort as the
+    other elements.
+
+    :param xs: The elements.
+    :type xs: list[Any]
+    :return: The z3 elements.
+    :rtype: list[Any]
+    """
+    ref = next((x for x in xs if is_expr(x)), None)
+    if ref is not None and is_bv(ref):
+        return [x if is_expr(x) else BitVecVal(int(x), ref.size()) for x in xs]
+    return [x if is_expr(x) else IntVal(int(x)) for x in xs]
+
+def _active_(i: int, size: Any) -> Any:
+    """
+    Condition for element i of a list to be in use.
+
+    :param i: Index of the element.
+    :type i: int
+    :param size: Number of elements in use - None for all, an int, or a z3 expression.
+    :type size: Any
+    :return: True / False when known, otherwise a z3 expression.
+    :rtype: Any
+    """
+    if size is None:
+        return True
+    if not is_expr(size):
+        return i < int(size)
+    if is_bv(size):
+        return UGT(size, i) if i < (1 << size.size()) else False
+    return size > i
+
+def _add_(terms: list[Any]) -> Any:
+    """
+    Add z3 terms as one n-ary addition (z3.Sum() nests bit-vector additions).
+
+    :param terms: The terms, of the same sort.
+    :type terms: list[Any]
+    :return: The sum.
+    :rtype: Any
+    """
+    if len(terms) == 1:
+        return terms[0]
+    return (terms[0] + terms[1]).decl()(*terms)
+
+def _all_(terms: list[Any]) -> BoolRef:
+    """
+    Conjunction of terms, dropping those known to hold.
+
+    :param terms: The terms.
+    :type terms: list[Any]
+    :return: The conjunction.
+    :rtype: BoolRef
+    """
+    terms = [t for t in terms if t is not True]
+    if any(t is False for t in terms):
+        return BoolVal(False)
+    if not terms:
+        return BoolVal(True)
+    return terms[0] if len(terms) == 1 else And(terms)
+
+def _when_(active: Any, term: Any) -> Any:
+    """
+    A term which only applies when an element is in use.
+
+    :param active: Condition for the element to be in use (see _active_()).
+    :type active: Any
+    :param term: The term.
+    :type term: Any
+    :return: The guarded term.
+    :rtype: Any
+    """
+    if active is True or active is False:
+        return term if active else True
+    return Implies(active, term)
+
+class ListConstraints:
+    """
+    Compact constraints over lists of variables.
+
+    Each helper takes the list of z3 elements, as passed to a constraint function, and returns a single z3
+    expression - one term per element (or per adjacent pair) rather than per pair of elements.
+    They are used directly as constraint functions, with a list of Vars as the argument:
+
+        self.add_constraint("c_unique", avl.ListConstraints.unique, self.a)
+
+    or inside a constraint function:
+
+        self.add_constraint("c_sum", lambda a: avl.ListConstraints.sum(a) == 100, self.a)
+
+    Lists of randomized length are modelled as a list of slots, of the maximum length, with a size variable.
+    Only the first size slots are in use (see length()), and every helper takes the size as an optional argument.
+
+    Distinct, ordering, sums and counts are sampled by the native solver (including over lists of randomized
+    length), so scale to thousands of elements.
+    """
+
+    @staticmethod
+    def unique(xs: list[Any], size: Any = None) -> BoolRef:
+        """
+        All elements (in use) have different values.
+
+        :param xs: The elements.
+        :type xs: list[Any]
+        :param size: Number of elements in use (optional).
+        :type size: Any
+        :return: The constraint.
+        :rtype: BoolRef
+        """
+        xs = _coerce_(xs)
+        if size is not None and not is_expr(size):
+            xs, size = xs[:int(size)], None
+        if len(xs) < 2:
+            return BoolVal(True)
+        if size is None:
+            return Distinct(*xs)
+
+        if is_bv(xs[0]):
+            # Elements not in use are replaced by distinct values above the range of any element
+            width = max(x.size() for x in xs)
+            ext = len(xs).bit_length()
+            members = []
+            for i, x in enumerate(xs):
+                active = _active_(i, size)
+                member = ZeroExt(width - x.size() + ext, x)
+                sentinel = BitVecVal((1 << width) + i, width + ext)
+                if active is True or active is False:
+                    members.append(member if active else sentinel)
+                else:
+                    members.append(If(active, member, sentinel))
+            return Distinct(*members)
+
+        # Elements are in use from the start of the list, so j in use implies i in use for i < j
+        return _all_([_when_(_active_(j, size), xs[i] != xs[j]) for j in range(len(xs)) for i in range(j)])
+
+    @staticmethod
+    def sum(xs: list[Any], size: Any = None, signed: bool = False) -> Any:
+        """
+        Sum of the elements (in use).
+
+        Bit-vectors are extended so the sum can't overflow. Unsigned sums never reach the sign bit, so can be
+        compared with <, >, etc.
+
+        :param xs: The elements.
+        :type xs: list[Any]
+        :param size: Number of elements in use (optional).
+        :type size: Any
+        :param signed: Sum bit-vectors as signed values. Defaults to False.
+        :type signed: bool
+        :return: The sum.
+        :rtype: Any
+        """
+        xs = _coerce_(xs)
+        if not xs:
+            return IntVal(0)
+
+        if is_bv(xs[0]):
+            width = max(x.size() for x in xs) + len(xs).bit_length() + (0 if signed else 1)
+            extend = SignExt if signed else ZeroExt
+            xs = [extend(width - x.size(), x) for x in xs]
+            zero = BitVecVal(0, width)
+        else:
+            zero = IntVal(0)
+
+        terms = []
+        for i, x in enumerate(xs):
+            active = _active_(i, size)
+            if active is True:
+                terms.append(x)
+            elif active is not False:
+                terms.append(If(active, x, zero))
+        return _add_(terms) if terms else zero
+
+    @staticmethod
+    def count(xs: list[Any], predicate: Callable[[Any], BoolRef] | Any, size: Any = None) -> Any:
+        """
+        Number of elements (in use) which satisfy a condition.
+
+        The count is an unsigned bit-vector of at least COUNT_WIDTH bits, which never reaches the sign bit.
+
+        :param xs: The elements.
+        :type xs: list[Any]
+        :param predicate: The condition, e.g. lambda x: x > 5, or a value to count.
+        :type predicate: Callable[[Any], BoolRef] | Any
+        :param size: Number of elements in use (optional).
+        :type size: Any
+        :return: The count.
+        :rtype: Any
+        """
+        xs = _coerce_(xs)
+        if not callable(predicate):
+            value = predicate
+            predicate = lambda x: x == value  # noqa: E731
+
+        width = max(COUNT_WIDTH, len(xs).bit_length() + 1)
+        one, zero = BitVecVal(1, width), BitVecVal(0, width)
+        terms = []
+        for i, x in enumerate(xs):
+            active = _active_(i, size)
+            if active is True:
+                terms.append(If(predicate(x), one, zero))
+            elif active is not False:
+                terms.append(If(active, If(predicate(x), one, zero), zero))
+        return _add_(terms) if terms else zero
+
+    @staticmethod
+    def ascending(xs: list[Any], size: Any = None, strict: bool = False, signed: bool = False) -> BoolRef:
+        """
+        The elements (in use) are in ascending order.
+
+        :param xs: The elements.
+        :type xs: list[Any]
+        :param size: Number of elements in use (optional).
+        :type size: Any
+        :param strict: Each element is greater than the previous one (rather than greater or equal). Defaults to False.
+        :type strict: bool
+        :param signed: Compare bit-vectors as signed values. Defaults to False.
+        :type signed: bool
+        :return: The constraint.
+        :rtype: BoolRef
+        """
+        xs = _coerce_(xs)
+        if xs and is_bv(xs[0]) and not signed:
+            op = ULT if strict else ULE
+        else:
+            op = (lambda a, b: a < b) if strict else (lambda a, b: a <= b)
+        return _all_([_when_(_active_(i + 1, size), op(xs[i], xs[i + 1])) for i in range(len(xs) - 1)])
+
+    @staticmethod
+    def descending(xs: list[Any], size: Any = None, strict: bool = False, signed: bool = False) -> BoolRef:
+        """
+        The elements (in use) are in descending order.
+
+        :param xs: The elements.
+        :type xs: list[Any]
+        :param size: Number of elements in use (optional).
+        :type size: Any
+        :param strict: Each element is less than the previous one (rather than less or equal). Defaults to False.
+        :type strict: bool
+        :param signed: Compare bit-vectors as signed values. Defaults to False.
+        :type signed: bool
+        :return: The constraint.
+        :rtype: BoolRef
+        """
+        xs = _coerce_(xs)
+        if xs and is_bv(xs[0]) and not signed:
+            op = ULT if strict else ULE
+        else:
+            op = (lambda a, b: a < b) if strict else (lambda a, b: a <= b)
+        return _all_([_when_(_active_(i + 1, size), op(xs[i + 1], xs[i])) for i in range(len(xs) - 1)])
+
+    @staticmethod
+    def each(xs: list[Any], constraint: Callable[..., BoolRef], size: Any = None) -> BoolRef:
+        """
+        Every element (in use) satisfies a constraint.
+
+        The constraint is called with each element, e.g. lambda x: x < 100, or with the element and its index
+        if it takes two arguments without defaults, e.g. lambda x, i: x != i.
+
+        :param xs: The elements.
+        :type xs: list[Any]
+        :param constraint: The constraint function.
+        :type constraint: Callable[..., BoolRef]
+        :param size: Number of elements in use (optional).
+        :type size: Any
+        :return: The constraint.
+        :rtype: BoolRef
+        """
+        xs = _coerce_(xs)
+        indexed = constraint.__code__.co_argcount - len(constraint.__defaults__ or ()) >= 2
+        return _all_([
+            _when_(_active_(i, size), constraint(x, i) if indexed else constraint(x)) for i, x in enumerate(xs)
+        ])
+
+    @staticmethod
+    def length(xs: list[Any], size: Any, fill: int = 0) -> BoolRef:
+        """
+        The list is in use up to size elements - size is at most the number of slots, and the slots not in use
+        hold a fixed value.
+
+        :param xs: The elements (slots).
+        :type xs: list[Any]
+        :param size: Number of elements in use.
+        :type size: Any
+        :param fill: Value of the slots not in use. Defaults to 0.
+        :type fill: int
+        :return: The constraint.
+        :rtype: BoolRef
+        """
+        xs = _coerce_(xs)
+        n = len(xs)
+        if not is_expr(size):
+            bound = int(size) <= n
+        elif is_bv(size):
+            bound = ULE(size, n) if n < (1 << size.size()) else True
+        else:
+            bound = And(size >= 0, size <= n)
+
+        terms = [bound]
+        for i, x in enumerate(xs):
+            active = _active_(i, size)
+            if active is not True:
+                terms.append(x == fill if active is False else Implies(Not(active), x == fill))
+        return _all_(terms)
+
+
+__all__ = ["ListConstraints"]
@@ -15,19 +15,6 @@ from .var import Var
 
 class Logic(Var):
 
-    def __copy__(self):
-        """
-        Copy the Logic - always make a copy to ensure randomness is preserved.
-
-        :return: Copied Var.
-        :rtype: Var
-        """
-        new_obj = Logic(self.value, auto_random=self._auto_random_, fmt=self._fmt_, width=self.width)
-        new_obj._constraints_ = {
-            k: v.copy() for k, v in self._constraints_.items()
-        }
-        return  new_obj
-
     def __init__(
         self,
         *args,
@@ -3,28 +3,296 @@
 # Description:
 # Apheleia Verification Library Memory Model
 
+import mmap
+import os
+from bisect import bisect_right
+from collections.abc import Callable, Iterable, Iterator, MutableMapping
+from typing import Any
+
 import bincopy
+import numpy as np
 import pandas as pd
 
+# Default page size of the sparse storage in bytes
+PAGE_SIZE = 4096
+
+# Number of words / bytes per chunk of file import and export
+_IO_CHUNK_ = 1 << 16
+
+# mmap access of each file mapping mode (see Memory.map_file())
+_MAP_ACCESS_ = {"r": mmap.ACCESS_READ, "c": mmap.ACCESS_COPY, "w": mmap.ACCESS_WRITE}
+
+def _zero_init_(address: int) -> int:
+    """
+    Default initialization policy - all bytes are zero.
+
+    :param address: Address of the byte.
+    :type address: int
+    :return: Initial value of the byte.
+    :rtype: int
+    """
+    return 0
+
+def _bytes_view_(buffer: Any) -> memoryview:
+    """
+    View any buffer-protocol object (bytes, bytearray, NumPy array, ...) as flat bytes.
+
+    :param buffer: The buffer.
+    :type buffer: Any
+    :return: A byte view of the buffer - a copy if the buffer isn't contiguous.
+    :rtype: memoryview
+    """
+    view = memoryview(buffer)
+    if not view.c_contiguous:
+        view = memoryview(view.tobytes())
+    return view.cast("B") if view.format != "B" or view.ndim != 1 else view
+
+def _strobe_runs_(strobe_mask: Any, num_bytes: int) -> list[tuple[int, int]]:
+    """
+    Find the runs of enabled bytes of a block strobe.
+
+    :param strobe_mask: Byte enables - an int (bit i enables byte i) or a buffer of per-byte flags (non-zero enables).
+    :type strobe_mask: Any
+    :param num_bytes: Number of bytes in the block.
+    :type num_bytes: int
+    :return: (start, end) offsets of each run of enabled bytes.
+    :rtype: list[tuple[int, int]]
+    :raises ValueError: If a buffer strobe doesn't have one flag per byte.
+    """
+    if isinstance(strobe_mask, int):
+        raw = np.frombuffer(strobe_mask.to_bytes((num_bytes + 7) // 8, "little"), dtype=np.uint8)
+        enabled = np.unpackbits(raw, bitorder="little")[:num_bytes].astype(bool)
+    else:
+        enabled = np.asarray(strobe_mask).reshape(-1) != 0
+        if len(enabled) != num_bytes:
+            raise ValueError(f"Strobe has {len(enabled)} flags for {num_bytes} bytes")
+
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], enabled, [False])).astype(np.int8)))
+    return list(zip(edges[0::2].tolist(), edges[1::2].tolist(), strict=True))
+
+class _ByteMap_(MutableMapping):
+    """
+    Mapping of the touched bytes (written or read) of a memory by address - a view, so assignments write through.
+    """
+
+    def __init__(self, memory: "Memory") -> None:
+        """
+        Initialize the view.
+
+        :param memory: The memory.
+        :type memory: Memory
+        """
+        self._memory_ = memory
+
+    def __getitem__(self, address: int) -> int:
+        m = self._memory_
+        index, offset = address >> m._page_shift_, address & (m.page_size - 1)
+        flags = m._touched_.get(index)
+        if flags is None or not flags[offset]:
+            raise KeyError(address)
+        return m.pages[index][offset]
+
+    def __setitem__(self, address: int, value: int) -> None:
+        self._memory_._store_(address, bytes([value]))
+
+    def __delitem__(self, address: int) -> None:
+        m = self._memory_
+        index, offset = address >> m._page_shift_, address & (m.page_size - 1)
+        flags = m._touched_.get(index)
+        if flags is None or not flags[offset]:
+            raise KeyError(address)
+        flags[offset] = 0
+        if isinstance(m.pages[index], bytearray):
+            m.pages[index][offset] = m.init_fn(address)
+
+    def __contains__(self, address: object) -> bool:
+        if not isinstance(address, int):
+            return False
+        m = self._memory_
+        flags = m._touched_.get(address >> m._page_shift_)
+        return flags is not None and bool(flags[address & (m.page_size - 1)])
+
+    def __iter__(self) -> Iterator[int]:
+        m = self._memory_
+        for index in sorted(m._touched_):
+            base = index << m._page_shift_
+            for offset in np.flatnonzero(np.frombuffer(m._touched_[index], dtype=np.uint8)).tolist():
+                yield base + offset
+
+    def __len__(self) -> int:
+        return sum(flags.count(1) for flags in self._memory_._touched_.values())
 
 class Memory:
 
-    def __init__(self, width : int = 32) -> None:
+    def __init__(self, width : int = 32, page_size : int = PAGE_SIZE) -> None:
         """
         Initialize the memory model.
 
+        The memory is stored sparsely, as pages of page_size bytes allocated on first access, with a map of the bytes
+        touched (written or read) in each page.
+
         :param width: Width of the memory in bits (default is 32).
         :type width: int
-        :raises ValueError: If width is not a positive integer.
+        :param page_size: Size of the storage pages in bytes - a power of 2 (default is PAGE_SIZE).
+        :type page_size: int
+        :raises ValueError: If width is not a positive integer, or page_size is not a power of 2.
         """
         if width <= 0 or width % 8 != 0:
             raise ValueError("Width must be a positive integer and a multiple of 8.")
+        if page_size <= 0 or page_size & (page_size - 1):
+            raise ValueError("Page size must be a power of 2.")
 
         self.width = width
         self.ranges = []
-        self.memory = {}
+        self.watches = []
+        self._attributes_ = []
+        self._indexed_ = -1
+        self.pages = {}
+        self.mappings = []
+        self.page_size = page_size
+        self._page_shift_ = page_size.bit_length() - 1
+        self._touched_ = {}
         self.endianness = 'little'
-        self.init_fn = lambda address : 0
+        self.init_fn = _zero_init_
+
+    @property
+    def memory(self) -> MutableMapping[int, int]:
+        """
+        Contents of the touched (written or read) bytes by address.
+
+        A view of the memory - assigning a byte writes it (without range checks or watches), and deleting a byte
+        returns it to its initial value.
+
+        :return: Byte values by address.
+        :rtype: MutableMapping[int, int]
+        """
+        return _ByteMap_(self)
+
+    @memory.setter
+    def memory(self, contents: dict[int, int]) -> None:
+        """
+        Replace the contents of the memory.
+
+        :param contents: Byte values by address.
+        :type contents: dict[int, int]
+        """
+        contents = dict(contents)
+        self.pages, self._touched_ = {}, {}
+        for address, byte in contents.items():
+            self._store_(address, bytes([byte]))
+
+    def _page_(self, index: int) -> bytearray | memoryview | bytes:
+        """
+        Get a page of the memory, allocating it on first access.
+
+        Pages of mapped files (see map_file()) are views of the mapping, other new pages are initialized by init_fn
+        (see set_init_fn()).
+
+        :param index: Index of the page (address // page_size).
+        :type index: int
+        :return: The page.
+        :rtype: bytearray | memoryview | bytes
+        """
+        page = self.pages.get(index)
+        if page is None:
+            page = self._map_page_(index) if self.mappings else None
+            if page is None and self.init_fn is _zero_init_:
+                page = bytearray(self.page_size)
+            elif page is None:
+                base = index << self._page_shift_
+                page = bytearray(self.init_fn(a) for a in range(base, base + self.page_size))
+            self.pages[index] = page
+        return page
+
+    def _map_page_(self, index: int) -> bytearray | memoryview | bytes | None:
+        """
+        Get a page from the mapped files.
+
+        The last page of a read-only or copy-on-write file which isn't a whole number of pages is a copy, padded
+        with zeros - read-only for read-only files. Read / write files are always mapped in whole pages (see
+        map_file()).
+
+        :param index: Index of the page (address // page_size).
+        :type index: int
+        :return: The page, or None if it isn't in a mapped file.
+        :rtype: bytearray | memoryview | bytes | None
+        """
+        address = index << self._page_shift_
+        for base, size, mm, mode, indices in self.mappings:
+            if base <= address < base + size:
+                offset = address - base
+                indices.add(index)
+                if offset + self.page_size <= size:
+                    return memoryview(mm)[offset:offset + self.page_size]
+                page = bytearray(mm[offset:size]) + bytearray(self.page_size - (size - offset))
+                return bytes(page) if mode == "r" else page
+        return None
+
+    def _touch_(self, index: int, offset: int, num_bytes: int) -> None:
+        """
+        Mark bytes of a page as touched.
+
+        :param index: Index of the page (address // page_size).
+        :type index: int
+        :param offset: Offset of the first byte in the page.
+        :type offset: int
+        :param num_bytes: Number of bytes.
+        :type num_bytes: int
+        """
+        flags = self._touched_.get(index)
+        if flags is None:
+            flags = self._touched_[index] = bytearray(self.page_size)
+        flags[offset:offset + num_bytes] = b"\x01" * num_bytes
+
+    def _load_(self, address: int, num_bytes: int, touch: bool = True) -> bytes:
+        """
+        Copy bytes out of the memory, without range checks.
+
+        :param address: Address of the first byte.
+        :type address: int
+        :param num_bytes: Number of bytes.
+        :type num_bytes: int
+        :param touch: Mark the bytes as touched (see memory). Defaults to True.
+        :type touch: bool
+        :return: The bytes.
+        :rtype: bytes
+        """
+        offset = address & (self.page_size - 1)
+        if offset + num_bytes <= self.page_size:
+            index = address >> self._page_shift_
+            if touch:
+                self._touch_(index, offset, num_bytes)
+            return bytes(self._page_(index)[offset:offset + num_bytes])
+
+        data = bytearray()
+        while num_bytes:
+            n = min(num_bytes, self.page_size - offset)
+            if touch:
+                self._touch_(address >> self._page_shift_, offset, n)
+            data += self._page_(address >> self._page_shift_)[offset:offset + n]
+            address, num_bytes, offset = address + n, num_bytes - n, 0
+        return bytes(data)
+
+    def _store_(self, address: int, data: bytes) -> None:
+        """
+        Copy bytes into the memory, without range checks.
+
+        :param address: Address of the first byte.
+        :type address: int
+        :param data: The bytes.
+        :type data: bytes
+        """
+        offset = address & (self.page_size - 1)
+        i = 0
+        while i < len(data):
+            n = min(len(data) - i, self.page_size - offset)
+            page = self._page_(address >> self._page_shift_)
+            try:
+                page[offset:offset + n] = data[i:i + n]
+            except TypeError:
+                raise ValueError(f"Write to read-only mapped file at {address}") from None
+            self._touch_(address >> self._page_shift_, offset, n)
+            address, i, offset = address + n, i + n, 0
 
     def _align_address_(self, address: int) -> int:
         """
@@ -37,17 +305,76 @@ class Memory:
         """
         return address & ~(self.width // 8 - 1)
 
-    def _check_address_(self, address: int) -> None:
+    def _build_index_(self) -> None:
+        """
+        Build the interval index of the ranges and watches.
+
+        The address space between the lowest and highest bound is split into contiguous segments at every range and
+        watch bound. Each segment records the first range containing it (-1 if none), and the read / write callbacks
+        of the watches containing it, so any address is resolved by one bisection.
+        """
+        opening, closing = {}, {}
+        for i, (start, end) in enumerate(self.ranges):
+            opening.setdefault(start, []).append((0, i))
+            closing.setdefault(end, []).append((0, i))
+        for i, (start, end, _, _) in enumerate(self.watches):
+            opening.setdefault(start, []).append((1, i))
+            closing.setdefault(end, []).append((1, i))
+
+        self._starts_, self._ends_, self._owners_, self._watchers_ = [], [], [], []
+        active = (set(), set())
+        bounds = sorted(opening.keys() | closing.keys())
+        for lo, hi in zip(bounds, bounds[1:], strict=False):
+            for kind, i in closing.get(lo, ()):
+                active[kind].discard(i)
+            for kind, i in opening.get(lo, ()):
+                active[kind].add(i)
+
+            watches = [self.watches[i] for i in sorted(active[1])]
+            owner = min(active[0], default=-1)
+            watchers = (tuple(w[2] for w in watches if w[2] is not None), tuple(w[3] for w in watches if w[3] is not None))
+            if self._owners_ and self._ends_[-1] == lo and (self._owners_[-1], self._watchers_[-1]) == (owner, watchers):
+                self._ends_[-1] = hi
+                continue
+            self._starts_.append(lo)
+            self._ends_.append(hi)
+            self._owners_.append(owner)
+            self._watchers_.append(watchers)
+
+        # Number of watched segments before each segment - to skip watch lookups for blocks without watches
+        self._watched_ = [0]
+        for reads, writes in self._watchers_:
+            self._watched_.append(self._watched_[-1] + bool(reads or writes))
+        self._indexed_ = len(self.ranges) + len(self.watches)
+
+    def _segment_(self, address: int) -> int:
+        """
+        Find the segment of the interval index containing an address.
+
+        :param address: The address.
+        :type address: int
+        :return: Index of the segment, or -1 if the address is outside all ranges and watches.
+        :rtype: int
+        """
+        if self._indexed_ != len(self.ranges) + len(self.watches):
+            self._build_index_()
+        i = bisect_right(self._starts_, address) - 1
+        return i if i >= 0 and address < self._ends_[i] else -1
+
+    def _check_address_(self, address: int) -> bool:
         """
         Check if the address is valid.
 
+        Calls miss() if the address is not in any range.
+
         :param address: Address to check.
         :type address: int
-        :raises ValueError: If address is not a positive integer.
+        :return: True if the address is in a range.
+        :rtype: bool
         """
-        for r in self.ranges:
-            if address >= r[0] and address < r[1]:
-                return True
+        i = self._segment_(address)
+        if i >= 0 and self._owners_[i] >= 0:
+            return True
 
         self.miss(address)
         return False
@@ -60,17 +387,15 @@ class Memory:
         :type address: int
         :return: Byte value at the specified address.
         :rtype: int
-        :raises KeyError: If address is not in memory.
         """
-        if address not in self.memory:
-            self.memory[address] = self.init_fn(address)
-        return self.memory[address]
+        return self._load_(address, 1)[0]
 
     def set_init_fn(self, fn : callable) -> None:
         """
         Set the initialization policy for the memory
 
         Defined as a lambda function that takes an address and returns a value.
+        It is applied to a whole page of bytes when the page is first accessed, so only affects pages not yet allocated.
 
         :param fn: Function to initialize memory at a given address.
         :type fn: callable
@@ -92,19 +417,77 @@ class Memory:
             raise ValueError("Endianness must be either 'little' or 'big'.")
         self.endianness = endianness
 
-    def add_range(self, start: int, end: int) -> None:
+    def add_range(self, start: int, end: int, **attributes: Any) -> None:
         """
         Add a memory range.
 
+        Ranges are held in a sorted interval index, so address checks don't depend on the number of ranges.
+
         :param start: Start address of the memory range.
         :type start: int
         :param end: End address of the memory range.
         :type end: int
+        :param attributes: Attributes of the range (e.g. name="sram"), returned by get_region().
+        :type attributes: Any
         :raises ValueError: If start address is not less than end address.
         """
         if start >= end:
             raise ValueError("Start address must be less than end address.")
         self.ranges.append((start, end))
+        self._attributes_ += [{}] * (len(self.ranges) - 1 - len(self._attributes_))
+        self._attributes_.append(attributes)
+        self._indexed_ = -1
+
+    def get_region(self, address: int) -> dict[str, Any] | None:
+        """
+        Get the range containing an address, with its attributes.
+
+        If ranges overlap, the first range added is returned.
+
+        :param address: The address.
+        :type address: int
+        :return: The start, end and attributes of the range, or None if the address is not in any range.
+        :rtype: dict[str, Any] | None
+        """
+        i = self._segment_(address)
+        if i < 0 or self._owners_[i] < 0:
+            return None
+
+        owner = self._owners_[i]
+        start, end = self.ranges[owner]
+        attributes = self._attributes_[owner] if owner < len(self._attributes_) else {}
+        return {"start": start, "end": end, **attributes}
+
+    def add_watch(
+        self,
+        start: int,
+        end: int,
+        on_read: Callable[[int, bytes], None] = None,
+        on_write: Callable[[int, bytes], None] = None,
+    ) -> None:
+        """
+        Watch accesses to an address range.
+
+        The callbacks are called after each read / write access (read(), write(), read_block(), ...) overlapping the
+        range, with the address and bytes (in address order) of the whole access - for writes, the contents after
+        the write. Watches are part of the interval index, so accesses outside watched ranges cost nothing extra.
+
+        :param start: Start address of the watched range.
+        :type start: int
+        :param end: End address of the watched range.
+        :type end: int
+        :param on_read: Function called on reads, as on_read(address, data).
+        :type on_read: Callable[[int, bytes], None], optional
+        :param on_write: Function called on writes, as on_write(address, data).
+        :type on_write: Callable[[int, bytes], None], optional
+        :raises ValueError: If start address is not less than end address, or no callback is given.
+        """
+        if start >= end:
+            raise ValueError("Start address must be less than end address.")
+        if on_read is None and on_write is None:
+            raise ValueError("At least one of on_read / on_write must be given.")
+        self.watches.append((start, end, on_read, on_write))
+        self._indexed_ = -1
 
     def miss(self, address : int) -> None:
         """
@@ -132,12 +515,10 @@ class Memory:
         if num_bytes is None:
             num_bytes = self.width // 8
 
-        self._check_address_(address)
-        self._check_address_(address + num_bytes - 1)
-
-        data = bytearray()
-        for i in range(num_bytes):
-            data.append(self._get_byte_(address + i))
+        callbacks = self._check_block_(address, num_bytes)
+        data = self._load_(address, num_bytes)
+        for fn in callbacks:
+            fn(address, data)
 
         return int.from_bytes(data, self.endianness)
 
@@ -159,23 +540,335 @@ class Memory:
         if num_bytes is None:
             num_bytes = self.width // 8
 
+        mask = (1 << num_bytes) - 1
         if strobe is None:
-            strobe = (1 << num_bytes) - 1
+            strobe = mask
 
-        self._check_address_(address)
-        self._check_address_(address + num_bytes - 1)
+        callbacks = self._check_block_(address, num_bytes, write=True)
 
         data = value.to_bytes(num_bytes, self.endianness)
-        for i in range(num_bytes):
-            offset = i if self.endianness == 'little' else num_bytes - 1 - i
-            if strobe & (1 << offset):
-                self.memory[address + i] = data[i]
+        if strobe & mask == mask:
+            self._store_(address, data)
+        else:
+            for i in range(num_bytes):
+                offset = i if self.endianness == 'little' else num_bytes - 1 - i
+                if strobe & (1 << offset):
+                    self._store_(address + i, data[i:i + 1])
+
+        self._notify_(callbacks, address, num_bytes)
+
+    def _check_block_(self, address: int, num_bytes: int, write: bool = False) -> tuple[Callable[[int, bytes], None], ...]:
+        """
+        Check the first and last address of a block, and find the watches of the access.
+
+        :param address: Address of the first byte.
+        :type address: int
+        :param num_bytes: Number of bytes.
+        :type num_bytes: int
+        :param write: The access is a write. Defaults to False.
+        :type write: bool
+        :return: The callbacks of the watches overlapping the block.
+        :rtype: tuple[Callable[[int, bytes], None], ...]
+        """
+        if num_bytes <= 0:
+            return ()
+        if self._indexed_ != len(self.ranges) + len(self.watches):
+            self._build_index_()
+
+        # Common case - the block is within one segment of a range
+        last = address + num_bytes - 1
+        i = bisect_right(self._starts_, address) - 1
+        if i >= 0 and last < self._ends_[i] and self._owners_[i] >= 0:
+            return self._watchers_[i][write]
+
+        self._check_address_(address)
+        self._check_address_(last)
+        if not self._watched_[-1]:
+            return ()
+
+        lo = max(bisect_right(self._starts_, address) - 1, 0)
+        hi = bisect_right(self._starts_, last) - 1
+        if hi < lo or self._watched_[hi + 1] == self._watched_[lo]:
+            return ()
+
+        callbacks = {}
+        for i in range(lo, hi + 1):
+            if self._ends_[i] > address:
+                callbacks.update(dict.fromkeys(self._watchers_[i][write]))
+        return tuple(callbacks)
+
+    def _notify_(self, callbacks: tuple[Callable[[int, bytes], None], ...], address: int, num_bytes: int) -> None:
+        """
+        Call the watch callbacks of an access with the contents of the block.
+
+        :param callbacks: The callbacks (see _check_block_()).
+        :type callbacks: tuple[Callable[[int, bytes], None], ...]
+        :param address: Address of the first byte.
+        :type address: int
+        :param num_bytes: Number of bytes.
+        :type num_bytes: int
+        """
+        if callbacks:
+            data = self._load_(address, num_bytes, touch=False)
+            for fn in callbacks:
+                fn(address, data)
+
+    def read_block(self, address: int, num_bytes: int) -> memoryview:
+        """
+        Read a block of bytes, in address order.
+
+        The range is checked once for the block (calls miss() if the block is not found in memory).
+        A block within one page is returned as a read-only view of the page, without copying - it reflects later
+        writes, so copy it (e.g. bytes()) to keep the values.
+
+        :param address: Address of the first byte.
+        :type address: int
+        :param num_bytes: Number of bytes to read.
+        :type num_bytes: int
+        :return: The bytes.
+        :rtype: memoryview
+        """
+        callbacks = self._check_block_(address, num_bytes)
+        self._notify_(callbacks, address, num_bytes)
+
+        offset = address & (self.page_size - 1)
+        if offset + num_bytes <= self.page_size:
+            index = address >> self._page_shift_
+            self._touch_(index, offset, num_bytes)
+            return memoryview(self._page_(index))[offset:offset + num_bytes].toreadonly()
+        return memoryview(self._load_(address, num_bytes))
+
+    def write_block(self, address: int, buffer: Any, strobe_mask: Any = None) -> None:
+        """
+        Write a block of bytes, in address order.
+
+        The range is checked once for the block (calls miss() if the block is not found in memory).
+
+        :param address: Address of the first byte.
+        :type address: int
+        :param buffer: The bytes - any buffer-protocol object (bytes, bytearray, memoryview, NumPy array, ...).
+        :type buffer: Any
+        :param strobe_mask: Byte enables - an int (bit i enables byte address + i) or a buffer of per-byte flags
+                            (non-zero enables). Defaults to all bytes.
+        :type strobe_mask: Any, optional
+        :raises ValueError: If a buffer strobe doesn't have one flag per byte.
+        """
+        data = _bytes_view_(buffer)
+        callbacks = self._check_block_(address, len(data), write=True)
+
+        if strobe_mask is None:
+            self._store_(address, data)
+        else:
+            for start, end in _strobe_runs_(strobe_mask, len(data)):
+                self._store_(address + start, data[start:end])
+
+        self._notify_(callbacks, address, len(data))
+
+    def read_gather(self, segments: Iterable[tuple[int, int]]) -> bytes:
+        """
+        Read a list of blocks into one contiguous buffer (gather).
+
+        :param segments: (address, num_bytes) of each block, in buffer order.
+        :type segments: Iterable[tuple[int, int]]
+        :return: The bytes of all blocks.
+        :rtype: bytes
+        """
+        data = bytearray()
+        for address, num_bytes in segments:
+            callbacks = self._check_block_(address, num_bytes)
+            block = self._load_(address, num_bytes)
+            for fn in callbacks:
+                fn(address, block)
+            data += block
+        return bytes(data)
+
+    def write_scatter(self, segments: Iterable[tuple[int, int]], buffer: Any) -> None:
+        """
+        Write one contiguous buffer across a list of blocks (scatter).
+
+        The range of every block is checked before any is written.
+
+        :param segments: (address, num_bytes) of each block, in buffer order.
+        :type segments: Iterable[tuple[int, int]]
+        :param buffer: The bytes - any buffer-protocol object.
+        :type buffer: Any
+        :raises ValueError: If the buffer length doesn't match the total length of the blocks.
+        """
+        data = _bytes_view_(buffer)
+        segments = list(segments)
+        total = sum(n for _, n in segments)
+        if total != len(data):
+            raise ValueError(f"Buffer of {len(data)} bytes doesn't match {total} bytes of segments")
+
+        callbacks = [self._check_block_(address, num_bytes, write=True) for address, num_bytes in segments]
+
+        i = 0
+        for (address, num_bytes), fns in zip(segments, callbacks, strict=True):
+            self._store_(address, data[i:i + num_bytes])
+            self._notify_(fns, address, num_bytes)
+            i += num_bytes
+
+    def map_file(self, filename: str, base: int = 0, size: int = None, mode: str = "w") -> None:
+        """
+        Back the memory from base with a memory-mapped file.
+
+        Pages of the mapped range are views of the file, so the contents are paged in and out by the OS rather than
+        held in memory, and init_fn is not applied to them. Any pages already allocated in the range are replaced, and
+        their bytes are no longer touched (see memory).
+
+        Modes:
+
+        - "w" - read / write. The file is created (sparse) if it doesn't exist, and extended to size (or its own
+          size) rounded up to whole pages, and writes go to the file - it holds the memory image when the simulation
+          ends.
+        - "r" - read-only image, writes raise ValueError.
+        - "c" - copy-on-write image. Writes are private to this memory, the file is unchanged - so many tests can
+          share one preloaded image.
+
+        :param filename: Path of the file.
+        :type filename: str
+        :param base: Address of the first byte of the file - a multiple of page_size (default is 0).
+        :type base: int
+        :param size: Number of bytes to map (default is the size of the file).
+        :type size: int, optional
+        :param mode: Mapping mode - "w", "r" or "c" (default is "w").
+        :type mode: str
+        :raises ValueError: If the mode is unknown, base is not aligned to a page, or the size is not valid.
+        :raises FileNotFoundError: If the file doesn't exist (for modes "r" and "c").
+        """
+        if mode not in _MAP_ACCESS_:
+            raise ValueError(f"Unsupported mapping mode: {mode} - expected one of {list(_MAP_ACCESS_)}")
+        if base & (self.page_size - 1):
+            raise ValueError("Base address must be a multiple of the page size.")
+
+        if mode == "r" or mode == "c":
+            file_mode = "rb"
+        elif os.path.exists(filename):
+            file_mode = "r+b"
+        elif size is not None:
+            file_mode = "w+b"
+        else:
+            raise ValueError(f"Size is required to create {filename}")
+
+        with open(filename, file_mode) as f:
+            length = os.fstat(f.fileno()).st_size
+            if size is None:
+                size = length
+            if mode == "w" and size > 0:
+                # Whole pages, so every page is a view of the file
+                size = ((size + self.page_size - 1) >> self._page_shift_) << self._page_shift_
+                if size > length:
+                    length = size
+                    f.truncate(length)
+            if size <= 0 or size > length:
+                raise ValueError(f"Invalid size {size} to map from {filename} of {length} bytes")
+            mm = mmap.mmap(f.fileno(), size, access=_MAP_ACCESS_[mode])
+
+        first, last = base >> self._page_shift_, (base + size - 1) >> self._page_shift_
+        for index in [i for i in self.pages if first <= i <= last]:
+            del self.pages[index]
+            self._touched_.pop(index, None)
+        self.mappings.append((base, size, mm, mode, set()))
+
+    def flush(self) -> None:
+        """
+        Write changes of the read / write mapped files (see map_file()) to disk.
+        """
+        for _, _, mm, mode, _ in self.mappings:
+            if mode == "w":
+                mm.flush()
+
+    def close(self) -> None:
+        """
+        Flush and unmap the mapped files (see map_file()) - their pages are no longer part of the memory.
+
+        Views returned by read_block() from mapped pages must be released first.
+        """
+        self.flush()
+        for _, _, mm, _, indices in self.mappings:
+            for index in indices:
+                page = self.pages.pop(index, None)
+                self._touched_.pop(index, None)
+                if isinstance(page, memoryview):
+                    page.release()
+            mm.close()
+        self.mappings = []
+
+    def _extents_(self) -> list[tuple[int, int]]:
+        """
+        Get the extents of touched (written or read) bytes, merged across pages and sorted.
+
+        :return: (start, end) of each extent.
+        :rtype: list[tuple[int, int]]
+        """
+        extents = []
+        for index in sorted(self._touched_):
+            base = index << self._page_shift_
+            for start, end in _strobe_runs_(self._touched_[index], self.page_size):
+                if extents and extents[-1][1] == base + start:
+                    extents[-1][1] = base + end
+                else:
+                    extents.append([base + start, base + end])
+        return [(start, end) for start, end in extents]
+
+    def _format_words_(self, address: int, count: int, fmt: str) -> str:
+        """
+        Format consecutive words as Verilog hex / binary lines.
+
+        :param address: Address of the first word.
+        :type address: int
+        :param count: Number of words.
+        :type count: int
+        :param fmt: Format - 'vhex' or 'vbin'.
+        :type fmt: str
+        :return: One line per word.
+        :rtype: str
+        """
+        w = self.width // 8
+        words = np.frombuffer(self._load_(address, count * w, touch=False), dtype=np.uint8).reshape(count, w)
+        if self.endianness == 'little':
+            words = words[:, ::-1]
+
+        if fmt == "vhex":
+            chars = np.frombuffer(words.tobytes().hex().encode(), dtype=np.uint8).reshape(count, 2 * w)
+        else:
+            chars = np.unpackbits(words, axis=1) + ord('0')
+
+        lines = np.empty((count, chars.shape[1] + 1), dtype=np.uint8)
+        lines[:, :-1] = chars
+        lines[:, -1] = ord('\n')
+        return lines.tobytes().decode('ascii')
+
+    def _parse_words_(self, tokens: list[str], fmt: str) -> bytes:
+        """
+        Parse full width Verilog hex / binary words.
+
+        :param tokens: The words, of width // 4 hex or width binary digits.
+        :type tokens: list[str]
+        :param fmt: Format - 'vhex' or 'vbin'.
+        :type fmt: str
+        :return: The bytes of the words, in address order.
+        :rtype: bytes
+        """
+        if fmt == "vhex":
+            data = np.frombuffer(bytes.fromhex("".join(tokens)), dtype=np.uint8)
+        else:
+            bits = np.frombuffer("".join(tokens).encode(), dtype=np.uint8) - ord('0')
+            if bits.size and bits.max() > 1:
+                raise ValueError("Invalid binary digits")
+            data = np.packbits(bits)
+
+        if self.endianness == 'little':
+            data = data.reshape(len(tokens), self.width // 8)[:, ::-1]
+        return data.tobytes()
 
     def export_to_file(self, filename: str, fmt : str = None) -> None:
         """
         Export memory contents to a file.
 
         If fmt is not specified, it will be inferred from the file extension.
+        Only the extents of touched (written or read) bytes are visited, and the Verilog, CSV and JSON formats are
+        written in chunks.
 
         :param filename: Path to the file where memory contents will be saved.
         :type filename: str
@@ -184,60 +877,66 @@ class Memory:
         :raises ValueError: If format is not supported.
         """
 
-        def exists(address: int):
-            """
-            Pad the whole memory width
-            """
-            exists = False
-            for i in range(address, address + self.width // 8):
-                if i in self.memory:
-                    exists = True
-                    break
-
-            self.read(self._align_address_(address))
-            return exists
-
         def verilog(filename: str, fmt : str) -> None:
             """
             Export memory contents to a verilog hex file.
+
+            Words of each range containing a touched byte are written, with an address marker before each run.
             """
+            w = self.width // 8
+            extents = self._extents_()
 
             with open(filename, 'w') as f:
                 for r in self.ranges:
-                    new_address = True
-                    for a in range(r[0], r[1], self.width // 8):
-                        if exists(a):
-                            if new_address:
-                                f.write(f"@{a:04x}\n")
-                                new_address = False
-
-                            if fmt == "vhex":
-                                f.write(f"{self.read(a, self.width // 8):0{self.width // 4}x}\n")
-                            elif fmt == "vbin":
-                                f.write(f"{self.read(a, self.width // 8):0{self.width}b}\n")
+                    count = (r[1] - r[0] + w - 1) // w
+
+                    # Runs of consecutive words overlapping the extents
+                    runs = []
+                    for start_address, end_address in extents:
+                        first = max(0, (start_address - r[0]) // w)
+                        last = min(count, -((r[0] - end_address) // w))
+                        if first >= last:
+                            continue
+                        if runs and first <= runs[-1][1]:
+                            runs[-1][1] = max(runs[-1][1], last)
                         else:
-                            new_address = True
+                            runs.append([first, last])
+
+                    for first, last in runs:
+                        f.write(f"@{r[0] + first * w:04x}\n")
+                        for k in range(first, last, _IO_CHUNK_):
+                            f.write(self._format_words_(r[0] + k * w, min(last, k + _IO_CHUNK_) - k, fmt))
 
         def pandas(filename: str, fmt : str) -> None:
             """
             Export memory contents to a pandas DataFrame and save to file.
             """
-            df = pd.DataFrame(list(self.memory.items()), columns=["addr", "data"])
-
-            if fmt == "csv":
-                df.to_csv(filename, index=False)
-            elif fmt == "json":
-                df.to_json(filename, orient='records', lines=True)
-            else:
+            if fmt not in ["csv", "json"]:
                 raise ValueError(f"Unsupported file format: {fmt}")
 
+            with open(filename, 'w') as f:
+                if fmt == "csv":
+                    f.write("addr,data\n")
+                for start_address, end_address in self._extents_():
+                    for a in range(start_address, end_address, _IO_CHUNK_):
+                        n = min(_IO_CHUNK_, end_address - a)
+                        df = pd.DataFrame({
+                            "addr": np.arange(a, a + n, dtype=np.int64),
+                            "data": np.frombuffer(self._load_(a, n, touch=False), dtype=np.uint8),
+                        })
+                        if fmt == "csv":
+                            df.to_csv(f, header=False, index=False)
+                        else:
+                            text = df.to_json(orient='records', lines=True)
+                            f.write(text if text.endswith("\n") else text + "\n")
+
         def bcopy(filename: str, fmt : str) -> None:
             """
             Export memory contents using bincopy.
             """
             bf = bincopy.BinFile()
-            for a,d in self.memory.items():
-                bf[a] = d
+            for start_address, end_address in self._extents_():
+                bf.add_binary(self._load_(start_address, end_address - start_address, touch=False), address=start_address)
 
             if fmt in ["ihex", "hex", "ihx"]:
                 with open(filename, 'w') as f:
@@ -281,60 +980,109 @@ class Memory:
         def verilog(filename: str, fmt : str) -> None:
             """
             Load memory contents from a verilog hex file.
+
+            Runs of consecutive full width words are parsed together and written as blocks.
             """
+            if fmt not in ["vhex", "vbin"]:
+                raise ValueError(f"Unsupported file format: {fmt}")
+
+            w = self.width // 8
+            digits, base, prefix = (2 * w, 16, "0x") if fmt == "vhex" else (8 * w, 2, "0b")
             addr = self.ranges[0][0] if self.ranges else 0
+            run, run_addr = [], addr
+
+            def flush() -> None:
+                if run:
+                    self.write_block(run_addr, self._parse_words_(run, fmt))
+                    run.clear()
+
+            def words(tokens: list[str]) -> None:
+                nonlocal addr, run_addr
+                if not run:
+                    run_addr = addr
+                run.extend(tokens)
+                addr += w * len(tokens)
+                if len(run) >= _IO_CHUNK_:
+                    flush()
+
+            def parse(raw: str) -> None:
+                nonlocal addr
+                line = raw.strip()
+                if not line:
+                    return
+
+                # Comments (//, ;, #)
+                for sep in ('//', ';', '#'):
+                    if sep in line:
+                        line = line.split(sep, 1)[0]
+                line = line.strip()
+                if not line:
+                    return
+
+                # New base address
+                if line.startswith('@'):
+                    flush()
+                    try:
+                        addr = int(line[1:], 16)
+                    except Exception as e:
+                        raise ValueError(f"Invalid address marker: {line!r}") from e
+                    return
+
+                # Tokens separated by whitespace
+                t = line.replace(" ", "")
+                if t.startswith(prefix):
+                    t = t[2:]
+
+                # Full width words are parsed with the rest of their run
+                if len(t) == digits:
+                    words([t])
+                else:
+                    flush()
+                    self.write(addr, int(t, base), len(t) // (2 if base == 16 else 8))
+                    addr += w
 
             with open(filename) as f:
-                for raw in f:
-                    line = raw.strip()
-                    if not line:
-                        continue
-
-                    # Comments (//, ;, #)
-                    for sep in ('//', ';', '#'):
-                        if sep in line:
-                            line = line.split(sep, 1)[0]
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    # New base address
-                    if line.startswith('@'):
-                        try:
-                            addr = int(line[1:], 16)
-                        except Exception as e:
-                            raise ValueError(f"Invalid address marker: {line!r}") from e
-                        continue
-
-                    # Tokens separated by whitespace
-                    t = line.replace(" ", "")
-                    if t.startswith('0x') or t.startswith('0b'):
-                        t = t[2:]
-
-                    if fmt == "vhex":
-                        bytes = int(t, 16).to_bytes(len(t) // 2, self.endianness)
-                        for i in range(len(bytes)):
-                            self.write(addr+i, bytes[i], 1)
-                    elif fmt == "vbin":
-                        bytes = int(t, 2).to_bytes(len(t) // 8, self.endianness)
-                        for i in range(len(bytes)):
-                            self.write(addr+i, bytes[i], 1)
-                    else:
-                        raise ValueError(f"Unsupported file format: {fmt}")
-                    addr += self.width // 8
+                for lines in iter(lambda: f.readlines(_IO_CHUNK_ * (digits + 1)), []):
+                    # Chunks of address markers and full width words (no comments, prefixes or spaces) are split at once
+                    chunk = "".join(lines)
+                    if not any(c in chunk for c in ('/', ';', '#', ' ', '\t', prefix[1])):
+                        parts = chunk.split('@')
+                        pieces = [("", parts[0].split())]
+                        pieces += [(marker, rest.split()) for marker, _, rest in (p.partition('\n') for p in parts[1:])]
+                        if all(len(t) == digits for _, tokens in pieces for t in tokens):
+                            for marker, tokens in pieces:
+                                if marker:
+                                    parse('@' + marker)
+                                words(tokens)
+                            continue
+
+                    for raw in lines:
+                        parse(raw)
+
+                flush()
 
         def pandas(filename: str, fmt : str) -> None:
             """
             Export memory contents to a pandas DataFrame and save to file.
             """
             if fmt == "csv":
-                df = pd.read_csv(filename)
+                chunks = pd.read_csv(filename, chunksize=_IO_CHUNK_)
             elif fmt == "json":
-                df = pd.read_json(filename, orient='records', lines=True)
+                chunks = pd.read_json(filename, orient='records', lines=True, chunksize=_IO_CHUNK_)
             else:
                 raise ValueError(f"Unsupported file format: {fmt}")
 
-            self.memory = dict(zip(df["addr"], df["data"], strict=False))
+            # Replace the contents, storing runs of consecutive addresses as blocks
+            self.pages, self._touched_ = {}, {}
+            for df in chunks:
+                addr = df["addr"].to_numpy(dtype=np.int64)
+                data = df["data"].to_numpy(dtype=np.uint8)
+                order = np.argsort(addr, kind='stable')
+                addr, data = addr[order], data[order]
+                breaks = np.flatnonzero(np.diff(addr) != 1) + 1
+                for a, d in zip(np.split(addr, breaks), np.split(data, breaks), strict=True):
+                    if len(a):
+                        self._store_(int(a[0]), d.tobytes())
 
         def bcopy(filename: str, fmt : str) -> None:
             """
@@ -343,9 +1091,7 @@ class Memory:
             bf = bincopy.BinFile(filename)
 
             for start_address, data in bf.segments:
-                for offset, byte_val in enumerate(data):
-                    addr = start_address + offset
-                    self.memory[addr] = byte_val
+                self._store_(start_address, data)
 
         # Default format from file extension
         if fmt is None:
@@ -361,4 +1107,4 @@ class Memory:
             except Exception as e:
                 raise ValueError(f"Unsupported file format: {fmt}") from e
 
-__all__ = ["Memory"]
+__all__ = ["PAGE_SIZE", "Memory"]
@@ -0,0 +1,1625 @@
+# Copyright 2024 Apheleia
+#
+# Description:
+# Apheleia Verification Library Native Constraint Solver
+
+from __future__ import annotations
+
+import math
+import os
+import random
+from collections import Counter, OrderedDict
+from collections.abc import Callable
+from fractions import Fraction
+from typing import Any
+
+from z3 import (
+    Z3_OP_ADD,
+    Z3_OP_AND,
+    Z3_OP_BADD,
+    Z3_OP_BNEG,
+    Z3_OP_BSUB,
+    Z3_OP_DISTINCT,
+    Z3_OP_EQ,
+    Z3_OP_GE,
+    Z3_OP_GT,
+    Z3_OP_IMPLIES,
+    Z3_OP_ITE,
+    Z3_OP_LE,
+    Z3_OP_LT,
+    Z3_OP_NOT,
+    Z3_OP_OR,
+    Z3_OP_SGEQ,
+    Z3_OP_SGT,
+    Z3_OP_SIGN_EXT,
+    Z3_OP_SLEQ,
+    Z3_OP_SLT,
+    Z3_OP_SUB,
+    Z3_OP_UGEQ,
+    Z3_OP_UGT,
+    Z3_OP_ULEQ,
+    Z3_OP_ULT,
+    Z3_OP_UMINUS,
+    Z3_OP_ZERO_EXT,
+    is_app,
+    is_bv,
+    is_bv_value,
+    is_expr,
+    is_int,
+    is_int_value,
+    is_rational_value,
+    is_real,
+    is_true,
+)
+
+# Solve simple constraints natively (0 to always use z3)
+NATIVE_SOLVER = os.environ.get("AVL_NATIVE_SOLVER", "1") != "0"
+
+# Number of attempts to sample a group with relations before falling back to z3
+NATIVE_ATTEMPTS = 16
+
+# Number of times a value is re-drawn on a collision (e.g. Distinct) before drawing from the values left
+NATIVE_REDRAWS = 8
+
+# Number of memoized plans (0 to disable)
+NATIVE_CACHE_SIZE = int(os.environ.get("AVL_NATIVE_CACHE_SIZE", 1024))
+
+# Memoized (hard, symbols, plan), keyed by the z3 ids of the constraints and variables.
+# z3 hash-conses expressions, so equal constraints share an id while the entry keeps them alive
+_plan_cache_ = OrderedDict()
+
+_COMPARE_ = {
+    Z3_OP_EQ, Z3_OP_DISTINCT,
+    Z3_OP_SLT, Z3_OP_SLEQ, Z3_OP_SGT, Z3_OP_SGEQ,
+    Z3_OP_ULT, Z3_OP_ULEQ, Z3_OP_UGT, Z3_OP_UGEQ,
+    Z3_OP_LT, Z3_OP_LE, Z3_OP_GT, Z3_OP_GE,
+}
+
+# Operator of not(a op b)
+_NEGATE_ = {
+    Z3_OP_EQ: Z3_OP_DISTINCT, Z3_OP_DISTINCT: Z3_OP_EQ,
+    Z3_OP_SLT: Z3_OP_SGEQ, Z3_OP_SGEQ: Z3_OP_SLT, Z3_OP_SLEQ: Z3_OP_SGT, Z3_OP_SGT: Z3_OP_SLEQ,
+    Z3_OP_ULT: Z3_OP_UGEQ, Z3_OP_UGEQ: Z3_OP_ULT, Z3_OP_ULEQ: Z3_OP_UGT, Z3_OP_UGT: Z3_OP_ULEQ,
+    Z3_OP_LT: Z3_OP_GE, Z3_OP_GE: Z3_OP_LT, Z3_OP_LE: Z3_OP_GT, Z3_OP_GT: Z3_OP_LE,
+}
+
+# Orderings (a op b) which chain, as (strict, signed)
+_ORDER_ = {
+    Z3_OP_ULT: (True, False), Z3_OP_ULEQ: (False, False), Z3_OP_SLT: (True, True), Z3_OP_SLEQ: (False, True),
+    Z3_OP_LT: (True, False), Z3_OP_LE: (False, False),
+}
+
+# Orderings between variables which don't wrap around, with bounds to propagate (see _propagate_())
+_BOUNDS_ = (Z3_OP_LT, Z3_OP_LE, Z3_OP_GT, Z3_OP_GE)
+
+# Operator of b op a
+_FLIP_ = {
+    Z3_OP_EQ: Z3_OP_EQ, Z3_OP_DISTINCT: Z3_OP_DISTINCT,
+    Z3_OP_SLT: Z3_OP_SGT, Z3_OP_SGT: Z3_OP_SLT, Z3_OP_SLEQ: Z3_OP_SGEQ, Z3_OP_SGEQ: Z3_OP_SLEQ,
+    Z3_OP_ULT: Z3_OP_UGT, Z3_OP_UGT: Z3_OP_ULT, Z3_OP_ULEQ: Z3_OP_UGEQ, Z3_OP_UGEQ: Z3_OP_ULEQ,
+    Z3_OP_LT: Z3_OP_GT, Z3_OP_GT: Z3_OP_LT, Z3_OP_LE: Z3_OP_GE, Z3_OP_GE: Z3_OP_LE,
+}
+
+def _normalize_(ivs: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """
+    Sort and merge a list of intervals.
+
+    :param ivs: Inclusive (lo, hi) intervals.
+    :type ivs: list[tuple[int, int]]
+    :return: Sorted, disjoint intervals.
+    :rtype: list[tuple[int, int]]
+    """
+    result = []
+    for lo, hi in sorted(iv for iv in ivs if iv[0] <= iv[1]):
+        if result and lo <= result[-1][1] + 1:
+            result[-1] = (result[-1][0], max(result[-1][1], hi))
+        else:
+            result.append((lo, hi))
+    return result
+
+def _intersect_(a: list[tuple[int, int]], b: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """
+    Intersect two sorted, disjoint interval lists.
+
+    :param a: Intervals.
+    :type a: list[tuple[int, int]]
+    :param b: Intervals.
+    :type b: list[tuple[int, int]]
+    :return: The intersection.
+    :rtype: list[tuple[int, int]]
+    """
+    result = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        lo = max(a[i][0], b[j][0])
+        hi = min(a[i][1], b[j][1])
+        if lo <= hi:
+            result.append((lo, hi))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+def _complement_(a: list[tuple[int, int]], universe: tuple[int, int]) -> list[tuple[int, int]]:
+    """
+    Complement a sorted, disjoint interval list within a universe.
+
+    :param a: Intervals.
+    :type a: list[tuple[int, int]]
+    :param universe: The (lo, hi) universe.
+    :type universe: tuple[int, int]
+    :return: The complement.
+    :rtype: list[tuple[int, int]]
+    """
+    result = []
+    lo = universe[0]
+    for start, end in a:
+        if start > lo:
+            result.append((lo, start - 1))
+        lo = max(lo, end + 1)
+    if lo <= universe[1]:
+        result.append((lo, universe[1]))
+    return result
+
+class _Domain_:
+    """
+    The value space of a variable.
+
+    Bit-vectors are held as raw (unsigned) values, modulo 2 ** width. Signed comparisons are mapped onto raw values.
+    Integers are held as is, bounded by the range of the Var.
+    Reals of floating-point Vars (Fp16 / Fp32 / Fp64) are held as ordinals of the float format - consecutive floats
+    have consecutive ordinals, so comparisons map onto intervals of ordinals. Values are drawn uniformly by value.
+    """
+
+    def __init__(self, symbol: Any, var: Any) -> None:
+        """
+        Initialize the domain of a variable.
+
+        :param symbol: The z3 variable.
+        :type symbol: Any
+        :param var: The Var.
+        :type var: Var
+        :raises TypeError: If the variable is neither a bit-vector, an integer nor a floating-point real.
+        """
+        self.float = None
+        if is_bv(symbol):
+            self.width = symbol.size()
+            self.mod = 1 << self.width
+            self.universe = (0, self.mod - 1)
+        elif is_int(symbol):
+            self.width = None
+            self.mod = None
+            self.universe = tuple(int(v) for v in var._range_())
+        elif is_real(symbol) and hasattr(var, "_bits_"):
+            self.width = None
+            self.mod = None
+            self.float = type(var.value)
+            self.raw = type(var._bits_)
+            self.sign = 1 << (8 * self.raw(0).itemsize - 1)
+            self.universe = tuple(self.ordinal(self.float(v)) for v in var._range_())
+        else:
+            raise TypeError(f"No native domain for {symbol.sort()}")
+
+    def ordinal(self, f: Any) -> int:
+        """
+        Get the ordinal of a float (0 for both zeros, negative for negative floats).
+
+        :param f: The float, in the format of the domain.
+        :type f: Any
+        :return: The ordinal.
+        :rtype: int
+        """
+        bits = int(f.view(self.raw))
+        return bits if bits < self.sign else self.sign - bits
+
+    def to_float(self, o: int) -> Fraction:
+        """
+        Get the exact value of the float with an ordinal.
+
+        :param o: The ordinal.
+        :type o: int
+        :return: The value.
+        :rtype: Fraction
+        """
+        return Fraction(float(self.value(o)))
+
+    def value(self, o: int) -> Any:
+        """
+        Get the float with an ordinal.
+
+        :param o: The ordinal.
+        :type o: int
+        :return: The float, in the format of the domain.
+        :rtype: Any
+        """
+        return self.raw(o if o >= 0 else self.sign - o).view(self.float)
+
+    def floor(self, c: Fraction) -> int:
+        """
+        Get the ordinal of the greatest float at or below a value - one below the universe if there is none.
+
+        :param c: The value.
+        :type c: Fraction
+        :return: The ordinal.
+        :rtype: int
+        """
+        lo, hi = self.universe
+        if c < self.to_float(lo):
+            return lo - 1
+        if c >= self.to_float(hi):
+            return hi
+
+        o = min(max(self.ordinal(self.float(float(c))), lo), hi)
+        while self.to_float(o) > c:
+            o -= 1
+        while o < hi and self.to_float(o + 1) <= c:
+            o += 1
+        return o
+
+    def draw(self, ivs: list[tuple[int, int]]) -> int:
+        """
+        Sample a value from a set - uniformly by value for floats.
+
+        :param ivs: Intervals (not empty).
+        :type ivs: list[tuple[int, int]]
+        :return: The value.
+        :rtype: int
+        """
+        if self.float is None:
+            return _draw_(ivs)
+
+        # Pick an interval by its length, then a value within it (halved so the widest range can't overflow)
+        spans = [float(self.value(end)) / 2 - float(self.value(start)) / 2 for start, end in ivs]
+        if not sum(spans) > 0:
+            return _draw_(ivs)
+        start, end = random.choices(ivs, weights=spans)[0]
+        f = random.uniform(float(self.value(start)), float(self.value(end)))
+        return min(max(self.ordinal(self.float(f)), start), end)
+
+    def shift(self, a: list[tuple[int, int]], d: int) -> list[tuple[int, int]]:
+        """
+        Add a constant to every value of a set.
+
+        :param a: Intervals.
+        :type a: list[tuple[int, int]]
+        :param d: The constant.
+        :type d: int
+        :return: The shifted set.
+        :rtype: list[tuple[int, int]]
+        """
+        if self.mod is None:
+            return [(start + d, end + d) for start, end in a]
+
+        result = []
+        for start, end in a:
+            lo = (start + d) % self.mod
+            hi = lo + end - start
+            if hi < self.mod:
+                result.append((lo, hi))
+            else:
+                result.extend([(lo, self.mod - 1), (0, hi - self.mod)])
+        return _normalize_(result)
+
+    def negate(self, a: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """
+        Negate every value of a set.
+
+        :param a: Intervals.
+        :type a: list[tuple[int, int]]
+        :return: The negated set.
+        :rtype: list[tuple[int, int]]
+        """
+        if self.mod is None:
+            return [(-end, -start) for start, end in reversed(a)]
+
+        result = []
+        for start, end in a:
+            if start == 0:
+                result.append((0, 0))
+                start = 1
+            if start <= end:
+                result.append((self.mod - end, self.mod - start))
+        return _normalize_(result)
+
+    def compare(self, op: int, c: int) -> list[tuple[int, int]]:
+        """
+        The values x for which (x op c) holds.
+
+        :param op: The z3 comparison operator.
+        :type op: int
+        :param c: The constant.
+        :type c: int
+        :return: Intervals.
+        :rtype: list[tuple[int, int]]
+        """
+        if self.float is not None and isinstance(c, Fraction):
+            return self._compare_float_(op, c)
+
+        if self.mod is None:
+            # Unbounded until the result is clipped to the universe
+            lo, hi = (-math.inf, math.inf)
+        else:
+            lo, hi = self.universe
+            c %= self.mod
+
+        if op == Z3_OP_EQ:
+            ivs = [(c, c)]
+        elif op == Z3_OP_DISTINCT:
+            return _complement_([(c, c)], (lo, hi))
+        elif op in (Z3_OP_ULT, Z3_OP_LT):
+            ivs = [(lo, c - 1)]
+        elif op in (Z3_OP_ULEQ, Z3_OP_LE):
+            ivs = [(lo, c)]
+        elif op in (Z3_OP_UGT, Z3_OP_GT):
+            ivs = [(c + 1, hi)]
+        elif op in (Z3_OP_UGEQ, Z3_OP_GE):
+            ivs = [(c, hi)]
+        else:
+            # Signed - compare in signed space and map back onto raw values
+            half = self.mod >> 1
+            s = c - self.mod if c >= half else c
+            if op == Z3_OP_SLT:
+                ivs = [(-half, s - 1)]
+            elif op == Z3_OP_SLEQ:
+                ivs = [(-half, s)]
+            elif op == Z3_OP_SGT:
+                ivs = [(s + 1, half - 1)]
+            else:
+                ivs = [(s, half - 1)]
+            return self.to_raw(ivs)
+
+        return _normalize_(ivs)
+
+    def _compare_float_(self, op: int, c: Fraction) -> list[tuple[int, int]]:
+        """
+        The floats x for which (x op c) holds, as ordinals.
+
+        :param op: The z3 comparison operator.
+        :type op: int
+        :param c: The constant (a real).
+        :type c: Fraction
+        :return: Intervals.
+        :rtype: list[tuple[int, int]]
+        """
+        lo, hi = self.universe
+        f = self.floor(c)
+        exact = lo <= f and self.to_float(f) == c
+
+        if op in (Z3_OP_EQ, Z3_OP_DISTINCT):
+            # Equal to the nearest float, as Var comparisons cast the constant to the format
+            near = f
+            if not lo <= f < hi:
+                near = f if exact else None
+            elif self.to_float(f + 1) - c < c - self.to_float(f):
+                near = f + 1
+            if op == Z3_OP_EQ:
+                return [] if near is None else [(near, near)]
+            return [self.universe] if near is None else _complement_([(near, near)], self.universe)
+        if op == Z3_OP_LT:
+            return _normalize_([(lo, f - 1 if exact else f)])
+        if op == Z3_OP_LE:
+            return _normalize_([(lo, f)])
+        if op == Z3_OP_GT:
+            return _normalize_([(f + 1, hi)])
+        return _normalize_([(f if exact else f + 1, hi)])
+
+    def to_raw(self, a: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """
+        Map signed values of a bit-vector onto raw values.
+
+        :param a: Intervals of signed values, within the signed range of the bit-vector.
+        :type a: list[tuple[int, int]]
+        :return: Intervals of raw values.
+        :rtype: list[tuple[int, int]]
+        """
+        raw = []
+        for start, end in a:
+            if start >= 0:
+                raw.append((start, end))
+            elif end < 0:
+                raw.append((start + self.mod, end + self.mod))
+            else:
+                raw.extend([(start + self.mod, self.mod - 1), (0, end)])
+        return _normalize_(raw)
+
+    def to_signed(self, a: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """
+        Map raw values of a bit-vector onto signed values.
+
+        :param a: Intervals of raw values.
+        :type a: list[tuple[int, int]]
+        :return: Intervals of signed values.
+        :rtype: list[tuple[int, int]]
+        """
+        half = self.mod >> 1
+        result = []
+        for start, end in a:
+            if end < half:
+                result.append((start, end))
+            elif start >= half:
+                result.append((start - self.mod, end - self.mod))
+            else:
+                result.extend([(start, half - 1), (half - self.mod, end - self.mod)])
+        return _normalize_(result)
+
+class _Linear_:
+    """
+    A linear term - sum of variables with coefficient +1 / -1, plus a constant.
+    """
+
+    def __init__(self, coefs: dict[int, int], k: int) -> None:
+        self.coefs = coefs
+        self.k = k
+
+    def __add__(self, other: _Linear_) -> _Linear_:
+        coefs = dict(self.coefs)
+        for p, c in other.coefs.items():
+            coefs[p] = coefs.get(p, 0) + c
+        return _Linear_({p: c for p, c in coefs.items() if c != 0}, self.k + other.k)
+
+    def __neg__(self) -> _Linear_:
+        return _Linear_({p: -c for p, c in self.coefs.items()}, -self.k)
+
+    def value(self, values: dict[int, int], skip: int = None) -> int:
+        """
+        Evaluate the term for known variable values.
+
+        :param values: Known values, by position.
+        :type values: dict[int, int]
+        :param skip: Position to leave out of the sum.
+        :type skip: int, optional
+        :return: The value.
+        :rtype: int
+        """
+        return self.k + sum(c * values[p] for p, c in self.coefs.items() if p != skip)
+
+class _Relation_:
+    """
+    A comparison (lhs op rhs) between linear terms of the same sort.
+    """
+
+    def __init__(self, op: int, lhs: _Linear_, rhs: _Linear_) -> None:
+        self.op = op
+        self.lhs = lhs
+        self.rhs = rhs
+        self.positions = set(lhs.coefs) | set(rhs.coefs)
+        # Condition for the relation to apply (see _Guard_)
+        self.guard = None
+
+    def solve(self, p: int, values: dict[int, int], domain: _Domain_) -> list[tuple[int, int]]:
+        """
+        The values of variable p for which the relation holds, given the values of all other variables.
+
+        :param p: Position of the variable.
+        :type p: int
+        :param values: Values of the other variables.
+        :type values: dict[int, int]
+        :param domain: Domain of the variable.
+        :type domain: _Domain_
+        :return: Intervals.
+        :rtype: list[tuple[int, int]]
+        """
+        lk = self.lhs.value(values, skip=p)
+        rk = self.rhs.value(values, skip=p)
+        if p in self.lhs.coefs:
+            c = self.lhs.coefs[p]
+            ivs = domain.shift(domain.compare(self.op, rk), -lk)
+        else:
+            c = self.rhs.coefs[p]
+            ivs = domain.shift(domain.compare(_FLIP_[self.op], lk), -rk)
+        if c == -1:
+            ivs = domain.negate(ivs)
+        return _intersect_(ivs, [domain.universe])
+
+    def image(self, p: int, q: int, ivs: list[tuple[int, int]], domain: _Domain_) -> list[tuple[int, int]]:
+        """
+        The values of variable p which satisfy an equality with some value of variable q.
+
+        :param p: Position of the variable to solve.
+        :type p: int
+        :param q: Position of the other variable.
+        :type q: int
+        :param ivs: Values of q.
+        :type ivs: list[tuple[int, int]]
+        :param domain: Domain of p.
+        :type domain: _Domain_
+        :return: Intervals.
+        :rtype: list[tuple[int, int]]
+        """
+        # sp * p + sq * q + k == 0, so p = -sp * sq * q - sp * k
+        sp = self.lhs.coefs.get(p, 0) - self.rhs.coefs.get(p, 0)
+        sq = self.lhs.coefs.get(q, 0) - self.rhs.coefs.get(q, 0)
+        k = self.lhs.k - self.rhs.k
+        if sp * sq > 0:
+            ivs = domain.negate(ivs)
+        return _intersect_(domain.shift(ivs, -sp * k), [domain.universe])
+
+def _kind_(e: Any) -> int | None:
+    """
+    Get the operator of a z3 term.
+
+    :param e: The z3 term.
+    :type e: Any
+    :return: The operator, or None if not an application.
+    :rtype: int | None
+    """
+    return e.decl().kind() if is_app(e) else None
+
+def _is_value_(e: Any) -> bool:
+    """
+    Check if a z3 term is a constant.
+
+    :param e: The z3 term.
+    :type e: Any
+    :return: True for bit-vector and integer values.
+    :rtype: bool
+    """
+    return is_bv_value(e) or is_int_value(e)
+
+def _size_(ivs: list[tuple[int, int]]) -> int:
+    """
+    Count the values of a set.
+
+    :param ivs: Intervals.
+    :type ivs: list[tuple[int, int]]
+    :return: Number of values.
+    :rtype: int
+    """
+    return sum(end - start + 1 for start, end in ivs)
+
+def _draw_(ivs: list[tuple[int, int]]) -> int:
+    """
+    Sample a value uniformly from a set.
+
+    :param ivs: Intervals (not empty).
+    :type ivs: list[tuple[int, int]]
+    :return: The value.
+    :rtype: int
+    """
+    n = random.randrange(_size_(ivs))
+    for start, end in ivs:
+        if n <= end - start:
+            return start + n
+        n -= end - start + 1
+    raise ValueError("Empty set")
+
+class _Guard_:
+    """
+    A condition on one variable (e.g. i < size) which enables a constraint on other variables.
+
+    Guard variables are sampled before the variables they guard.
+    """
+
+    def __init__(self, p: int, ivs: list[tuple[int, int]]) -> None:
+        self.p = p
+        self.ivs = ivs
+
+    def holds(self, value: int) -> bool:
+        """
+        Check the condition.
+
+        :param value: Value of the guard variable.
+        :type value: int
+        :return: True if the condition holds.
+        :rtype: bool
+        """
+        return any(start <= value <= end for start, end in self.ivs)
+
+class _AllDifferent_:
+    """
+    Distinct over more than two variables (e.g. ListConstraints.unique()).
+
+    Each value is drawn from the domain of its variable, and re-drawn from the values not yet taken on a collision.
+    Guarded members (e.g. elements in use of a list of randomized length) only take part when their guard holds.
+    """
+
+    def __init__(self, members: list[int], guards: dict[int, _Guard_] = None) -> None:
+        """
+        Initialize the constraint.
+
+        :param members: Positions of the variables.
+        :type members: list[int]
+        :param guards: Guard of each guarded member, by position.
+        :type guards: dict[int, _Guard_], optional
+        """
+        self.members = set(members)
+        self.guards = guards or {}
+        self.guarded = {}
+        for p, g in self.guards.items():
+            self.guarded.setdefault(g.p, []).append(p)
+        self.positions = members + [p for p in self.guarded if p not in self.members]
+        self.taken = set()
+        self.off = set()
+
+    def prepare(self, sets: list[list[tuple[int, int]]]) -> bool:
+        """
+        Check the constraint against the static domains.
+
+        :param sets: Static domain of each variable.
+        :type sets: list[list[tuple[int, int]]]
+        :return: False if it can't be satisfied.
+        :rtype: bool
+        """
+        members = [p for p in self.members if p not in self.guards]
+        return not self.guarded.keys() & self.members and (
+            _size_(_normalize_([iv for p in members for iv in sets[p]])) >= len(members)
+        )
+
+    def reset(self) -> None:
+        self.taken = set()
+        self.off = set()
+
+    def restrict(self, p: int, ivs: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        return ivs
+
+    def accept(self, p: int, value: int) -> bool:
+        return p in self.off or p not in self.members or value not in self.taken
+
+    def exclude(self, p: int, ivs: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """
+        Remove the values already taken from a set.
+
+        :param p: Position of the variable.
+        :type p: int
+        :param ivs: Intervals.
+        :type ivs: list[tuple[int, int]]
+        :return: Intervals.
+        :rtype: list[tuple[int, int]]
+        """
+        if not ivs or p in self.off or p not in self.members:
+            return ivs
+        taken = _normalize_([(v, v) for v in self.taken])
+        return _intersect_(ivs, _complement_(taken, (ivs[0][0], ivs[-1][1])))
+
+    def assign(self, p: int, value: int) -> None:
+        for q in self.guarded.get(p, ()):
+            if not self.guards[q].holds(value):
+                self.off.add(q)
+        if p in self.members and p not in self.off:
+            self.taken.add(value)
+
+class _Sum_:
+    """
+    A sum of variables, or of indicators of conditions on one variable each (a count), compared with a constant.
+
+    Each term is bounded when sampled, so the terms still to be sampled can reach the target.
+    Guarded terms (e.g. elements in use of a list of randomized length) are 0 unless their guard holds.
+    """
+
+    def __init__(
+        self,
+        terms: dict[int, list[tuple[int, int]] | None],
+        lo: float,
+        hi: float,
+        signed: dict[int, _Domain_] = None,
+        guards: dict[int, _Guard_] = None,
+    ) -> None:
+        """
+        Initialize the sum.
+
+        :param terms: The condition of each indicator term, or None for the value of the variable, by position.
+        :type terms: dict[int, list[tuple[int, int]] | None]
+        :param lo: Lower bound of the sum (may be -inf).
+        :type lo: float
+        :param hi: Upper bound of the sum (may be inf).
+        :type hi: float
+        :param signed: Domain of the bit-vectors summed as signed values, by position.
+        :type signed: dict[int, _Domain_], optional
+        :param guards: Guard of each guarded term, by position.
+        :type guards: dict[int, _Guard_], optional
+        """
+        self.terms = terms
+        self.signed = signed or {}
+        self.guards = guards or {}
+        self.guarded = {}
+        for p, g in self.guards.items():
+            self.guarded.setdefault(g.p, []).append(p)
+        self.positions = list(terms) + [p for p in self.guarded if p not in terms]
+        self.lo = lo
+        self.hi = hi
+        self.bounds = {}
+        self.enabled = {}
+        self.current = {}
+        self.off = set()
+        self.total = self.rest_min = self.rest_max = 0
+
+    def _bounds_(self, p: int, ivs: list[tuple[int, int]]) -> tuple[int, int]:
+        """
+        The smallest and largest contribution of a term, when in use.
+
+        :param p: Position of the variable.
+        :type p: int
+        :param ivs: Values of the variable.
+        :type ivs: list[tuple[int, int]]
+        :return: (min, max).
+        :rtype: tuple[int, int]
+        """
+        cond = self.terms[p]
+        if cond is None:
+            if p in self.signed:
+                ivs = self.signed[p].to_signed(ivs)
+            return (ivs[0][0], ivs[-1][1])
+        outside = _intersect_(ivs, _complement_(cond, (ivs[0][0], ivs[-1][1])))
+        return (0 if outside else 1, 1 if _intersect_(ivs, cond) else 0)
+
+    def prepare(self, sets: list[list[tuple[int, int]]]) -> bool:
+        """
+        Calculate the contribution bounds of each term from the static domains.
+
+        :param sets: Static domain of each variable.
+        :type sets: list[list[tuple[int, int]]]
+        :return: False if the target can't be reached.
+        :rtype: bool
+        """
+        if self.guarded.keys() & self.terms.keys():
+            return False
+        self.bounds = {p: self._bounds_(p, sets[p]) for p in self.terms}
+        self.enabled = {p: self.bounds[p] for p in self.guards}
+        for p, (lo, hi) in self.enabled.items():
+            self.bounds[p] = (min(0, lo), max(0, hi))
+        low = sum(b[0] for b in self.bounds.values())
+        high = sum(b[1] for b in self.bounds.values())
+        return low <= self.hi and high >= self.lo
+
+    def reset(self) -> None:
+        self.current = dict(self.bounds)
+        self.off = set()
+        self.total = 0
+        self.rest_min = sum(b[0] for b in self.bounds.values())
+        self.rest_max = sum(b[1] for b in self.bounds.values())
+
+    def restrict(self, p: int, ivs: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """
+        Restrict a variable to the contributions which keep the target reachable.
+
+        :param p: Position of the variable.
+        :type p: int
+        :param ivs: Intervals.
+        :type ivs: list[tuple[int, int]]
+        :return: Intervals.
+        :rtype: list[tuple[int, int]]
+        """
+        if p in self.guarded:
+            return self._restrict_guard_(p, ivs)
+        if p not in self.terms or p in self.off:
+            return ivs
+
+        cmin, cmax = self.current[p]
+        lo = self.lo - self.total - (self.rest_max - cmax)
+        hi = self.hi - self.total - (self.rest_min - cmin)
+        cond = self.terms[p]
+        if cond is None:
+            if lo > hi:
+                return []
+            if p in self.signed:
+                domain = self.signed[p]
+                half = domain.mod >> 1
+                return _intersect_(ivs, domain.to_raw([(max(lo, -half), min(hi, half - 1))]))
+            return _intersect_(ivs, [(lo, hi)])
+        if lo > 1 or hi < 0 or not ivs:
+            return []
+        if lo == 1:
+            return _intersect_(ivs, cond)
+        if hi == 0:
+            return _intersect_(ivs, _complement_(cond, (ivs[0][0], ivs[-1][1])))
+        return ivs
+
+    def _restrict_guard_(self, p: int, ivs: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """
+        Restrict a guard variable to the values for which the target stays reachable.
+
+        Sweeps the values of the guard, adding and removing the bounds of the terms it enables.
+
+        :param p: Position of the guard variable.
+        :type p: int
+        :param ivs: Intervals.
+        :type ivs: list[tuple[int, int]]
+        :return: Intervals.
+        :rtype: list[tuple[int, int]]
+        """
+        if not ivs:
+            return ivs
+
+        low = self.total + self.rest_min
+        high = self.total + self.rest_max
+        deltas = {}
+        for q in self.guarded[p]:
+            low -= self.current[q][0]
+            high -= self.current[q][1]
+            lo, hi = self.enabled[q]
+            for start, end in self.guards[q].ivs:
+                d = deltas.setdefault(start, [0, 0])
+                d[0] += lo
+                d[1] += hi
+                d = deltas.setdefault(end + 1, [0, 0])
+                d[0] -= lo
+                d[1] -= hi
+
+        allowed = []
+        start = ivs[0][0]
+        for point in [*sorted(deltas), ivs[-1][1] + 1]:
+            if point > start:
+                if low <= self.hi and high >= self.lo:
+                    allowed.append((start, point - 1))
+                start = point
+            if point in deltas:
+                low += deltas[point][0]
+                high += deltas[point][1]
+        return _intersect_(ivs, _normalize_(allowed))
+
+    def accept(self, p: int, value: int) -> bool:
+        return True
+
+    def exclude(self, p: int, ivs: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        return ivs
+
+    def assign(self, p: int, value: int) -> None:
+        # Terms of a guard become plain terms, or 0
+        for q in self.guarded.get(p, ()):
+            lo, hi = self.current[q]
+            if self.guards[q].holds(value):
+                self.current[q] = self.enabled[q]
+            else:
+                self.current[q] = (0, 0)
+                self.off.add(q)
+            self.rest_min += self.current[q][0] - lo
+            self.rest_max += self.current[q][1] - hi
+
+        if p not in self.terms:
+            return
+        if p not in self.off:
+            cond = self.terms[p]
+            if cond is None:
+                if p in self.signed and value >= self.signed[p].mod >> 1:
+                    value -= self.signed[p].mod
+                self.total += value
+            else:
+                self.total += any(start <= value <= end for start, end in cond)
+        self.rest_min -= self.current[p][0]
+        self.rest_max -= self.current[p][1]
+
+class _Chain_:
+    """
+    Variables in order (e.g. ListConstraints.ascending()), sharing one domain.
+
+    The values are drawn together and sorted, so every ordering of the domain is equally likely.
+    """
+
+    def __init__(self, positions: list[int], distinct: bool, domain: _Domain_, signed: bool) -> None:
+        """
+        Initialize the chain.
+
+        :param positions: Positions of the variables, smallest first.
+        :type positions: list[int]
+        :param distinct: Values must differ (a strict ordering).
+        :type distinct: bool
+        :param domain: Domain of the variables.
+        :type domain: _Domain_
+        :param signed: Bit-vectors are ordered as signed values.
+        :type signed: bool
+        """
+        self.positions = positions
+        self.distinct = distinct
+        self.domain = domain
+        self.signed = signed
+        self.ivs = []
+
+    def sample(self) -> list[int] | None:
+        """
+        Sample the values of the chain.
+
+        :return: Value of each variable, in chain order, or None if the domain is too small.
+        :rtype: list[int] | None
+        """
+        n = len(self.positions)
+        if self.domain.float is not None:
+            # Floats are drawn by value (see _Domain_.draw())
+            values = sorted(self.domain.draw(self.ivs) for _ in range(n))
+            return None if self.distinct and len(set(values)) < n else values
+
+        size = _size_(self.ivs)
+        if self.distinct:
+            if size < n:
+                return None
+            index = sorted(random.sample(range(size), n))
+        else:
+            index = sorted(random.randrange(size) for _ in range(n))
+
+        values = []
+        it = iter(self.ivs)
+        start, end = next(it)
+        offset = 0
+        for i in index:
+            while i - offset > end - start:
+                offset += end - start + 1
+                start, end = next(it)
+            values.append(start + i - offset)
+
+        if self.signed:
+            half = self.domain.mod >> 1
+            values.sort(key=lambda v: v - self.domain.mod if v >= half else v)
+        return values
+
+class _NativePlan_:
+    """
+    Compiled native solution of a group of variables.
+
+    Each variable has a static domain (the intersection of all constraints on that variable alone).
+    Relations between two variables are applied to whichever is sampled second. Chains of orderings are
+    sampled first, as one draw each. Constraints over many variables (Distinct, sums and counts) restrict
+    each variable as it is sampled. Guard variables (e.g. the size of a list of randomized length) are sampled
+    before the constraints they guard.
+    """
+
+    def __init__(
+        self,
+        domains: list[_Domain_],
+        sets: list[list[tuple[int, int]]],
+        relations: list[_Relation_],
+        chains: list[_Chain_] = None,
+        constraints: list[_AllDifferent_ | _Sum_] = None,
+        conditions: list[tuple[int, _Guard_, list[tuple[int, int]]]] = None,
+    ) -> None:
+        self.domains = domains
+        self.sets = sets
+        self.relations = {p: [] for p in range(len(domains))}
+        for r in relations:
+            for p in r.positions:
+                self.relations[p].append(r)
+
+        self.chains = chains or []
+        self.constraints = constraints or []
+        self.groups = {p: [] for p in range(len(domains))}
+        for c in self.constraints:
+            for p in c.positions:
+                self.groups[p].append(c)
+
+        self.conditions = {p: [] for p in range(len(domains))}
+        for p, guard, ivs in conditions or []:
+            self.conditions[p].append((guard, ivs))
+
+        # Sample guard variables, then the most constrained variables, first
+        guards = {g.p for c in self.constraints for g in c.guards.values()}
+        guards |= {g.p for c in self.conditions.values() for g, _ in c} | {r.guard.p for r in relations if r.guard}
+        chained = {p for c in self.chains for p in c.positions}
+        self.order = sorted(
+            (p for p in range(len(domains)) if p not in chained), key=lambda p: (p not in guards, _size_(sets[p]))
+        )
+        self.floats = [p for p, d in enumerate(domains) if d.float is not None]
+
+    def sample(self) -> list[Any] | None:
+        """
+        Sample a solution uniformly from the domain of each variable.
+
+        :return: Value of each variable (raw for bit-vectors), or None if no solution was found.
+        :rtype: list[Any] | None
+        """
+        for _ in range(NATIVE_ATTEMPTS):
+            values = self._attempt_()
+            if values is not None:
+                for p in self.floats:
+                    values[p] = self.domains[p].value(values[p])
+                return [values[p] for p in range(len(self.domains))]
+        return None
+
+    def _attempt_(self) -> dict[int, int] | None:
+        """
+        Sample every variable once.
+
+        :return: Value of each variable, by position, or None if sampling dead-ended.
+        :rtype: dict[int, int] | None
+        """
+        values = {}
+        for c in self.constraints:
+            c.reset()
+
+        for chain in self.chains:
+            sample = chain.sample()
+            if sample is None:
+                return None
+            for p, value in zip(chain.positions, sample, strict=True):
+                if not all(c.accept(p, value) for c in self.groups[p]):
+                    return None
+                values[p] = value
+                for c in self.groups[p]:
+                    c.assign(p, value)
+
+        for p in self.order:
+            ivs = self.sets[p]
+            for guard, civs in self.conditions[p]:
+                if guard.holds(values[guard.p]):
+                    ivs = _intersect_(ivs, civs)
+            for r in self.relations[p]:
+                if r.guard is not None and not r.guard.holds(values[r.guard.p]):
+                    continue
+                if all(q == p or q in values for q in r.positions):
+                    ivs = _intersect_(ivs, r.solve(p, values, self.domains[p]))
+            groups = self.groups[p]
+            for c in groups:
+                ivs = c.restrict(p, ivs)
+            if not ivs:
+                return None
+
+            value = _pick_(p, ivs, groups, self.domains[p].draw)
+            if value is None:
+                return None
+
+            values[p] = value
+            for c in groups:
+                c.assign(p, value)
+        return values
+
+def _pick_(p: int, ivs: list[tuple[int, int]], groups: list[Any], draw: Callable = _draw_) -> int | None:
+    """
+    Draw a value of a variable accepted by its constraints over many variables.
+
+    The value is re-drawn a few times on a collision (e.g. a value already taken), then drawn from the values left.
+
+    :param p: Position of the variable.
+    :type p: int
+    :param ivs: Values of the variable.
+    :type ivs: list[tuple[int, int]]
+    :param groups: Constraints over many variables of the variable.
+    :type groups: list[Any]
+    :param draw: Sample a value from a set (see _Domain_.draw()).
+    :type draw: Callable
+    :return: The value, or None if no value is accepted.
+    :rtype: int | None
+    """
+    for _ in range(NATIVE_REDRAWS):
+        value = draw(ivs)
+        if all(c.accept(p, value) for c in groups):
+            return value
+
+    for c in groups:
+        ivs = c.exclude(p, ivs)
+    if not ivs:
+        return None
+    value = draw(ivs)
+    return value if all(c.accept(p, value) for c in groups) else None
+
+def _linear_(e: Any, positions: dict[int, int]) -> _Linear_ | None:
+    """
+    Parse a z3 term as a linear term.
+
+    :param e: The z3 term.
+    :type e: Any
+    :param positions: Position of each variable, keyed by z3 id.
+    :type positions: dict[int, int]
+    :return: The linear term, or None if not linear.
+    :rtype: _Linear_ | None
+    """
+    if is_bv_value(e) or is_int_value(e):
+        return _Linear_({}, e.as_long())
+    if is_rational_value(e):
+        return _Linear_({}, Fraction(e.numerator_as_long(), e.denominator_as_long()))
+    if e.get_id() in positions:
+        return _Linear_({positions[e.get_id()]: 1}, 0)
+    if not is_app(e):
+        return None
+
+    kind = e.decl().kind()
+    # Reals are held as ordinals (see _Domain_) - only negation maps onto ordinals
+    if is_real(e) and kind != Z3_OP_UMINUS:
+        return None
+    terms = [_linear_(c, positions) for c in e.children()]
+    if any(t is None for t in terms):
+        return None
+    if kind in (Z3_OP_BADD, Z3_OP_ADD):
+        result = terms[0]
+        for t in terms[1:]:
+            result = result + t
+        return result
+    if kind in (Z3_OP_BSUB, Z3_OP_SUB):
+        result = terms[0]
+        for t in terms[1:]:
+            result = result + (-t)
+        return result
+    if kind in (Z3_OP_BNEG, Z3_OP_UMINUS):
+        return -terms[0]
+    return None
+
+def _relation_(e: Any, positions: dict[int, int]) -> _Relation_ | None:
+    """
+    Parse a z3 expression as a comparison of linear terms over at most two variables.
+
+    :param e: The z3 expression.
+    :type e: Any
+    :param positions: Position of each variable, keyed by z3 id.
+    :type positions: dict[int, int]
+    :return: The relation, or None if not supported.
+    :rtype: _Relation_ | None
+    """
+    negate = False
+    while is_app(e) and e.decl().kind() == Z3_OP_NOT:
+        negate = not negate
+        e = e.arg(0)
+
+    if not is_app(e) or e.decl().kind() not in _COMPARE_ or e.num_args() != 2:
+        return None
+
+    lhs = _linear_(e.arg(0), positions)
+    rhs = _linear_(e.arg(1), positions)
+    if lhs is None or rhs is None:
+        return None
+
+    # Each variable once, with coefficient +1 / -1
+    if set(lhs.coefs) & set(rhs.coefs) or any(abs(c) != 1 for c in [*lhs.coefs.values(), *rhs.coefs.values()]):
+        return None
+
+    op = e.decl().kind()
+    r = _Relation_(_NEGATE_[op] if negate else op, lhs, rhs)
+    return r if 1 <= len(r.positions) <= 2 else None
+
+def _sum_(e: Any, positions: dict[int, int], domains: list[_Domain_], unary: Callable) -> _Sum_ | None:
+    """
+    Parse a z3 expression as a sum of variables, or of indicators If(cond, 1, 0) (a count), compared with a constant.
+
+    Terms may be guarded, If(guard, term, 0). Only sums which can't overflow (e.g. of extended bit-vectors, as
+    built by ListConstraints.sum()) are supported. Plain sums of up to two variables are left to _relation_().
+
+    :param e: The z3 expression.
+    :type e: Any
+    :param positions: Position of each variable, keyed by z3 id.
+    :type positions: dict[int, int]
+    :param domains: The domain of each variable.
+    :type domains: list[_Domain_]
+    :param unary: Parser of conditions on a single variable, returning (position, intervals) or None.
+    :type unary: Callable
+    :return: The sum, or None if not supported.
+    :rtype: _Sum_ | None
+    """
+    negate = False
+    while is_app(e) and e.decl().kind() == Z3_OP_NOT:
+        negate = not negate
+        e = e.arg(0)
+
+    if not is_app(e) or e.decl().kind() not in _COMPARE_ or e.num_args() != 2:
+        return None
+
+    op = e.decl().kind()
+    lhs, rhs = e.arg(0), e.arg(1)
+    if _is_value_(lhs):
+        lhs, rhs, op = rhs, lhs, _FLIP_[op]
+    if negate:
+        op = _NEGATE_[op]
+
+    add = lhs.decl().kind() if is_app(lhs) else None
+    if op == Z3_OP_DISTINCT or add not in (Z3_OP_BADD, Z3_OP_ADD) or not _is_value_(rhs):
+        return None
+
+    # Flatten nested additions (e.g. z3.Sum() of bit-vectors)
+    leaves = []
+    pending = [lhs]
+    while pending:
+        t = pending.pop()
+        if is_app(t) and t.decl().kind() == add:
+            pending.extend(t.children())
+        else:
+            leaves.append(t)
+
+    # Sums of bit-vectors compared as signed values (or for equality) may have sign-extended (signed) terms
+    signed = is_bv(lhs) and (
+        op in (Z3_OP_SLT, Z3_OP_SLEQ, Z3_OP_SGT, Z3_OP_SGEQ)
+        or op == Z3_OP_EQ and any(Z3_OP_SIGN_EXT in (_kind_(t), _kind_(t.arg(1) if _kind_(t) == Z3_OP_ITE else t)) for t in leaves)
+    )
+
+    terms = {}
+    signs = {}
+    guards = {}
+    offset = low = high = 0
+    plain = True
+    for t in leaves:
+        kind = _kind_(t)
+        if _is_value_(t):
+            v = t.as_long()
+            offset += v - (1 << t.size()) if signed and v >> (t.size() - 1) else v
+            continue
+
+        # Terms which only count when a guard holds, If(guard, term, 0)
+        guard = None
+        if kind == Z3_OP_ITE and not _is_value_(t.arg(1)) and _is_value_(t.arg(2)) and t.arg(2).as_long() == 0:
+            guard = unary(t.arg(0))
+            if guard is None:
+                return None
+            guard = _Guard_(*guard)
+            t = t.arg(1)
+            kind = t.decl().kind() if is_app(t) else None
+
+        cond = None
+        if kind == Z3_OP_ITE:
+            plain = False
+            a, b = t.arg(1), t.arg(2)
+            if not (_is_value_(a) and _is_value_(b)) or {a.as_long(), b.as_long()} != {0, 1}:
+                return None
+            u = unary(t.arg(0))
+            if u is None:
+                return None
+            p, cond = u
+            if a.as_long() == 0:
+                cond = _complement_(cond, domains[p].universe)
+            tlo, thi = 0, 1
+        else:
+            if kind in (Z3_OP_ZERO_EXT, Z3_OP_SIGN_EXT):
+                t = t.arg(0)
+                plain = False
+            p = positions.get(t.get_id())
+            if p is None or (kind == Z3_OP_SIGN_EXT and not signed):
+                return None
+            if kind == Z3_OP_SIGN_EXT:
+                signs[p] = domains[p]
+                tlo, thi = -(domains[p].mod >> 1), (domains[p].mod >> 1) - 1
+            else:
+                tlo, thi = domains[p].universe
+
+        if p in terms or (guard is not None and guard.p == p):
+            return None
+        terms[p] = cond
+        if guard is not None:
+            plain = False
+            guards[p] = guard
+            tlo, thi = min(0, tlo), max(0, thi)
+        low += tlo
+        high += thi
+
+    if len(terms) < 3 and plain:
+        return None
+
+    k = rhs.as_long()
+    if is_bv(lhs):
+        # The sum must not wrap, in the signed range for signed comparisons
+        width = lhs.size() - 1 if signed else lhs.size()
+        if low + offset < (-1 << width if signed else 0) or high + offset >= 1 << width:
+            return None
+        if signed and k >= 1 << width:
+            k -= 1 << lhs.size()
+
+    k -= offset
+    if op == Z3_OP_EQ:
+        lo, hi = k, k
+    elif op in (Z3_OP_ULT, Z3_OP_SLT, Z3_OP_LT):
+        lo, hi = -math.inf, k - 1
+    elif op in (Z3_OP_ULEQ, Z3_OP_SLEQ, Z3_OP_LE):
+        lo, hi = -math.inf, k
+    elif op in (Z3_OP_UGT, Z3_OP_SGT, Z3_OP_GT):
+        lo, hi = k + 1, math.inf
+    else:
+        lo, hi = k, math.inf
+    return _Sum_(terms, lo, hi, signs, guards)
+
+def _chains_(
+    relations: list[_Relation_],
+    sets: list[list[tuple[int, int]]],
+    domains: list[_Domain_],
+    constraints: list[Any],
+    guarded: set[int],
+) -> tuple[list[_Chain_], list[_Relation_]]:
+    """
+    Extract chains of orderings (a < b, b < c, ...) between variables with the same domain.
+
+    Variables with any other relation, in a sum, or guarded are left to be sampled one by one.
+
+    :param relations: The relations between two variables.
+    :type relations: list[_Relation_]
+    :param sets: Static domain of each variable.
+    :type sets: list[list[tuple[int, int]]]
+    :param domains: The domain of each variable.
+    :type domains: list[_Domain_]
+    :param constraints: The constraints over many variables.
+    :type constraints: list[Any]
+    :param guarded: Positions of the guarded variables.
+    :type guarded: set[int]
+    :return: The chains, and the relations not in a chain.
+    :rtype: tuple[list[_Chain_], list[_Relation_]]
+    """
+    # (smaller, larger, strict, signed) of each plain ordering
+    edges = {}
+    for r in relations:
+        if r.guard is not None or r.lhs.k or r.rhs.k or list(r.lhs.coefs.values()) != [1] or list(r.rhs.coefs.values()) != [1]:
+            continue
+        a, b, op = next(iter(r.lhs.coefs)), next(iter(r.rhs.coefs)), r.op
+        if op not in _ORDER_:
+            a, b, op = b, a, _FLIP_[op]
+        if op in _ORDER_:
+            edges[id(r)] = (a, b, *_ORDER_[op])
+    if not edges:
+        return [], relations
+
+    # Each variable has at most one neighbour either side, and only orderings
+    excluded = {p for r in relations if id(r) not in edges for p in r.positions} | guarded
+    excluded |= {p for c in constraints if isinstance(c, _Sum_) for p in c.positions}
+    while True:
+        kept = {k: e for k, e in edges.items() if e[0] not in excluded and e[1] not in excluded}
+        degree = (Counter(e[0] for e in kept.values()), Counter(e[1] for e in kept.values()))
+        bad = {p for d in degree for p, n in d.items() if n > 1}
+        dropped = {p for k, e in edges.items() if k not in kept for p in e[:2]}
+        if bad <= excluded and dropped <= excluded:
+            break
+        excluded |= bad | dropped
+
+    succ = {e[0]: (k, e) for k, e in kept.items()}
+    heads = set(succ) - {e[1] for e in kept.values()}
+    distinct = [c.members for c in constraints if isinstance(c, _AllDifferent_)]
+
+    chains = []
+    chained = set()
+    for head in sorted(heads):
+        positions = [head]
+        keys = []
+        while positions[-1] in succ:
+            k, e = succ[positions[-1]]
+            keys.append(k)
+            positions.append(e[1])
+        flags = [kept[k] for k in keys]
+        if len({f[3] for f in flags}) != 1 or any(sets[p] != sets[head] or domains[p].mod != domains[head].mod for p in positions):
+            continue
+
+        strict = any(f[2] for f in flags) or any(len(d & set(positions)) > 1 for d in distinct)
+        chain = _Chain_(positions, strict, domains[head], flags[0][3] and domains[head].mod is not None)
+        chain.ivs = sets[head]
+        chains.append(chain)
+        chained.update(keys)
+
+    return chains, [r for r in relations if id(r) not in chained]
+
+def _compile_native_(hard: list[Any], vars: list[Any], symbols: list[Any]) -> _NativePlan_ | None:
+    """
+    Compile hard constraints into a native plan.
+
+    Supports conjunctions of comparisons (==, !=, <, <=, >, >=, signed and unsigned) between a variable and a
+    constant, or between linear terms of two variables (e.g. x < y + 4), and disjunctions of comparisons on a
+    single variable (e.g. set membership Or(x == 1, x == 5), or unions of ranges Or(And(x > 1, x < 5), x == 9)).
+    Also supports the list constraints of ListConstraints - Distinct over many variables, bounded sums and counts,
+    chains of ordered variables, and constraints guarded by a variable (Implies(x > i, ...) and If(x > i, term, 0)).
+
+    :param hard: The hard constraints.
+    :type hard: list[Any]
+    :param vars: The Vars.
+    :type vars: list[Var]
+    :param symbols: The z3 variables, in the order of vars.
+    :type symbols: list[Any]
+    :return: The plan, or None if a constraint isn't supported.
+    :rtype: _NativePlan_ | None
+    """
+    if not NATIVE_SOLVER or not vars:
+        return None
+
+    try:
+        domains = [_Domain_(s, v) for s, v in zip(symbols, vars, strict=True)]
+    except (TypeError, ValueError):
+        return None
+
+    # Constraints which aren't z3 expressions (e.g. Python bools) are left to z3
+    if not all(is_expr(e) for e in hard):
+        return None
+
+    key = None
+    if NATIVE_CACHE_SIZE > 0:
+        key = (tuple(e.get_id() for e in hard), tuple(s.get_id() for s in symbols), tuple(d.universe for d in domains))
+        if key in _plan_cache_:
+            _plan_cache_.move_to_end(key)
+            return _plan_cache_[key][2]
+
+    plan = _plan_(hard, domains, symbols)
+
+    if key is not None:
+        _plan_cache_[key] = (list(hard), list(symbols), plan)
+        if len(_plan_cache_) > NATIVE_CACHE_SIZE:
+            _plan_cache_.popitem(last=False)
+    return plan
+
+def _propagate_(relations: list[_Relation_], sets: list[list[tuple[int, int]]], domains: list[_Domain_]) -> None:
+    """
+    Propagate equalities between variables (e.g. x == y + 1) to their static domains, so sampling rarely dead-ends.
+
+    The bounds of orderings (e.g. x < y) are also propagated between variables which don't wrap around (integers
+    and floats) - each variable is limited to the values allowed by the extremes of the other. Orderings between
+    variables with the same domain are left to be sampled as a chain (see _chains_()).
+
+    :param relations: The relations.
+    :type relations: list[_Relation_]
+    :param sets: Static domain of each variable (updated).
+    :type sets: list[list[tuple[int, int]]]
+    :param domains: The domain of each variable.
+    :type domains: list[_Domain_]
+    """
+    for _ in range(3):
+        for r in relations:
+            if r.guard is not None:
+                continue
+            p, q = r.positions
+            if r.op == Z3_OP_EQ:
+                sets[p] = _intersect_(sets[p], r.image(p, q, sets[q], domains[p]))
+                sets[q] = _intersect_(sets[q], r.image(q, p, sets[p], domains[q]))
+            elif r.op in _BOUNDS_ and domains[p].mod is None and domains[q].mod is None and sets[p] != sets[q]:
+                for a, b in ((p, q), (q, p)):
+                    if sets[b]:
+                        extremes = [{b: sets[b][0][0]}, {b: sets[b][-1][1]}]
+                        hull = _normalize_([iv for v in extremes for iv in r.solve(a, v, domains[a])])
+                        sets[a] = _intersect_(sets[a], hull)
+
+def _guarded_(
+    conditions: list[tuple[int, _Guard_, list[tuple[int, int]]]],
+    relations: list[_Relation_],
+    constraints: list[Any],
+) -> tuple[set[int], set[int]]:
+    """
+    Find the guard variables and the guarded variables.
+
+    :param conditions: Guarded unary constraints, as (position, guard, values).
+    :type conditions: list[tuple[int, _Guard_, list[tuple[int, int]]]]
+    :param relations: The relations.
+    :type relations: list[_Relation_]
+    :param constraints: The constraints over many variables.
+    :type constraints: list[Any]
+    :return: Positions of the guard variables, and of the guarded variables.
+    :rtype: tuple[set[int], set[int]]
+    """
+    guards, guarded = set(), set()
+    for p, g, _ in conditions:
+        guards.add(g.p)
+        guarded.add(p)
+    for r in relations:
+        if r.guard is not None:
+            guards.add(r.guard.p)
+            guarded.update(r.positions)
+    for c in constraints:
+        guards.update(g.p for g in c.guards.values())
+        guarded.update(c.guards)
+    return guards, guarded
+
+def _plan_(hard: list[Any], domains: list[_Domain_], symbols: list[Any]) -> _NativePlan_ | None:
+    """
+    Build a native plan (see _compile_native_()).
+
+    :param hard: The hard constraints.
+    :type hard: list[Any]
+    :param domains: The domain of each variable.
+    :type domains: list[_Domain_]
+    :param symbols: The z3 variables, in the order of domains.
+    :type symbols: list[Any]
+    :return: The plan, or None if a constraint isn't supported.
+    :rtype: _NativePlan_ | None
+    """
+    positions = {s.get_id(): i for i, s in enumerate(symbols)}
+    sets = [[d.universe] for d in domains]
+    relations = []
+    constraints = []
+    conditions = []
+
+    def unary(e: Any) -> tuple[int, list[tuple[int, int]]] | None:
+        kind = e.decl().kind() if is_app(e) else None
+        if kind in (Z3_OP_OR, Z3_OP_AND):
+            result = None
+            ivs = [] if kind == Z3_OP_OR else None
+            for c in e.children():
+                u = unary(c)
+                if u is None or (result is not None and u[0] != result):
+                    return None
+                result = u[0]
+                if kind == Z3_OP_OR:
+                    ivs.extend(u[1])
+                else:
+                    ivs = u[1] if ivs is None else _intersect_(ivs, u[1])
+            return None if result is None else (result, _normalize_(ivs))
+
+        r = _relation_(e, positions)
+        if r is None or len(r.positions) != 1:
+            return None
+        p = next(iter(r.positions))
+        return (p, r.solve(p, {}, domains[p]))
+
+    def distinct(e: Any) -> bool:
+        # Members, and guarded members If(guard, member, sentinel) with sentinels above the range of any member
+        members, guards, values, sentinels = [], {}, [], []
+        for c in e.children():
+            guard = None
+            if is_app(c) and c.decl().kind() == Z3_OP_ITE and _is_value_(c.arg(2)):
+                guard = unary(c.arg(0))
+                if guard is None:
+                    return False
+                guard = _Guard_(*guard)
+                sentinels.append(c.arg(2).as_long())
+                c = c.arg(1)
+            elif _is_value_(c):
+                values.append(c.as_long())
+                continue
+
+            if is_app(c) and c.decl().kind() == Z3_OP_ZERO_EXT:
+                c = c.arg(0)
+            p = positions.get(c.get_id())
+            if p is None or p in members:
+                return False
+            if guard is not None:
+                if guard.p == p or sentinels[-1] <= domains[p].universe[1]:
+                    return False
+                guards[p] = guard
+            members.append(p)
+
+        # Constants in range of a guarded member would only apply when the member is in use
+        if len(set(values + sentinels)) != len(values) + len(sentinels):
+            return False
+        if any(v <= domains[p].universe[1] for p in guards for v in values):
+            return False
+        for p in members:
+            sets[p] = _intersect_(sets[p], _complement_(_normalize_([(v, v) for v in values]), domains[p].universe))
+        constraints.append(_AllDifferent_(members, guards))
+        return True
+
+    def implies(e: Any) -> bool:
+        guard = unary(e.arg(0))
+        if guard is None:
+            return False
+        guard = _Guard_(*guard)
+
+        body = e.arg(1)
+        if is_true(body):
+            return True
+        u = unary(body)
+        if u is not None:
+            p, ivs = u
+            if p == guard.p:
+                sets[p] = _intersect_(sets[p], _normalize_(_complement_(guard.ivs, domains[p].universe) + ivs))
+            else:
+                conditions.append((p, guard, ivs))
+            return True
+
+        r = _relation_(body, positions)
+        if r is None or guard.p in r.positions:
+            return False
+        r.guard = guard
+        relations.append(r)
+        return True
+
+    def add(e: Any) -> bool:
+        if is_true(e):
+            return True
+
+        kind = e.decl().kind() if is_app(e) else None
+        if kind == Z3_OP_AND:
+            return all(add(c) for c in e.children())
+        if kind == Z3_OP_OR:
+            u = unary(e)
+            if u is None:
+                return False
+            sets[u[0]] = _intersect_(sets[u[0]], u[1])
+            return True
+        if kind == Z3_OP_DISTINCT and (e.num_args() > 2 or _relation_(e, positions) is None):
+            return distinct(e)
+        if kind == Z3_OP_IMPLIES:
+            return implies(e)
+
+        s = _sum_(e, positions, domains, unary)
+        if s is not None:
+            constraints.append(s)
+            return True
+
+        r = _relation_(e, positions)
+        if r is None:
+            return False
+        if len(r.positions) == 1:
+            p = next(iter(r.positions))
+            sets[p] = _intersect_(sets[p], r.solve(p, {}, domains[p]))
+        else:
+            relations.append(r)
+        return True
+
+    if not all(add(e) for e in hard):
+        return None
+
+    _propagate_(relations, sets, domains)
+
+    # Leave unsatisfiable constraints to z3 to report
+    if any(not s for s in sets) or not all(c.prepare(sets) for c in constraints):
+        return None
+
+    # Guard variables are sampled first, so can't be guarded themselves
+    guards, guarded = _guarded_(conditions, relations, constraints)
+    if guards & guarded:
+        return None
+
+    chains, relations = _chains_(relations, sets, domains, constraints, guarded)
+    return _NativePlan_(domains, sets, relations, chains, constraints, conditions)
+
+__all__ = []
@@ -6,33 +6,26 @@
 from __future__ import annotations
 
 import copy
-import os
-import random
+import hashlib
+import types
 from collections import OrderedDict
+from collections.abc import Iterator
 from typing import TYPE_CHECKING, Any
 
 import tabulate
-from z3 import BitVecNumRef, BoolRef, BV2Int, IntNumRef, Optimize, RatNumRef, sat
+from z3 import BoolRef
 
+from . import solver
 from .factory import Factory
-from .int import Int
 from .log import Log
+from .solver import _check_engine_, _ConstraintGroup_, _partition_, _release_caches_, _set_engine_, _template_key_, _z3_usage_
 from .struct import Struct
-from .var import Var
+from .var import Var, _arg_vars_
+from .var_array import VarArray
 
 if TYPE_CHECKING:
     from .component import Component
 
-from itertools import islice
-
-# Batch size for constraint min / max calculations
-# Too big and the constraints won't solve
-# Too small and you get a performance drop
-if "AVL_CONSTRAINT_BATCH_SIZE" in os.environ:
-    CONSTRAINT_BATCH_SIZE = int(os.environ["AVL_CONSTRAINT_BATCH_SIZE"])
-else:
-    CONSTRAINT_BATCH_SIZE = None
-
 def _var_finder_(obj: Any, memo: dict[int, Any], conversion: dict[Any, Any] = None, do_copy : bool=False, do_deepcopy : bool=False) -> Any:
     """
     Recursively find and copy Var objects in the given object.
@@ -53,7 +46,7 @@ def _var_finder_(obj: Any, memo: dict[int, Any], conversion: dict[Any, Any] = No
     if obj_id in memo:
         return memo[obj_id]
 
-    if isinstance(obj, Var):
+    if isinstance(obj, Var | VarArray):
         if do_deepcopy:
             new_obj = copy.deepcopy(obj, memo)
         elif do_copy:
@@ -91,12 +84,20 @@ def _var_finder_(obj: Any, memo: dict[int, Any], conversion: dict[Any, Any] = No
         return new_dict
 
     elif isinstance(obj, Struct):
+        if obj._is_packed_() and not (do_copy or do_deepcopy):
+            # Randomized as one packed variable
+            var = obj.to_var()
+            conversion[id(var)] = var
+            memo[obj_id] = obj
+            return obj
+
         new_struct = type(obj)()
         memo[obj_id] = new_struct
         for name, _ in obj._fields_:
             value = getattr(obj, name)
             new_v = _var_finder_(value, memo, conversion, do_copy, do_deepcopy)
             setattr(new_struct, name, new_v)
+        obj._copy_packed_(new_struct)
         return new_struct
 
     else:
@@ -110,6 +111,121 @@ def _var_finder_(obj: Any, memo: dict[int, Any], conversion: dict[Any, Any] = No
         else:
             return obj
 
+# Copy plan kinds (see _copy_plan_)
+_COPY_ATOMIC_ = 0  # Immutable - shared by copies and deep copies
+_COPY_VAR_ = 1  # Var / VarArray - always copied
+_COPY_REF_ = 2  # Any other object - shared by copies, deep copied by deep copies
+_COPY_WALK_ = 3  # Containers and Structs - searched for Vars by _var_finder_
+
+_ATOMIC_TYPES_ = (type(None), bool, int, float, complex, str, bytes, type, types.FunctionType, types.BuiltinFunctionType)
+
+def _copy_plan_(attrs: dict[str, Any]) -> tuple[tuple[str, ...], list[tuple[str, type, int]]]:
+    """
+    Classify the attributes of an object for copying.
+
+    The plan is shared by all instances of a class with the same attributes. Each attribute records the type
+    it was classified on - values of another type take the generic path (_var_finder_).
+
+    :param attrs: The attributes of the object (its __dict__).
+    :type attrs: dict[str, Any]
+    :return: The attribute names, and the (name, type, kind) of each attribute to copy.
+    :rtype: tuple[tuple[str, ...], list[tuple[str, type, int]]]
+    """
+    plan = []
+    for key, value in attrs.items():
+        if key == "_constraints_":
+            continue
+        if type(value) in _ATOMIC_TYPES_:
+            kind = _COPY_ATOMIC_
+        elif isinstance(value, Var | VarArray):
+            kind = _COPY_VAR_
+        elif isinstance(value, list | tuple | set | dict | Struct):
+            kind = _COPY_WALK_
+        else:
+            kind = _COPY_REF_
+        plan.append((key, type(value), kind))
+    return tuple(attrs), plan
+
+# Compare plan kinds (see _compare_plan_)
+_COMPARE_METHOD_ = 0  # Compared with the compare() method of the field
+_COMPARE_EQ_ = 1  # Compared with !=
+
+def _compare_kind_(value: Any) -> int | None:
+    """
+    Get the compare plan kind of a value.
+
+    :param value: The value.
+    :type value: Any
+    :return: The kind, or None if the value is not compared.
+    :rtype: int | None
+    """
+    if callable(value):
+        return None
+    compare = getattr(value, "compare", None)
+    if compare is not None and callable(compare):
+        return _COMPARE_METHOD_
+    return _COMPARE_EQ_
+
+def _compare_plan_(obj: Object) -> tuple[list[tuple[str, type, int]], tuple[str, ...]]:
+    """
+    Get the fields compared by Object.compare(), in order.
+
+    Plans are cached on the class, keyed by the attribute names of the instance and the fields excluded from
+    comparison (see Object.set_field_attributes()). Each field records the type it was classified on - values of
+    another type are classified again when compared.
+
+    :param obj: The object.
+    :type obj: Object
+    :return: The (name, type, kind) of each compared field, and their names.
+    :rtype: tuple[list[tuple[str, type, int]], tuple[str, ...]]
+    """
+    cls = obj.__class__
+    plans = cls.__dict__.get("_compare_plans_")
+    if plans is None:
+        plans = {}
+        cls._compare_plans_ = plans
+
+    attrs = obj.__dict__
+    excluded = tuple(k for k, a in attrs.get("_field_attributes_", {}).items() if not a["compare"])
+    key = (tuple(attrs), excluded)
+    plan = plans.get(key)
+    if plan is None:
+        fields = []
+        for k, v in attrs.items():
+            if k.startswith("_") or k in excluded:
+                continue
+            kind = _compare_kind_(v)
+            if kind is not None:
+                fields.append((k, type(v), kind))
+        plan = (fields, tuple(f[0] for f in fields))
+
+        # Instances rarely change shape - bound the cache rather than track usage
+        if len(plans) >= Object._max_compare_plans_:
+            plans.clear()
+        plans[key] = plan
+    return plan
+
+def _digest_value_(value: Any) -> Any:
+    """
+    Get the packed value of a field (see Object.digest()).
+
+    :param value: The field.
+    :type value: Any
+    :return: The packed value.
+    :rtype: Any
+    """
+    if isinstance(value, Var):
+        return value.value
+    if isinstance(value, VarArray):
+        return value._values_.tobytes()
+    if isinstance(value, Object):
+        return value._pack_()
+    if isinstance(value, Struct):
+        return tuple(_digest_value_(v) for v in value)
+    if isinstance(value, list | tuple):
+        return tuple(_digest_value_(v) for v in value)
+    return value
+
 def _patch_constraints_(obj : Object, new_obj : Object, conversion: dict[Any, int]) -> None:
     """
     Patch the constraints of the original object to the new object.
@@ -125,13 +241,24 @@ def _patch_constraints_(obj : Object, new_obj : Object, conversion: dict[Any, in
                       to their corresponding copies in the new object.
     :type conversion: dict[Any, int]
     """
+    # Constraints not created yet (see CompactSequenceItem) are created by the copy on first use
+    constraints = obj.__dict__.get("_constraints_")
+    if constraints is None:
+        return
+
     new_obj._constraints_ = {True: {}, False: {}}
     for truth_value in (True, False):
-        for k, v in obj._constraints_[truth_value].items():
+        for k, v in constraints[truth_value].items():
             new_v = [conversion[id(o)] for o in v[1]]
             new_obj._constraints_[truth_value][k] = (v[0], new_v)
 
 class Object:
+    _copy_plan_ = None
+    _compare_plans_ = None
+    _max_compare_plans_ = 8
+    _constraint_templates_ = None
+    _max_constraint_templates_ = 16
+    _randomize_engine_ = None
 
     def __copy__(self) -> Object:
         cls = self.__class__
@@ -140,9 +267,7 @@ class Object:
         # Copy the class - creating new copies of Var objects and reference to all else
         memo = {}
         conversion = {}
-        for key, value in self.__dict__.items():
-            if key != "_constraints_":
-                setattr(new_obj, key, _var_finder_(value, memo, conversion, do_copy=True))
+        self._copy_attributes_(new_obj, memo, conversion, False)
 
         # Patch the constraints
         _patch_constraints_(self, new_obj, conversion)
@@ -160,15 +285,59 @@ class Object:
 
         # Copy the class - creating new copies of Var objects and deep copies of all else
         conversion = {}
-        for key, value in self.__dict__.items():
-            if key != "_constraints_":
-                setattr(new_obj, key, _var_finder_(value, memo, conversion, do_deepcopy=True))
+        self._copy_attributes_(new_obj, memo, conversion, True)
 
         # Patch the constraints
         _patch_constraints_(self, new_obj, conversion)
 
         return new_obj
 
+    def _copy_attributes_(self, new_obj: Object, memo: dict[int, Any], conversion: dict[int, Any], deep: bool) -> None:
+        """
+        Copy the attributes (other than constraints) of the object to a new object.
+
+        Uses the copy plan of the class (see _copy_plan_), built from the first instance copied. Instances with
+        different attributes take the generic path, searching every attribute for Vars.
+
+        :param new_obj: The new object.
+        :type new_obj: Object
+        :param memo: Copies made so far, keyed by id of the original.
+        :type memo: dict[int, Any]
+        :param conversion: Copies of Vars, keyed by id of the original.
+        :type conversion: dict[int, Any]
+        :param deep: True for a deep copy.
+        :type deep: bool
+        """
+        cls = self.__class__
+        attrs = self.__dict__
+        plan = cls.__dict__.get("_copy_plan_")
+        if plan is None:
+            plan = _copy_plan_(attrs)
+            cls._copy_plan_ = plan
+
+        if plan[0] != tuple(attrs):
+            for key, value in attrs.items():
+                if key != "_constraints_":
+                    setattr(new_obj, key, _var_finder_(value, memo, conversion, do_copy=not deep, do_deepcopy=deep))
+            return
+
+        new_attrs = new_obj.__dict__
+        for key, t, kind in plan[1]:
+            value = attrs[key]
+            if type(value) is not t or kind == _COPY_WALK_:
+                new_attrs[key] = _var_finder_(value, memo, conversion, do_copy=not deep, do_deepcopy=deep)
+            elif kind == _COPY_ATOMIC_:
+                new_attrs[key] = value
+            elif kind == _COPY_VAR_:
+                new_value = memo.get(id(value))
+                if new_value is None:
+                    new_value = copy.deepcopy(value, memo) if deep else copy.copy(value)
+                    memo[id(value)] = new_value
+                    conversion[id(value)] = new_value
+                new_attrs[key] = new_value
+            else:
+                new_attrs[key] = copy.deepcopy(value, memo) if deep else value
+
     def __new__(cls, *args: Any, **kwargs: Any) -> Object:
         """
         Create a new instance of Object or its subclass.
@@ -221,11 +390,10 @@ class Object:
         # Randomness and constraints
         self._constraints_ = {True : {}, False: {}}
         self._frozen_constraints_ = False
-        self._vars_ = []
-        self._var_ids_ = []
-        self._solver_ = None
-        self._max_values_ = {}
-        self._min_values_ = {}
+        self._groups_ = None
+        self._free_vars_ = []
+        self._arrays_ = []
+        self._randomize_paths_ = {}
 
         # Logger - Make all logger functions available in class to simplify code
         self.debug = Log.debug
@@ -279,6 +447,7 @@ class Object:
                 return f"{prefix}{fmt(val)}"
 
         values = []
+        field_attributes = self._field_attributes_
         for k, v in self.__dict__.items():
             if callable(v):
                 continue
@@ -286,10 +455,10 @@ class Object:
             if k.startswith("_"):
                 continue
 
-            if k in self._field_attributes_:
-                if self._field_attributes_[k]["fmt"] is None:
+            if k in field_attributes:
+                if field_attributes[k]["fmt"] is None:
                     continue
-                _fmt_ = self._field_attributes_[k]["fmt"]
+                _fmt_ = field_attributes[k]["fmt"]
             else:
                 _fmt_ = str
 
@@ -302,7 +471,7 @@ class Object:
                 values.append([f"{k}", format_value(v, fmt=_fmt_)])
             elif isinstance(v, (dict | OrderedDict)):
                 values.append([f"{k}", format_value(v, fmt=_fmt_)])
-            elif isinstance(v, (Var | bool | bytes | int | float | complex | str)):
+            elif isinstance(v, (Var | VarArray | bool | bytes | int | float | complex | str)):
                 values.append([k, _fmt_(v)])
 
         if self._table_transpose_:
@@ -408,54 +577,87 @@ class Object:
         if recurse is not None:
             self._table_recurse_ = recurse
 
-    def compare(self, rhs: Object, verbose: bool = False, bidirectional: bool = True) -> bool:
+    def compare(self, rhs: Object, verbose: bool = False, bidirectional: bool = True, digest: bool = False) -> bool:
         """
         Compare this object with another Object.
 
+        The compared fields are taken from a plan cached on the class (see set_field_attributes()).
+        Bidirectional comparison additionally checks rhs has no compared fields missing from this object.
+
         :param rhs: Object to compare with.
         :type rhs: Object
         :param verbose: Whether to print comparison details.
         :type verbose: bool
         :param bidirectional: Whether to perform bidirectional comparison.
         :type bidirectional: bool
-        :return: 1 if comparison passed, 0 otherwise.
-        :rtype: int
+        :param digest: Only compare the packed values of the objects (as digest()) - no mismatch report.
+        :type digest: bool
+        :return: True if comparison passed, False otherwise.
+        :rtype: bool
         """
-        retVal = True
-
-        for k, v in self.__dict__.items():
-            if callable(v):
-                continue
+        if digest:
+            return self._pack_() == rhs._pack_()
 
-            if k.startswith("_"):
-                continue
-
-            if k in self._field_attributes_:
-                if not self._field_attributes_[k]["compare"]:
+        retVal = True
+        fields, names = _compare_plan_(self)
+        rhs_attrs = rhs.__dict__
+        for k, t, kind in fields:
+            v = self.__dict__[k]
+            if type(v) is not t:
+                kind = _compare_kind_(v)
+                if kind is None:
                     continue
 
-            if k not in rhs.__dict__:
+            if k not in rhs_attrs:
                 self.error(f'Field "{k}" not found in rhs')
                 retVal = False
+                continue
 
-            if hasattr(v, "compare") and callable(v.compare):
-                if not v.compare(rhs.__dict__[k]):
-                    self.error(f'Field "{k}" comparison failed ({v} != {rhs.__dict__[k]})')
-                    retVal = False
-                elif verbose:
-                    self.info(f'Field "{k}" comparison passed ({v} == {rhs.__dict__[k]})')
+            r = rhs_attrs[k]
+            if kind == _COMPARE_METHOD_:
+                passed = v.compare(r)
             else:
-                if v != rhs.__dict__[k]:
-                    self.error(f'Field "{k}" comparison failed ({v} != {rhs.__dict__[k]})')
-                    retVal = False
-                elif verbose:
-                    self.info(f'Field "{k}" comparison passed ({v} == {rhs.__dict__[k]})')
+                passed = not (v != r)
+
+            if not passed:
+                self.error(f'Field "{k}" comparison failed ({v} != {r})')
+                retVal = False
+            elif verbose:
+                self.info(f'Field "{k}" comparison passed ({v} == {r})')
 
         if bidirectional:
-            rhs.compare(self, verbose, False)
+            rhs_fields, rhs_names = _compare_plan_(rhs)
+            if rhs_names is not names:
+                for k, _, _ in rhs_fields:
+                    if k not in self.__dict__:
+                        self.error(f'Field "{k}" not found in lhs')
+                        retVal = False
 
         return retVal
 
+    def _pack_(self) -> tuple[tuple[str, ...], tuple[Any, ...]]:
+        """
+        Pack the names and values of the compared fields (see compare()).
+
+        :return: The names and the packed values of the fields.
+        :rtype: tuple[tuple[str, ...], tuple[Any, ...]]
+        """
+        fields, names = _compare_plan_(self)
+        attrs = self.__dict__
+        return names, tuple(_digest_value_(attrs[k]) for k, _, _ in fields)
+
+    def digest(self) -> bytes:
+        """
+        Get a digest of the values of the compared fields (see compare()).
+
+        Objects with equal digests compare equal - use compare(rhs, digest=True) when a mismatch report is not needed.
+        Digests can be stored in place of the object, e.g. by a scoreboard holding many expected items.
+
+        :return: The digest.
+        :rtype: bytes
+        """
+        return hashlib.blake2b(repr(self._pack_()).encode(), digest_size=16).digest()
+
     def add_constraint(
         self, name: str, constraint: BoolRef, *args: Any, hard: bool = True, target: dict = None
     ) -> None:
@@ -504,7 +706,140 @@ class Object:
         This is useful to allow changes to the constraints after they have been frozen.
         """
         self._frozen_constraints_ = False
-        self._solver_ = None
+        self._groups_ = None
+
+    def release_randomization(self) -> None:
+        """
+        Release the randomization state of the object - frozen constraint groups and the z3 symbols of its variables.
+
+        Everything is re-created on the next randomization. Useful for long lived objects in long simulations.
+        """
+        self._groups_ = None
+        self._free_vars_ = []
+
+        memo = {}
+        conversion = {}
+        for key, value in self.__dict__.items():
+            if key != "_constraints_":
+                _var_finder_(value, memo, conversion)
+        for v in conversion.values():
+            v._release_()
+
+    @staticmethod
+    def release_z3_caches() -> None:
+        """
+        Release the memoized ranges and native solver plans shared by all objects, and the z3 expressions they hold.
+        """
+        _release_caches_()
+
+    @staticmethod
+    def get_z3_usage() -> dict[str, int]:
+        """
+        Get counters of the live z3 state, to check memory stays flat over long simulations.
+
+        - "vars" : live Vars which have been randomized or constrained.
+        - "symbols" : live Vars holding a z3 symbol.
+        - "solvers" : live z3 solvers.
+        - "declarations" : z3 symbol names created. Names of released Vars are recycled, so this only grows
+          with the peak number of live Vars.
+        - "range_cache" : memoized ranges (see AVL_RANGE_CACHE_SIZE).
+        - "native_cache" : memoized native solver plans (see AVL_NATIVE_CACHE_SIZE).
+
+        :return: Counters keyed by name.
+        :rtype: dict[str, int]
+        """
+        return _z3_usage_()
+
+    @classmethod
+    def freeze_class_constraints(cls, max_templates: int = 16) -> None:
+        """
+        Freeze the constraints of all instances of the class.
+
+        The first randomization of each structure (variables, constraint functions and literal arguments)
+        compiles the constraints and their ranges into a template, shared by every later instance of the class
+        with the same structure. This avoids re-evaluating the constraints for each new instance, the common case
+        when creating and randomizing items in a sequence.
+
+        Constraint functions must only depend on their arguments and default values - closures are evaluated once,
+        when the template is compiled. Randomizations with dynamic hard / soft constraints never use templates.
+
+        :param max_templates: Maximum number of templates kept for the class - least recently used are discarded.
+        :type max_templates: int
+        """
+        cls._constraint_templates_ = OrderedDict()
+        cls._max_constraint_templates_ = max_templates
+
+    @classmethod
+    def unfreeze_class_constraints(cls) -> None:
+        """
+        Unfreeze the constraints of all instances of the class, discarding all compiled templates.
+        """
+        cls._constraint_templates_ = None
+
+    def set_randomize_engine(self, engine: str | None) -> None:
+        """
+        Select the randomization engine of the object.
+
+        - "optimize" : z3 Optimize. Each variable is steered towards a random target within its range.
+        - "solver" : incremental z3 bit-vector Solver, seeded with random bit phases. Much faster, as no ranges are
+          calculated, but values are less evenly spread. Groups with soft constraints or non bit-vector variables
+          (e.g. floats) fall back to "optimize".
+
+        :param engine: The engine, or None to use the default engine.
+        :type engine: str | None
+        :raises ValueError: If the engine is unknown.
+        """
+        self._randomize_engine_ = None if engine is None else _check_engine_(engine)
+
+    def get_randomize_engine(self) -> str:
+        """
+        Get the randomization engine of the object.
+
+        :return: The engine of the object, or the default engine if none is selected.
+        :rtype: str
+        """
+        return self._randomize_engine_ or solver.RANDOMIZE_ENGINE
+
+    @staticmethod
+    def set_default_randomize_engine(engine: str) -> None:
+        """
+        Select the default randomization engine, used by all objects without their own engine
+        and by Var.randomize(). Defaults to the AVL_RANDOMIZE_ENGINE environment variable, or "optimize".
+
+        :param engine: The engine ("optimize" or "solver").
+        :type engine: str
+        :raises ValueError: If the engine is unknown.
+        """
+        _set_engine_(engine)
+
+    def get_randomize_paths(self) -> dict[str, int]:
+        """
+        Get the number of variables randomized by each path in the last randomization.
+
+        - "free" : unconstrained, sampled natively.
+        - "native" : constrained, sampled natively from the intervals / sets implied by the constraints.
+        - "solver" : z3 bit-vector Solver (the "solver" engine).
+        - "optimize" : z3 Optimize (the "optimize" engine).
+        - "array" : elements of VarArrays, randomized as one unit per array.
+
+        :return: Number of variables keyed by path.
+        :rtype: dict[str, int]
+        """
+        return dict(self._randomize_paths_)
+
+    def _record_paths_(self, groups: list[_ConstraintGroup_], free_vars: list[Var]) -> None:
+        """
+        Record the path taken by each variable (see get_randomize_paths()).
+
+        :param groups: The constrained groups.
+        :type groups: list[_ConstraintGroup_]
+        :param free_vars: The unconstrained variables.
+        :type free_vars: list[Var]
+        """
+        paths = {"free": len(free_vars), "native": 0, "solver": 0, "optimize": 0, "array": sum(len(a) for a in self._arrays_)}
+        for g in groups:
+            paths[g.path] += len(g.vars)
+        self._randomize_paths_ = paths
 
     def pre_randomize(self) -> None:
         """
@@ -518,6 +853,92 @@ class Object:
         """
         pass
 
+    def _build_groups_(self, engine: str, hard: list[BoolRef] = None, soft: list[BoolRef] = None) -> tuple[list, list[Var]]:
+        """
+        Collect the random variables and constraints and split them into independent groups.
+
+        Re-uses the groups of frozen constraints, or the templates of frozen class constraints, when possible.
+
+        :param engine: The randomization engine.
+        :type engine: str
+        :param hard: Optional list of dynamic hard constraints.
+        :type hard: list, optional
+        :param soft: Optional list of dynamic soft constraints.
+        :type soft: list, optional
+        :return: The constraint groups and the unconstrained variables.
+        :rtype: tuple[list, list[Var]]
+        """
+        if self._frozen_constraints_ and self._groups_ is not None and hard is None and soft is None:
+            # Use existing groups and ranges
+            for a in self._arrays_:
+                a.randomize()
+            return self._groups_, self._free_vars_
+
+        # Collect all Var objects in randomization
+        memo = {}
+        conversion = {}
+        vars = []
+        free_vars = []
+
+        for key, value in self.__dict__.items():
+            if key != "_constraints_":
+                _var_finder_(value, memo, conversion)
+
+        # Constraints as (fn, args, hard, weight)
+        constraints = []
+        for truth_value in (True, False):
+            for fn, args in self._constraints_[truth_value].values():
+                constraints.append((fn, args, truth_value, 100))
+        for c in (hard or []):
+            constraints.append((c[0], c[1:], True, None))
+        for c in (soft or []):
+            constraints.append((c[0], c[1:], False, 1000))
+
+        # Split variables into those touched by a constraint and those which can be sampled natively
+        ref_ids = {v._idx_ for _, args, _, _ in constraints for v in _arg_vars_(args)}
+        arrays = []
+        for v in conversion.values():
+            if v._auto_random_:
+                if isinstance(v, VarArray):
+                    arrays.append(v)
+                elif v._idx_ in ref_ids or v._has_constraints_():
+                    vars.append(v)
+                else:
+                    free_vars.append(v)
+
+        # VarArrays are randomized first, each as one unit, so constraints on their values see the new values
+        self._arrays_ = arrays
+        for a in arrays:
+            a.randomize()
+
+        # Re-use the constraints compiled for the class when the structure matches
+        templates = self._constraint_templates_
+        key = None
+        if templates is not None and hard is None and soft is None:
+            key = _template_key_(vars, constraints)
+
+        if key is not None and key in templates:
+            templates.move_to_end(key)
+            groups = [g.bind([vars[i] for i in positions]) for g, positions in templates[key]]
+        else:
+            # Solve independent groups of variables separately
+            groups = _partition_(vars, constraints)
+            for g in groups:
+                g.build(engine)
+
+            if key is not None:
+                positions = {v._idx_: i for i, v in enumerate(vars)}
+                templates[key] = [(g, [positions[v._idx_] for v in g.vars]) for g in groups]
+                if len(templates) > self._max_constraint_templates_:
+                    templates.popitem(last=False)
+
+        # Save the groups and min/max values for future use
+        if self._frozen_constraints_ and hard is None and soft is None:
+            self._groups_ = groups
+            self._free_vars_ = free_vars
+
+        return groups, free_vars
+
     def randomize(self, hard: list[BoolRef] = None, soft: list[BoolRef] = None) -> None:
         """
         This method randomizes the value of the variable by considering hard and soft constraints.
@@ -536,152 +957,86 @@ class Object:
         :raises ValueError: If an unknown variable is encountered in the model.
         :raises Exception: If the solver fails to randomize the variable.
         """
-        def resolve_arg(a : Any, var_ids : list[int], constrained_vars : dict[int, Var]) -> Any:
-            if not isinstance(a, Var):
-                return a
-            elif not a._auto_random_ or a._idx_ not in var_ids:
-                return a.value
-            else:
-                constrained_vars[a._idx_] = a
-                return a._rand_
-
-        def new_solver(constraints : dict[bool, dict], vars : list [Var], var_ids : list[int], constrained_vars : dict[int, Var]) -> Optimize:
-            solver = Optimize()
-
-            for truth_value, add_fn in [(True, solver.add), (False, lambda expr: solver.add_soft(expr, weight=100))]:
-                for fn, args in constraints[truth_value].values():
-                    _args = [resolve_arg(a, var_ids, constrained_vars) for a in args]
-                    add_fn(fn(*_args))
-
-            for v in vars:
-                if v._apply_constraints(solver):
-                    constrained_vars[v._idx_] = v
-
-            return solver
-
-        def cast(solver):
-            cast_values = {}
-            if solver.check() == sat:
-                model = solver.model()
-                for var in model.decls():
-                    v = Var._lookup_[int(var.name())]
-                    val = model.eval(var(), model_completion=True)
-
-                    if isinstance(val, RatNumRef):
-                        cast_values[v._idx_] = v._cast_(val.as_decimal(20).rstrip("?"))
-                    elif isinstance(val, IntNumRef| BitVecNumRef):
-                        cast_values[v._idx_] = v._cast_(val.as_long())
-                    else:
-                        cast_values[v._idx_] = v._cast_(val)
-            else:
-                raise Exception("Failed to randomize")
-            return cast_values
-
-        def optimize(solver, fn, constrained_vars, values):
-            def batched(iterable, n):
-                it = iter(iterable)
-
-                if n is None:
-                    yield list(it)
-                    return
-
-                while True:
-                    batch = list(islice(it, n))
-                    if not batch:
-                        break
-                    yield batch
-
-            for batch in batched(list(constrained_vars.values()), CONSTRAINT_BATCH_SIZE):
-                solver.push()
-                for v in batch:
-                    if isinstance(v, Int):
-                        fn(BV2Int(v._rand_, is_signed=True))
-                    else:
-                        fn(v._rand_)
-                model = cast(solver)
-                for k, val in model.items():
-                    if k in constrained_vars:
-                        values[k] = val
-                solver.pop()
-
         # User defined pre-randomization function
         self.pre_randomize()
 
-        if not self._frozen_constraints_ or self._solver_ is None or hard is not None or soft is not None:
-            # Collect all Var objects in randomization
-            memo = {}
-            conversion = {}
-            vars = []
-            constrained_vars = {} # Dict to avoid multiple matching entries
+        engine = self.get_randomize_engine()
+        groups, free_vars = self._build_groups_(engine, hard, soft)
 
-            for key, value in self.__dict__.items():
-                if key != "_constraints_":
-                    _var_finder_(value, memo, conversion)
-            for v in conversion.values():
-                if Var._lookup_[v._idx_]._auto_random_:
-                    vars.append(Var._lookup_[v._idx_])
-            var_ids = [v._idx_ for v in vars]
-
-            # Create Solver
-            solver = new_solver(constraints=self._constraints_, vars=vars, var_ids=var_ids, constrained_vars=constrained_vars)
-
-            # Add dynamic constraints
-            if hard is not None:
-                for c in hard:
-                    fn, *args = c
-                    _args = [resolve_arg(a, var_ids, constrained_vars) for a in args]
-                    solver.add(fn(*_args))
-
-            if soft is not None:
-                for c in soft:
-                    fn, *args = c
-                    _args = [resolve_arg(a, var_ids, constrained_vars) for a in args]
-                    solver.add_soft(fn(*_args), weight=1000)
-
-            # Calculate min / max values of variables
-            max_values = {v._idx_: v.get_max() for v in vars}
-            optimize(solver=solver, fn=solver.maximize, constrained_vars=constrained_vars, values=max_values)
-
-            min_values = {v._idx_: v.get_min() for v in vars}
-            optimize(solver=solver, fn=solver.minimize, constrained_vars=constrained_vars, values=min_values)
-
-        else:
-            # Use existing solver and ranges
-            solver = self._solver_
-            min_values = self._min_values_
-            max_values = self._max_values_
-            vars = self._vars_
-            var_ids = self._var_ids_
+        # Unconstrained variables are sampled natively
+        for var in free_vars:
+            var.value = var._random_value_()
 
         # Add randomization and solve
-        solver.push()
-        for k,v in min_values.items():
-            var = Var._lookup_[k]
-            val = var._random_value_(bounds=(min(v, max_values[k]), max(v, max_values[k])))
-            solver.add_soft(var._rand_ >= val, weight=100)
-            solver.add_soft(var._rand_ <= val, weight=100)
-
-            if random.choice([True, False]):
-                solver.add_soft(var._rand_ != var.value, weight=100)
-
-        values = cast(solver)
-        solver.pop()
-
-        # Assign values to Var objects - only for those within this class
-        for k, v in values.items():
-            var = Var._lookup_[k]
-            if var in vars:
-                var.value = v
-
-        # Save the solver and min/max values for future use
-        if self._frozen_constraints_ and self._solver_ is None and hard is None and soft is None:
-            self._solver_ = solver
-            self._min_values_ = min_values
-            self._max_values_ = max_values
-            self._vars_ = vars
-            self._var_ids_ = var_ids
+        for g in groups:
+            g.randomize(engine)
+        self._record_paths_(groups, free_vars)
 
         # User defined post-randomization function
         self.post_randomize()
 
+    def solutions(self, n: int, hard: list[BoolRef] = None, soft: list[BoolRef] = None) -> Iterator[Object]:
+        """
+        Generate n randomizations of the object in a single solver session.
+
+        Variables, constraints and ranges are collected once, and each group of variables keeps a solver alive
+        across solutions. Previous solutions are blocked, so each solution differs from the ones before it until
+        all solutions have been seen - at most AVL_SOLUTIONS_BLOCK_LIMIT solutions are blocked before the solver is
+        rebuilt. The object holds the values of each solution as it is yielded - copy it to keep them.
+
+        pre_randomize() and post_randomize() are called around each solution. Changes made to the constraints
+        by pre_randomize() after the first solution are not seen.
+
+        :param n: Number of solutions.
+        :type n: int
+        :param hard: Optional list of hard constraints to be added, as for randomize().
+        :type hard: list, optional
+        :param soft: Optional list of soft constraints to be added, as for randomize().
+        :type soft: list, optional
+        :return: Generator yielding the object after each solution.
+        :rtype: Iterator[Object]
+        :raises Exception: If the solver fails to randomize the variable.
+        """
+        sessions = None
+        for _ in range(n):
+            # User defined pre-randomization function
+            self.pre_randomize()
+
+            if sessions is None:
+                engine = self.get_randomize_engine()
+                groups, free_vars = self._build_groups_(engine, hard, soft)
+                sessions = [g.solutions(engine) for g in groups]
+            else:
+                for a in self._arrays_:
+                    a.randomize()
+
+            # Unconstrained variables are sampled natively
+            for var in free_vars:
+                var.value = var._random_value_()
+
+            for s in sessions:
+                next(s)
+            self._record_paths_(groups, free_vars)
+
+            # User defined post-randomization function
+            self.post_randomize()
+
+            yield self
+
+    def randomize_batch(self, n: int, hard: list[BoolRef] = None, soft: list[BoolRef] = None) -> list[Object]:
+        """
+        Randomize the object n times in a single solver session (see solutions()), returning a copy of each solution.
+
+        :param n: Number of solutions.
+        :type n: int
+        :param hard: Optional list of hard constraints to be added, as for randomize().
+        :type hard: list, optional
+        :param soft: Optional list of soft constraints to be added, as for randomize().
+        :type soft: list, optional
+        :return: A copy of the object for each solution.
+        :rtype: list[Object]
+        :raises Exception: If the solver fails to randomize the variable.
+        """
+        return [copy.copy(obj) for obj in self.solutions(n, hard, soft)]
+
 __all__ = ["Object"]
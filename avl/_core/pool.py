@@ -0,0 +1,194 @@
+# Copyright 2024 Apheleia
+#
+# Description:
+# Apheleia Verification Library Randomization Pool
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import random
+import traceback
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from .object import _var_finder_
+
+if TYPE_CHECKING:
+    from .object import Object
+    from .var import Var
+
+# Number of lookaheads of items randomized by each solver session of a worker (see Object.solutions())
+_SESSION_LOOKAHEADS_ = 16
+
+def _pool_vars_(obj: Object) -> list[Var]:
+    """
+    Collect the random variables of an object, in a fixed order.
+
+    :param obj: The object.
+    :type obj: Object
+    :return: The random variables.
+    :rtype: list[Var]
+    """
+    memo = {}
+    conversion = {}
+    for key, value in obj.__dict__.items():
+        if key != "_constraints_":
+            _var_finder_(value, memo, conversion)
+    return [v for v in conversion.values() if v._auto_random_]
+
+def _pool_worker_(factory: Callable[..., Object], seed: str, queue: Any, session: int) -> None:
+    """
+    Worker process - randomize an object from the factory forever, queueing the values of each solution.
+
+    Solver sessions are restarted every session items, so the state they build up stays bounded.
+
+    :param factory: Callable creating the object, called as factory(name, parent).
+    :type factory: Callable[..., Object]
+    :param seed: The seed of the worker.
+    :type seed: str
+    :param queue: The queue of the worker.
+    :type queue: multiprocessing.Queue
+    :param session: Number of items randomized by each solver session.
+    :type session: int
+    """
+    try:
+        random.seed(seed)
+        np.random.seed(random.getrandbits(32))
+
+        obj = factory("item", None)
+        vars = _pool_vars_(obj)
+        while True:
+            for _ in obj.solutions(session):
+                queue.put([v.value for v in vars])
+    except Exception:
+        queue.put(_PoolError_(traceback.format_exc()))
+
+class _PoolError_(str):
+    """
+    Traceback of an exception raised in a worker.
+    """
+    pass
+
+class RandomizationPool:
+    def __init__(
+        self,
+        factory: Callable[..., Object],
+        workers: int = None,
+        lookahead: int = 16,
+        seed: int = None,
+        start_method: str = None,
+    ) -> None:
+        """
+        Randomize items in worker processes, ahead of demand.
+
+        Each worker creates its own item from the factory and randomizes it in solver sessions of
+        16 * lookahead items (see Object.solutions()), queueing the values of up to lookahead solutions. Items handed out by the
+        pool take their values from the workers in turn, so the sequence of values only depends on the seed,
+        never on the timing of the workers.
+
+        The randomization (including pre_randomize() and post_randomize()) happens in the worker - only the values
+        of the random variables are sent back. Items must have the same structure as the item created by the factory.
+
+        :param factory: Callable creating an item, called as factory(name, parent) - usually the item class.
+        :type factory: Callable[..., Object]
+        :param workers: Number of worker processes. Defaults to one less than the number of CPUs.
+        :type workers: int, optional
+        :param lookahead: Number of items each worker randomizes ahead of demand.
+        :type lookahead: int
+        :param seed: Seed of the pool. Defaults to a value drawn from the random module, so is repeatable for a given test seed.
+        :type seed: int, optional
+        :param start_method: multiprocessing start method (e.g. "fork", "spawn"). Defaults to the platform default.
+                             Methods other than "fork" require the factory to be importable by the workers.
+        :type start_method: str, optional
+        """
+        self.factory = factory
+        self.workers = workers if workers is not None else max(1, (os.cpu_count() or 2) - 1)
+        self.lookahead = lookahead
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.start_method = start_method
+
+        self._processes_ = []
+        self._queues_ = []
+        self._next_ = 0
+
+    def __enter__(self) -> RandomizationPool:
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """
+        Start the workers. Called automatically by the first request for an item.
+        """
+        if self._processes_:
+            return
+
+        ctx = multiprocessing.get_context(self.start_method)
+        for i in range(self.workers):
+            q = ctx.Queue(maxsize=self.lookahead)
+            p = ctx.Process(target=_pool_worker_, args=(self.factory, f"{self.seed}:{i}", q, self.lookahead * _SESSION_LOOKAHEADS_), daemon=True)
+            p.start()
+            self._queues_.append(q)
+            self._processes_.append(p)
+
+    def close(self) -> None:
+        """
+        Stop the workers, discarding any items randomized ahead of demand.
+        """
+        for p in self._processes_:
+            p.terminate()
+        for p in self._processes_:
+            p.join()
+        for q in self._queues_:
+            q.close()
+
+        self._processes_ = []
+        self._queues_ = []
+        self._next_ = 0
+
+    def randomize(self, obj: Object) -> None:
+        """
+        Assign the next pre-randomized values to an item.
+
+        :param obj: The item, with the same structure as the items created by the factory.
+        :type obj: Object
+        :raises Exception: If a worker failed, or the item doesn't match the structure of the factory.
+        """
+        self.start()
+
+        q = self._queues_[self._next_ % len(self._queues_)]
+        self._next_ += 1
+
+        values = q.get()
+        if isinstance(values, _PoolError_):
+            raise Exception(f"Randomization pool worker failed:\n{values}")
+
+        vars = _pool_vars_(obj)
+        if len(vars) != len(values):
+            raise Exception(f"{type(obj).__name__} doesn't match the structure of the randomization pool factory")
+
+        for v, val in zip(vars, values, strict=True):
+            v.value = val
+
+    def get(self, name: str, parent: Any) -> Object:
+        """
+        Create an item from the factory, with the next pre-randomized values.
+
+        :param name: Name of the item.
+        :type name: str
+        :param parent: Parent of the item (e.g. the sequence).
+        :type parent: Any
+        :return: The item.
+        :rtype: Object
+        :raises Exception: If a worker failed.
+        """
+        obj = self.factory(name, parent)
+        self.randomize(obj)
+        return obj
+
+__all__ = ["RandomizationPool"]
@@ -0,0 +1,700 @@
+# Copyright 2024 Apheleia
+#
+# Description:
+# Apheleia Verification Library Constraint Solver
+
+from __future__ import annotations
+
+import copy
+import os
+import random
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from types import BuiltinFunctionType, CodeType, FunctionType, ModuleType
+from typing import Any
+
+from z3 import BitVecNumRef, BitVecVal, IntNumRef, Optimize, Or, RatNumRef, Solver, SolverFor, is_bv, sat, unknown, unsat
+
+from .int import Int
+from .native import _compile_native_, _plan_cache_
+from .var import Var, _arg_vars_, _root_var_, _solvers_, _track_solver_
+
+# Batch size for constraint min / max calculations
+# Too big and the constraints won't solve
+# Too small and you get a performance drop
+# Tuned automatically unless AVL_CONSTRAINT_BATCH_SIZE is set
+if "AVL_CONSTRAINT_BATCH_SIZE" in os.environ:
+    CONSTRAINT_BATCH_SIZE = int(os.environ["AVL_CONSTRAINT_BATCH_SIZE"])
+else:
+    CONSTRAINT_BATCH_SIZE = None
+
+# Time (ms) a batch may take before it is split when tuning the batch size
+CONSTRAINT_BATCH_TIMEOUT = int(os.environ.get("AVL_CONSTRAINT_BATCH_TIMEOUT", 2000))
+
+# Number of memoized min / max ranges (0 to disable)
+RANGE_CACHE_SIZE = int(os.environ.get("AVL_RANGE_CACHE_SIZE", 1024))
+
+# Number of solutions blocked by a solver session (see _ConstraintGroup_.solutions())
+# The session's solver is rebuilt after this many, so the cost of each solve stays bounded
+SOLUTIONS_BLOCK_LIMIT = int(os.environ.get("AVL_SOLUTIONS_BLOCK_LIMIT", 256))
+
+# Randomization engine
+# optimize - z3 Optimize, soft constraints steer each variable towards a random target within its range
+# solver   - incremental z3 bit-vector Solver, seeded with random bit phases. No ranges are calculated.
+#            Falls back to optimize for groups with soft constraints or variables which aren't bit-vectors
+RANDOMIZE_ENGINES = ("optimize", "solver")
+RANDOMIZE_ENGINE = os.environ.get("AVL_RANDOMIZE_ENGINE", "optimize")
+
+# z3 timeout meaning no timeout
+_NO_TIMEOUT_ = 4294967295
+
+# Tuned batch size (None for unlimited)
+_batch_size_ = None
+
+# Memoized (min_values, max_values), keyed by _ConstraintGroup_._range_key_()
+_range_cache_ = OrderedDict()
+
+def _check_engine_(engine: str) -> str:
+    """
+    Check a randomization engine name.
+
+    :param engine: The engine name (see RANDOMIZE_ENGINES).
+    :type engine: str
+    :return: The engine name.
+    :rtype: str
+    :raises ValueError: If the engine is unknown.
+    """
+    if engine not in RANDOMIZE_ENGINES:
+        raise ValueError(f"Unknown randomization engine {engine} - expected one of {RANDOMIZE_ENGINES}")
+    return engine
+
+def _set_engine_(engine: str) -> None:
+    """
+    Set the default randomization engine.
+
+    :param engine: The engine name (see RANDOMIZE_ENGINES).
+    :type engine: str
+    :raises ValueError: If the engine is unknown.
+    """
+    global RANDOMIZE_ENGINE
+    RANDOMIZE_ENGINE = _check_engine_(engine)
+
+def _seeded_solver_(hard: list[Any]) -> Solver:
+    """
+    Create a bit-vector solver seeded with random bit phases.
+
+    Each solve picks a random phase (polarity) for every undecided bit, so successive solves
+    return diverse solutions without the cost of optimizing towards a random target. Change the
+    random_seed parameter between solves of the same solver to re-seed.
+
+    :param hard: The hard constraints.
+    :type hard: list[Any]
+    :return: The solver.
+    :rtype: Solver
+    """
+    solver = _track_solver_(SolverFor("QF_BV"))
+    solver.set("phase", "random")
+    solver.set("random_seed", random.getrandbits(31))
+    solver.add(hard)
+    return solver
+
+def _value_key_(c: Any) -> Any:
+    """
+    Fingerprint a value captured by (or passed to) a constraint function.
+
+    Only values which can't change behind the cache are accepted - simple values (and tuples of them), modules,
+    classes and other constraint functions (see _fn_key_()). Objects such as self can be modified between
+    randomizations, so make the group uncacheable.
+
+    :param c: The value.
+    :type c: Any
+    :return: The fingerprint.
+    :rtype: Any
+    :raises TypeError: If the value can't be fingerprinted.
+    """
+    if isinstance(c, bool | int | float | str | bytes | type(None)):
+        return c
+    elif isinstance(c, tuple):
+        return tuple(_value_key_(x) for x in c)
+    elif isinstance(c, type | ModuleType | BuiltinFunctionType):
+        return c
+    elif isinstance(c, FunctionType):
+        return _fn_key_(c)
+    raise TypeError(f"Can't fingerprint {type(c).__name__}")
+
+def _code_key_(code: CodeType, globals: dict[str, Any]) -> None:
+    """
+    Check the globals read by a code object (and the functions nested in it) can be fingerprinted.
+
+    :param code: The code object.
+    :type code: CodeType
+    :param globals: The globals of the function.
+    :type globals: dict[str, Any]
+    :raises TypeError: If a global can't be fingerprinted.
+    """
+    for name in code.co_names:
+        # Module level functions are taken as fixed
+        if name in globals and not isinstance(globals[name], FunctionType):
+            _value_key_(globals[name])
+    for c in code.co_consts:
+        if isinstance(c, CodeType):
+            _code_key_(c, globals)
+
+def _fn_key_(fn: Any) -> tuple:
+    """
+    Fingerprint a constraint function - its code, default arguments and the values it captures.
+
+    :param fn: The constraint function.
+    :type fn: Any
+    :return: The fingerprint.
+    :rtype: tuple
+    :raises TypeError: If the function captures or reads a value which can't be fingerprinted (see _value_key_()).
+    """
+    if not isinstance(fn, FunctionType):
+        raise TypeError(f"Can't fingerprint {type(fn).__name__}")
+
+    key = [fn.__code__, _value_key_(fn.__defaults__)]
+    for cell in fn.__closure__ or ():
+        try:
+            key.append(_value_key_(cell.cell_contents))
+        except ValueError:
+            key.append(None)
+    _code_key_(fn.__code__, fn.__globals__)
+    return tuple(key)
+
+def _arg_key_(a: Any, positions: dict[int, int]) -> tuple:
+    """
+    Fingerprint a constraint argument.
+
+    :param a: The argument.
+    :type a: Any
+    :param positions: Position of each random Var, keyed by Var index.
+    :type positions: dict[int, int]
+    :return: The fingerprint.
+    :rtype: tuple
+    """
+    if isinstance(a, list | tuple):
+        return ("list", tuple(_arg_key_(x, positions) for x in a))
+    elif not isinstance(a, Var):
+        return ("literal", _value_key_(a))
+    elif a._idx_ in positions:
+        return ("var", positions[a._idx_])
+    elif a._owner_ is not None and a._owner_[0]._idx_ in positions:
+        return ("view", positions[a._owner_[0]._idx_], a._owner_[1])
+    else:
+        return ("value", a.value)
+
+class _ConstraintGroup_:
+    """
+    A set of random Vars linked by constraints, with the constraints that link them.
+
+    Groups share no Vars, so each is solved independently in its own (small) solver.
+    Solvers are created on demand and released straight after use - many live Optimize
+    instances in one z3 context slow every subsequent check.
+
+    The evaluated constraints refer to the Vars through symbols, kept in the same order as
+    the Vars. A group can be bound to the Vars of another object with the same structure,
+    re-using the constraints and ranges without re-evaluating them.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty group.
+        """
+        self.vars = []
+        self.var_ids = set()
+        self.constraints = []
+        self.symbols = []
+        self.hard = []
+        self.soft = []
+        self.min_values = []
+        self.max_values = []
+        self.fixed = False
+        self.ranged = False
+        self.native = None
+        self.path = None
+
+    def _resolve_arg_(self, a: Any) -> Any:
+        """
+        Resolve a constraint argument to its solver representation.
+
+        :param a: The argument.
+        :type a: Any
+        :return: The z3 variable (or field view) for Vars randomized in this group, the value for other Vars,
+                 a list of resolved elements for lists and tuples, otherwise the argument.
+        :rtype: Any
+        """
+        if isinstance(a, list | tuple):
+            return [self._resolve_arg_(x) for x in a]
+        elif not isinstance(a, Var):
+            return a
+        elif _root_var_(a)._idx_ in self.var_ids:
+            return a._rand_
+        else:
+            return a.value
+
+    def _new_solver_(self) -> Optimize:
+        """
+        Create a solver loaded with the constraints of the group.
+
+        :return: The solver.
+        :rtype: Optimize
+        """
+        solver = _track_solver_(Optimize())
+        solver.add(self.hard)
+        for expr, weight in self.soft:
+            solver.add_soft(expr, weight=weight)
+        return solver
+
+    def _cast_(self, solver: Optimize, positions: list[int]) -> dict[int, Any]:
+        """
+        Solve and cast the model value of each variable.
+
+        :param solver: The solver.
+        :type solver: Optimize
+        :param positions: The positions of the variables (in self.vars) to extract from the model.
+        :type positions: list[int]
+        :return: Cast values keyed by position.
+        :rtype: dict[int, Any]
+        :raises Exception: If the solver fails to randomize.
+        """
+        if solver.check() != sat:
+            raise Exception("Failed to randomize")
+        return self._values_(solver, positions)
+
+    def _values_(self, solver: Optimize, positions: list[int]) -> dict[int, Any]:
+        """
+        Cast the model value of each variable, after a successful check.
+
+        :param solver: The solver.
+        :type solver: Optimize
+        :param positions: The positions of the variables (in self.vars) to extract from the model.
+        :type positions: list[int]
+        :return: Cast values keyed by position.
+        :rtype: dict[int, Any]
+        """
+        cast_values = {}
+        model = solver.model()
+        for i in positions:
+            v = self.vars[i]
+            val = model.eval(self.symbols[i], model_completion=True)
+
+            if isinstance(val, RatNumRef):
+                cast_values[i] = v._cast_(val.numerator_as_long() / val.denominator_as_long())
+            elif isinstance(val, IntNumRef | BitVecNumRef):
+                cast_values[i] = v._cast_(val.as_long())
+            else:
+                cast_values[i] = v._cast_(val)
+        return cast_values
+
+    def _optimize_(self, solver: Optimize, maximize: bool, values: list[Any]) -> None:
+        """
+        Calculate the max (or min) value of each variable in batches.
+
+        Unless AVL_CONSTRAINT_BATCH_SIZE is set the batch size is tuned on the fly - a batch which
+        doesn't solve within AVL_CONSTRAINT_BATCH_TIMEOUT is halved and retried, a batch which
+        solves quickly doubles the next one. The tuned size carries over to later randomizations.
+
+        :param solver: The solver.
+        :type solver: Optimize
+        :param maximize: True to maximize, False to minimize.
+        :type maximize: bool
+        :param values: List updated with the result, in the order of self.vars.
+        :type values: list[Any]
+        :raises Exception: If the solver fails to randomize.
+        """
+        global _batch_size_
+
+        fn = solver.maximize if maximize else solver.minimize
+        pending = list(range(len(self.vars)))
+        while pending:
+            size = _batch_size_ if CONSTRAINT_BATCH_SIZE is None else CONSTRAINT_BATCH_SIZE
+            batch = pending if size is None else pending[:size]
+            tuning = CONSTRAINT_BATCH_SIZE is None and len(batch) > 1
+
+            solver.push()
+            for i in batch:
+                v = self.vars[i]
+                if isinstance(v, Int):
+                    # Flipping the sign bit maps signed order onto unsigned order - much cheaper than BV2Int
+                    fn(self.symbols[i] ^ BitVecVal(1 << (v.width - 1), v.width))
+                else:
+                    fn(self.symbols[i])
+
+            solver.set(timeout=CONSTRAINT_BATCH_TIMEOUT if tuning else _NO_TIMEOUT_)
+            start = time.perf_counter()
+            result = solver.check()
+            elapsed = (time.perf_counter() - start) * 1000
+
+            if result == unknown and tuning:
+                _batch_size_ = max(1, len(batch) // 2)
+            elif result != sat:
+                raise Exception("Failed to randomize")
+            else:
+                for i, val in self._values_(solver, batch).items():
+                    values[i] = val
+                pending = pending[len(batch):]
+                if tuning and _batch_size_ is not None and elapsed < CONSTRAINT_BATCH_TIMEOUT / 10:
+                    _batch_size_ *= 2
+            solver.pop()
+
+        solver.set(timeout=_NO_TIMEOUT_)
+
+    def _range_key_(self) -> tuple:
+        """
+        Fingerprint the group for the range cache.
+
+        Covers the structure of the Vars and constraints, the values of non-random arguments
+        and the values captured by the constraint functions. Groups whose constraint functions capture
+        or read anything else (e.g. attributes of self) aren't cached, as it may change between randomizations.
+
+        :return: The key, or None if part of the group can't be fingerprinted.
+        :rtype: tuple
+        """
+        positions = {v._idx_: i for i, v in enumerate(self.vars)}
+        try:
+            key = (
+                tuple((v._signature_(), tuple(_fn_key_(fn) for c in v._constraints_.values() for fn in c.values())) for v in self.vars),
+                tuple(
+                    (_fn_key_(fn), hard, weight, tuple(_arg_key_(a, positions) for a in args))
+                    for fn, args, hard, weight in self.constraints
+                ),
+            )
+            hash(key)
+        except (AttributeError, TypeError):
+            return None
+        return key
+
+    def build(self, engine: str = "optimize") -> None:
+        """
+        Evaluate the constraints and, if the engine needs them, calculate the min / max range of each variable.
+
+        :param engine: The randomization engine (see RANDOMIZE_ENGINES).
+        :type engine: str
+        """
+        self.symbols = [v._rand_ for v in self.vars]
+        self.hard = []
+        self.soft = []
+        for fn, args, hard, weight in self.constraints:
+            expr = fn(*[self._resolve_arg_(a) for a in args])
+            if hard:
+                self.hard.append(expr)
+            else:
+                self.soft.append((expr, weight))
+
+        for v in self.vars:
+            self.hard.extend(c(v._rand_) for c in v._constraints_[True].values())
+            self.soft.extend((c(v._rand_), 100) for c in v._constraints_[False].values())
+
+        self.max_values = [v.get_max() for v in self.vars]
+        self.min_values = [v.get_min() for v in self.vars]
+        self.ranged = False
+        self.native = _compile_native_(self.hard, self.vars, self.symbols) if not self.soft else None
+        if self.native is None and (engine == "optimize" or not self._seedable_()):
+            self._ranges_()
+
+    def _seedable_(self) -> bool:
+        """
+        Check if the group can be randomized by the seeded solver engine.
+
+        :return: True if the group has no soft constraints and only bit-vector variables.
+        :rtype: bool
+        """
+        return not self.soft and all(is_bv(s) for s in self.symbols)
+
+    def _ranges_(self) -> None:
+        """
+        Calculate the min / max range of each variable.
+
+        Ranges are memoized (see AVL_RANGE_CACHE_SIZE) for groups whose constraints only depend on values
+        which can be fingerprinted (see _range_key_()).
+        """
+        self.ranged = True
+        if not self.vars:
+            return
+
+        key = self._range_key_() if RANGE_CACHE_SIZE > 0 else None
+        if key is not None and key in _range_cache_:
+            _range_cache_.move_to_end(key)
+            self.min_values, self.max_values = (list(v) for v in _range_cache_[key])
+            return
+
+        # Skip the min / max sweeps when the constraints leave only one solution
+        solver = self._new_solver_()
+        values = self._cast_(solver, range(len(self.vars)))
+        solver.push()
+        solver.add(Or([s != solver.model().eval(s, model_completion=True) for s in self.symbols]))
+        self.fixed = solver.check() == unsat
+        solver.pop()
+
+        if self.fixed:
+            self.max_values = [values[i] for i in range(len(self.vars))]
+            self.min_values = list(self.max_values)
+        else:
+            self._optimize_(solver, True, self.max_values)
+            self._optimize_(solver, False, self.min_values)
+
+        if key is not None and not self.fixed:
+            _range_cache_[key] = (tuple(self.min_values), tuple(self.max_values))
+            if len(_range_cache_) > RANGE_CACHE_SIZE:
+                _range_cache_.popitem(last=False)
+
+    def bind(self, vars: list[Var]) -> _ConstraintGroup_:
+        """
+        Create a group sharing the evaluated constraints and ranges of this group, for other Vars.
+
+        :param vars: The Vars to bind, in the same order (and of the same structure) as self.vars.
+        :type vars: list[Var]
+        :return: The bound group.
+        :rtype: _ConstraintGroup_
+        """
+        g = copy.copy(self)
+        g.vars = vars
+        g.var_ids = {v._idx_ for v in vars}
+        return g
+
+    def randomize(self, engine: str = "optimize") -> None:
+        """
+        Solve the group for a random solution.
+
+        :param engine: The randomization engine (see RANDOMIZE_ENGINES).
+        :type engine: str
+        :raises Exception: If the solver fails to randomize.
+        """
+        if self.native is not None and self._randomize_native_():
+            return
+        elif engine == "solver" and self._seedable_():
+            self._randomize_seeded_()
+            self.path = "solver"
+        else:
+            self._randomize_optimize_()
+            self.path = "optimize"
+
+    def _randomize_native_(self) -> bool:
+        """
+        Sample a solution with the native plan.
+
+        :return: True if a solution was sampled, False if sampling dead-ended.
+        :rtype: bool
+        """
+        values = self.native.sample()
+        if values is None:
+            return False
+
+        for v, value in zip(self.vars, values, strict=True):
+            v.value = v._cast_(value)
+        self.path = "native"
+        return True
+
+    def _randomize_seeded_(self) -> None:
+        """
+        Solve with the seeded bit-vector solver.
+        """
+        solver = _seeded_solver_(self.hard)
+
+        # Move away from the previous value when possible
+        diverse = [s != v.value for s, v in zip(self.symbols, self.vars, strict=True) if random.choice([True, False])]
+        if not diverse or solver.check(*diverse) != sat:
+            if solver.check() != sat:
+                raise Exception("Failed to randomize")
+
+        values = self._values_(solver, range(len(self.vars)))
+        for i, var in enumerate(self.vars):
+            var.value = values[i]
+
+    def _randomize_optimize_(self) -> None:
+        """
+        Pick a random target within the range of each variable and solve.
+        """
+        if not self.ranged:
+            self._ranges_()
+
+        if self.fixed:
+            for var, val in zip(self.vars, self.min_values, strict=True):
+                var.value = val
+            return
+
+        solver = self._new_solver_()
+        self._add_targets_(solver)
+        values = self._cast_(solver, range(len(self.vars)))
+
+        for i, var in enumerate(self.vars):
+            var.value = values[i]
+
+    def _add_targets_(self, solver: Optimize) -> None:
+        """
+        Steer each variable towards a random target within its range.
+
+        :param solver: The solver.
+        :type solver: Optimize
+        """
+        for i, var in enumerate(self.vars):
+            lo = self.min_values[i]
+            hi = self.max_values[i]
+            val = var._random_value_(bounds=(min(lo, hi), max(lo, hi)))
+            solver.add_soft(self.symbols[i] >= val, weight=100)
+            solver.add_soft(self.symbols[i] <= val, weight=100)
+
+            if random.choice([True, False]):
+                solver.add_soft(self.symbols[i] != var.value, weight=100)
+
+    def solutions(self, engine: str = "optimize") -> Iterator[None]:
+        """
+        Randomize repeatedly, sharing the evaluated constraints and ranges.
+
+        With the seeded solver engine an incremental solver is kept alive across solutions, re-seeded before
+        each solve. Each solution is blocked once found, so later solutions differ from earlier ones. The solver
+        is rebuilt, releasing the blocked solutions, when all solutions have been seen or after
+        SOLUTIONS_BLOCK_LIMIT solutions (AVL_SOLUTIONS_BLOCK_LIMIT) - so at most that many solutions are blocked,
+        and the cost of each solve doesn't grow over a long session. z3 Optimize doesn't solve incrementally as
+        well, so the optimize engine uses a fresh solver for each solution, steered away from the previous one as
+        in randomize().
+
+        The Vars hold the values of the solution at each yield.
+
+        :param engine: The randomization engine (see RANDOMIZE_ENGINES).
+        :type engine: str
+        :return: Generator, yielding after each solution.
+        :rtype: Iterator[None]
+        :raises Exception: If the solver fails to randomize.
+        """
+        while self.native is not None:
+            if not self._randomize_native_():
+                break
+            yield
+
+        if not (engine == "solver" and self._seedable_()):
+            self.path = "optimize"
+            while True:
+                self._randomize_optimize_()
+                yield
+
+        self.path = "solver"
+
+        solver, blocked = None, 0
+        while True:
+            if solver is None or blocked >= SOLUTIONS_BLOCK_LIMIT:
+                solver = _seeded_solver_(self.hard)
+                blocked = 0
+
+            solver.set("random_seed", random.getrandbits(31))
+            if solver.check() != sat:
+                if blocked == 0:
+                    raise Exception("Failed to randomize")
+                # All solutions seen - start again
+                solver = None
+                continue
+
+            model = solver.model()
+            values = self._values_(solver, range(len(self.vars)))
+            if self.vars:
+                solver.add(Or([s != model.eval(s, model_completion=True) for s in self.symbols]))
+                blocked += 1
+
+            for i, var in enumerate(self.vars):
+                var.value = values[i]
+            yield
+
+def _partition_(vars: list[Var], constraints: list[tuple]) -> list[_ConstraintGroup_]:
+    """
+    Split variables and constraints into independent groups.
+
+    Vars are linked when they appear as arguments of the same constraint. Constraints
+    on a single Var (Var._constraints_) never link variables.
+
+    :param vars: The random variables to partition.
+    :type vars: list[Var]
+    :param constraints: The constraints as (fn, args, hard, weight) tuples.
+    :type constraints: list[tuple]
+    :return: List of independent groups.
+    :rtype: list[_ConstraintGroup_]
+    """
+    # Union-find over Var index
+    parent = {v._idx_: v._idx_ for v in vars}
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def args_ids(args: list[Any]) -> list[int]:
+        return [v._idx_ for v in _arg_vars_(args) if v._idx_ in parent]
+
+    for _, args, _, _ in constraints:
+        ids = args_ids(args)
+        for i in ids[1:]:
+            ri, r0 = find(i), find(ids[0])
+            if ri != r0:
+                parent[ri] = r0
+
+    groups = {}
+    for v in vars:
+        groups.setdefault(find(v._idx_), _ConstraintGroup_())
+        g = groups[find(v._idx_)]
+        g.vars.append(v)
+        g.var_ids.add(v._idx_)
+
+    for c in constraints:
+        ids = args_ids(c[1])
+        if ids:
+            groups[find(ids[0])].constraints.append(c)
+        else:
+            # Constraints with no random arguments must still hold
+            groups.setdefault(None, _ConstraintGroup_()).constraints.append(c)
+
+    return list(groups.values())
+
+def _z3_usage_() -> dict[str, int]:
+    """
+    Count the live z3 state.
+
+    :return: Live registered Vars, Vars holding a z3 symbol, live solvers, z3 symbol names created
+             and memoized ranges / native plans.
+    :rtype: dict[str, int]
+    """
+    live = list(Var._lookup_.values())
+    return {
+        "vars": len(live),
+        "symbols": sum("_rand_" in v.__dict__ for v in live),
+        "solvers": len(_solvers_),
+        "declarations": Var._count_,
+        "range_cache": len(_range_cache_),
+        "native_cache": len(_plan_cache_),
+    }
+
+def _release_caches_() -> None:
+    """
+    Release the memoized ranges and native plans, and the z3 expressions they hold.
+    """
+    _range_cache_.clear()
+    _plan_cache_.clear()
+
+def _template_key_(vars: list[Var], constraints: list[tuple]) -> tuple:
+    """
+    Structural fingerprint of a randomization, used to share compiled constraints between objects.
+
+    Two randomizations have the same key when their Vars match in order, type, range and constraint
+    functions, and their constraints use the same functions, default arguments and literal arguments.
+    Closures of the constraint functions are not part of the key.
+
+    :param vars: The random variables, in collection order.
+    :type vars: list[Var]
+    :param constraints: The constraints as (fn, args, hard, weight) tuples.
+    :type constraints: list[tuple]
+    :return: The key, or None if part of the structure can't be fingerprinted.
+    :rtype: tuple
+    """
+    positions = {v._idx_: i for i, v in enumerate(vars)}
+    try:
+        key = (
+            tuple(v._signature_() for v in vars),
+            tuple((fn.__code__, fn.__defaults__, hard, weight, tuple(_arg_key_(a, positions) for a in args)) for fn, args, hard, weight in constraints),
+        )
+        hash(key)
+    except (AttributeError, TypeError):
+        return None
+    return key
+
+__all__ = []
@@ -6,24 +6,337 @@
 from __future__ import annotations
 
 import copy
-from collections.abc import Iterator
+from collections.abc import Callable, Iterable, Iterator
 from typing import Any
 
+import numpy as np
 from cocotb.handle import HierarchyObject
+from z3 import BoolRef, Extract
 
+from .bool import Bool
+from .enum import Enum
+from .int import Int
+from .logic import Logic
+from .var import Var
+from .var_array import _storage_
+
+
+def _layout_(cls: type) -> list[tuple[str, int, int, bool]] | None:
+    """
+    Get the bit layout of a Struct class from the default value of each field.
+
+    The last field is at offset 0, matching the Verilog packed struct layout.
+
+    :param cls: The Struct class.
+    :type cls: type
+    :return: The (name, offset, width, signed) of each field, in declaration order.
+             None if a field has no bit-vector default (Logic, Uint*, Int*, Bool, Enum).
+    :rtype: list[tuple[str, int, int, bool]] | None
+    """
+    layout = []
+    offset = 0
+    for name, _ in reversed(cls._fields_):
+        v = getattr(cls, name, None)
+        if not isinstance(v, Logic | Enum):
+            return None
+        layout.append((name, offset, v.width, v._range_()[0] < 0))
+        offset += v.width
+    layout.reverse()
+    return layout
+
+def _compile_(source: str, name: str) -> Callable[..., Any]:
+    """
+    Compile a generated function.
+
+    :param source: The source of the function.
+    :type source: str
+    :param name: The name of the function.
+    :type name: str
+    :return: The function.
+    :rtype: Callable[..., Any]
+    """
+    namespace = {}
+    exec(source, namespace)
+    return namespace[name]
+
+def _compile_codec_(cls: type, layout: list[tuple[str, int, int, bool]]) -> tuple[Callable[..., int], Callable[..., None], Callable[..., tuple]]:
+    """
+    Generate the pack, unpack and row functions of a Struct layout.
+
+    Each function is straight-line code with the offsets and masks as constants. Unpacked values of the
+    standard bit-vector types (Logic, Uint*, Int*, Bool) are already in range, so are assigned without casting.
+
+    :param cls: The Struct class.
+    :type cls: type
+    :param layout: The layout (see _layout_).
+    :type layout: list[tuple[str, int, int, bool]]
+    :return: pack(self) -> int, unpack(self, value) and row(self) -> tuple of field values.
+    :rtype: tuple[Callable[..., int], Callable[..., None], Callable[..., tuple]]
+    """
+    pack = []
+    unpack = []
+    row = []
+    for name, offset, width, _ in layout:
+        mask = hex((1 << width) - 1)
+        field = f"(value >> {offset}) & {mask}"
+        cast = type(getattr(cls, name))._cast_
+        if cast is Logic._cast_:
+            unpack.append(f"    self.{name}._value_ = {field}")
+        elif cast is Int._cast_:
+            unpack.append(f"    self.{name}._value_ = ({field}) - (((value >> {offset + width - 1}) & 1) << {width})")
+        elif cast is Bool._cast_:
+            unpack.append(f"    self.{name}._value_ = bool({field})")
+        else:
+            unpack.append(f"    self.{name}.value = {field}")
+        pack.append(f"((self.{name}._value_ & {mask}) << {offset})")
+        row.append(f"self.{name}._value_, ")
+
+    return (
+        _compile_(f"def _pack_(self):\n    return {' | '.join(pack) or '0'}", "_pack_"),
+        _compile_("def _unpack_(self, value):\n    value = int(value)\n" + "\n".join(unpack), "_unpack_"),
+        _compile_(f"def _row_(self):\n    return ({''.join(row)})", "_row_"),
+    )
 
 class _StructMeta_(type):
     def __new__(mcs, name, bases, namespace):
         """
         Custom metaclass to automatically collect field annotations
         and create a `_fields_` attribute for the Struct class.
+
+        The bit layout, pack / unpack functions and NumPy dtype are compiled once per class,
+        when every field has a bit-vector default value.
         """
         cls = super().__new__(mcs, name, bases, namespace)
         cls._fields_ = list(cls.__annotations__.items())
+
+        cls._layout_ = _layout_(cls)
+        if cls._layout_ is None:
+            cls._width_ = None
+            cls._pack_ = cls._unpack_ = cls._row_ = None
+            cls._dtype_ = None
+        else:
+            cls._width_ = sum(w for _, _, w, _ in cls._layout_)
+            cls._pack_, cls._unpack_, cls._row_ = _compile_codec_(cls, cls._layout_)
+            cls._dtype_ = np.dtype([(n, _storage_(w, signed)) for n, _, w, signed in cls._layout_])
         return cls
 
+class StructBinding:
+    def __init__(self, struct: Struct, hdl: HierarchyObject) -> None:
+        """
+        Binding of a Struct instance to an HDL handle, created by Struct.bind().
+
+        The handle is resolved once - either a packed vector (a handle with a value) or a hierarchy with a
+        sub-handle per field. Fields without a sub-handle are ignored. Transfers are then straight assignments.
+
+        The Struct's fields are looked up on each transfer, so fields may be re-assigned after binding.
+
+        :param struct: The Struct instance.
+        :type struct: Struct
+        :param hdl: The HDL handle.
+        :type hdl: HierarchyObject
+        """
+        self.struct = struct
+        self.hdl = hdl
+        self._packed_ = hasattr(hdl, "value")
+        self._handles_ = []
+        if not self._packed_:
+            for name, _ in struct._fields_:
+                h = getattr(hdl, name, None)
+                if h is not None:
+                    self._handles_.append((name, h))
+
+    def to_hdl(self) -> None:
+        """
+        Drive the HDL handle from the Struct.
+        """
+        if self._packed_:
+            self.hdl.value = self.struct.to_bits()
+        else:
+            struct = self.struct
+            for name, h in self._handles_:
+                h.value = getattr(struct, name).value
+
+    def from_hdl(self) -> None:
+        """
+        Populate the Struct from the HDL handle.
+        """
+        if self._packed_:
+            self.struct.from_bits(self.hdl.value)
+        else:
+            struct = self.struct
+            for name, h in self._handles_:
+                getattr(struct, name).value = h.value
+
+def _field_view_(fn: Callable[..., BoolRef], field: Logic | Enum) -> Callable[..., BoolRef]:
+    """
+    Apply a constraint of a field to the field view, in place of the packed variable.
+
+    :param fn: The field constraint.
+    :type fn: Callable[..., BoolRef]
+    :param field: The field.
+    :type field: Logic | Enum
+    :return: The constraint of the packed variable.
+    :rtype: Callable[..., BoolRef]
+    """
+    return lambda _: fn(field._rand_)
+
+def _fixed_view_(field: Logic | Enum) -> Callable[..., BoolRef]:
+    """
+    Hold a non-random field at its value.
+
+    :param field: The field.
+    :type field: Logic | Enum
+    :return: The constraint of the packed variable.
+    :rtype: Callable[..., BoolRef]
+    """
+    return lambda _: field._rand_ == int(field.value)
+
+class StructVar(Logic):
+    def __init__(self, struct: Struct) -> None:
+        """
+        Random variable holding the packed value of a Struct (see Struct.to_var()).
+
+        The struct is randomized as one z3 BitVec of its total width, laid out as to_bits(). The z3 representation
+        of each field is an Extract view of the BitVec, so field constraints (and Object constraints on the fields)
+        apply to the packed value. Non-random fields are held at their value.
+
+        The value is not stored - it is read from and written to the fields of the struct.
+
+        :param struct: The Struct.
+        :type struct: Struct
+        """
+        self.name = "**deprecated**"
+        self.width = struct._width_
+        self._struct_ = struct
+        self._auto_random_ = True
+        self._fmt_ = hex
+        self._views_ = {}
+
+    @property
+    def value(self) -> int:
+        """
+        The packed value of the struct (see Struct.to_bits()).
+        """
+        return self._struct_.to_bits()
+
+    @value.setter
+    def value(self, v: Any) -> None:
+        self._struct_.from_bits(self._cast_(v))
+
+    @property
+    def _constraints_(self) -> dict[bool, dict[str, Callable[..., BoolRef]]]:
+        """
+        The word constraints of the struct, and the constraints of its fields applied to their views.
+        """
+        struct = self._struct_
+        self._apply_views_()
+
+        constraints = {hard: dict(c) for hard, c in struct._word_constraints_.items()}
+        for name, _, _, _ in struct._layout_:
+            field = getattr(struct, name)
+            if not field._auto_random_:
+                constraints[True][f"{name}._fixed_"] = _fixed_view_(field)
+                continue
+            for hard, c in field._constraints_.items():
+                for cname, fn in c.items():
+                    constraints[hard][f"{name}.{cname}"] = _field_view_(fn, field)
+        return constraints
+
+    def _apply_views_(self) -> None:
+        """
+        Make the z3 representation of each field an Extract view of the packed BitVec.
+
+        Views are re-created when the BitVec is re-created (see Object.release_randomization()) or a field is re-assigned.
+        """
+        rand = self._rand_
+        if self._views_.get(None) is not rand:
+            self._views_ = {None: rand}
+
+        for name, offset, width, _ in self._struct_._layout_:
+            field = getattr(self._struct_, name)
+            view = self._views_.get(name)
+            if view is None:
+                view = Extract(offset + width - 1, offset, rand)
+                self._views_[name] = view
+            if field.__dict__.get("_rand_") is not view:
+                field._rand_ = view
+                field._owner_ = (self, name)
+
+    def add_constraint(self, name: str, constraint: BoolRef, hard: bool = True, target: dict = None) -> None:
+        """
+        Add a constraint on the packed value (see Struct.add_constraint()).
+
+        :param name: The name of the constraint.
+        :type name: str
+        :param constraint: The constraint function, called with the packed BitVec.
+        :type constraint: function
+        :param hard: Flag to indicate if the constraint is hard or soft. Defaults to True.
+        :type hard: bool, optional
+        :param target: The target dictionary to store the constraint. Defaults to None.
+        :type target: dict, optional
+        """
+        super().add_constraint(name, constraint, hard, self._struct_._word_constraints_[hard] if target is None else target)
+
+    def remove_constraint(self, name: str) -> None:
+        """
+        Remove a constraint on the packed value.
+
+        :param name: The name of the constraint to remove.
+        :type name: str
+        """
+        self._struct_.remove_constraint(name)
+
+    def _signature_(self) -> tuple:
+        """
+        Get the structural signature of the variable - struct type, word constraints and field signatures.
+
+        :return: The signature.
+        :rtype: tuple
+        """
+        struct = self._struct_
+        words = tuple(
+            (hard, name, fn.__code__, fn.__defaults__) for hard, c in struct._word_constraints_.items() for name, fn in c.items()
+        )
+        fields = []
+        for name, _, _, _ in struct._layout_:
+            field = getattr(struct, name)
+            fields.append(field._signature_() if field._auto_random_ else (type(field), field.value))
+        return (type(self), type(struct), words, tuple(fields))
+
+    def _wrap_(self, result: Any) -> Logic:
+        """
+        Wrap the result of an operation in a Logic of the same width.
+
+        :param result: The result to be wrapped.
+        :type result: Any
+        :return: An instance of Logic with the result.
+        :rtype: Logic
+        """
+        return Logic(result, auto_random=False, fmt=self._fmt_, width=self.width)
+
+    def __copy__(self) -> StructVar:
+        """
+        Copy the variable - the packed variable of a copy of the struct.
+
+        :return: Copied StructVar.
+        :rtype: StructVar
+        """
+        return copy.copy(self._struct_).to_var()
+
 class Struct(metaclass=_StructMeta_):
 
+    def __init__(self) -> None:
+        """
+        Initialize the Struct instance.
+
+        Each field is a copy of the class default, so instances never share field Vars.
+        """
+        cls = type(self)
+        for name, _ in self._fields_:
+            default = getattr(cls, name, None)
+            if isinstance(default, Var):
+                setattr(self, name, copy.copy(default))
+
     def __copy__(self) -> Struct:
         """
         Create a shallow copy of the Struct instance.
@@ -39,6 +352,7 @@ class Struct(metaclass=_StructMeta_):
             obj = getattr(self, name)
             v = copy.copy(obj)
             setattr(new_struct, name, v)
+        self._copy_packed_(new_struct)
         return new_struct
 
     def __deepcopy__(self, memo) -> Struct:
@@ -54,6 +368,95 @@ class Struct(metaclass=_StructMeta_):
         memo[id(self)] = new_obj
         return new_obj
 
+    def _copy_packed_(self, new_struct: Struct) -> None:
+        """
+        Copy the packed randomization state (see set_packed_randomization()) to a copy of the struct.
+
+        :param new_struct: The copy.
+        :type new_struct: Struct
+        """
+        constraints = self.__dict__.get("_word_constraints_")
+        if constraints is not None:
+            new_struct._word_constraints_ = {hard: c.copy() for hard, c in constraints.items()}
+
+    def _is_packed_(self) -> bool:
+        """
+        Check if the struct is randomized as one packed variable.
+
+        :return: True if packed randomization is enabled.
+        :rtype: bool
+        """
+        return "_word_constraints_" in self.__dict__
+
+    def set_packed_randomization(self, enable: bool = True) -> None:
+        """
+        Randomize the struct as one z3 BitVec of its total width (see StructVar), rather than a variable per field.
+
+        Field constraints apply to Extract views of the BitVec, and constraints on the whole packed value can be added
+        with add_constraint(). Enabled automatically by add_constraint() and to_var().
+
+        :param enable: True to randomize the struct as one packed variable.
+        :type enable: bool
+        :raises TypeError: If a field has no bit-vector default value.
+        """
+        if enable:
+            self._check_layout_()
+            if not self._is_packed_():
+                self._word_constraints_ = {True: {}, False: {}}
+            return
+
+        self.__dict__.pop("_word_constraints_", None)
+        var = self.__dict__.pop("_struct_var_", None)
+        if var is not None:
+            for name, _ in self._fields_:
+                field = getattr(self, name)
+                if field._owner_ is not None and field._owner_[0] is var:
+                    field.__dict__.pop("_rand_", None)
+                    field.__dict__.pop("_owner_", None)
+
+    def add_constraint(self, name: str, constraint: Callable[..., BoolRef], hard: bool = True) -> None:
+        """
+        Add a constraint on the packed value of the struct, enabling packed randomization (see set_packed_randomization()).
+
+        :param name: The name of the constraint.
+        :type name: str
+        :param constraint: The constraint function, called with the packed z3 BitVec (laid out as to_bits()).
+        :type constraint: Callable[..., BoolRef]
+        :param hard: Flag to indicate if the constraint is hard or soft. Defaults to True.
+        :type hard: bool, optional
+        :raises TypeError: If a field has no bit-vector default value.
+        """
+        self.set_packed_randomization()
+        self._word_constraints_[hard][name] = constraint
+
+    def remove_constraint(self, name: str) -> None:
+        """
+        Remove a constraint on the packed value of the struct.
+
+        :param name: The name of the constraint to remove.
+        :type name: str
+        """
+        for constraints in self.__dict__.get("_word_constraints_", {}).values():
+            constraints.pop(name, None)
+
+    def to_var(self) -> StructVar:
+        """
+        Get the packed random variable of the struct, enabling packed randomization (see set_packed_randomization()).
+
+        The variable can be used in Object constraints on the whole packed value, alongside other variables.
+
+        :return: The packed variable.
+        :rtype: StructVar
+        :raises TypeError: If a field has no bit-vector default value.
+        """
+        self.set_packed_randomization()
+        var = self.__dict__.get("_struct_var_")
+        if var is None:
+            var = StructVar(self)
+            self._struct_var_ = var
+        var._apply_views_()
+        return var
+
     def __iter__(self) -> Iterator[Any]:
         """
         Iterate over the fields of the Struct instance.
@@ -91,6 +494,9 @@ class Struct(metaclass=_StructMeta_):
 
         :return: An integer representing the combined bit value of the Struct.
         """
+        if self._pack_ is not None:
+            return self._pack_()
+
         value = 0
         offset = 0
         for name, _ in reversed(self._fields_):
@@ -99,24 +505,46 @@ class Struct(metaclass=_StructMeta_):
             offset += v.width
         return int(value)
 
+    def bind(self, hdl: HierarchyObject) -> StructBinding:
+        """
+        Bind the Struct instance to an HDL handle, resolving the handle (and any field sub-handles) once.
+
+        Use the binding for repeated transfers, e.g. every clock in a monitor.
+
+        :param hdl: The HDL handle - a packed vector, or a hierarchy with a sub-handle per field.
+        :type hdl: HierarchyObject
+        :return: The binding.
+        :rtype: StructBinding
+        """
+        return StructBinding(self, hdl)
+
+    def _binding_(self, hdl: HierarchyObject) -> StructBinding:
+        """
+        Get the binding to an HDL handle, re-using the binding of the last call with the same handle.
+
+        :param hdl: The HDL handle.
+        :type hdl: HierarchyObject
+        :return: The binding.
+        :rtype: StructBinding
+        """
+        binding = self.__dict__.get("_last_binding_")
+        if binding is None or binding.hdl is not hdl:
+            binding = StructBinding(self, hdl)
+            self._last_binding_ = binding
+        return binding
+
     def to_hdl(self, hdl : HierarchyObject) -> None:
         """
         Populate the Struct instance from a HierarchyObject.
         This method assigns each field's value based on the corresponding
         attribute in the HierarchyObject.
 
+        The handle is resolved on the first call with each handle (see bind()).
+
         :param hdl: A HierarchyObject from which to populate the Struct fields.
         :return: None
         """
-
-        if hasattr(hdl, "value"):
-            hdl.value = self.to_bits()
-        else:
-            for name, _ in self._fields_:
-                s = getattr(self, name)
-                h = getattr(hdl, name, None)
-                if h is not None:
-                    h.value = s.value
+        self._binding_(hdl).to_hdl()
 
     def from_bits(self, value : int) -> None:
         """
@@ -128,6 +556,10 @@ class Struct(metaclass=_StructMeta_):
 
         :return: None
         """
+        if self._unpack_ is not None:
+            self._unpack_(value)
+            return
+
         _value = int(value)
         for name, _ in reversed(self._fields_):
             v = getattr(self, name)
@@ -140,16 +572,174 @@ class Struct(metaclass=_StructMeta_):
         This method assigns each field's value based on the corresponding
         attribute in the HierarchyObject.
 
+        The handle is resolved on the first call with each handle (see bind()).
+
         :param hdl: A HierarchyObject from which to populate the Struct fields.
         :return: None
         """
-        if hasattr(hdl, "value"):
-            self.from_bits(hdl.value)
-        else:
-            for name, _ in self._fields_:
-                s = getattr(self, name)
-                h = getattr(hdl, name, None)
-                if h is not None:
-                    s.value = h.value
+        self._binding_(hdl).from_hdl()
+
+    @classmethod
+    def _check_layout_(cls) -> None:
+        """
+        Check the Struct class has a compiled layout, as required by the bulk conversions.
+
+        :raises TypeError: If a field has no bit-vector default value.
+        """
+        if cls._layout_ is None:
+            raise TypeError(f"{cls.__name__} fields must all have bit-vector default values (Logic, Uint*, Int*, Bool, Enum)")
+
+    @classmethod
+    def to_numpy(cls, structs: Iterable[Struct]) -> np.ndarray:
+        """
+        Convert Struct instances to a NumPy structured array, with one named column per field.
+
+        Fields of up to 64 bits are stored in the smallest NumPy integer type, wider fields as Python ints.
+
+        :param structs: The Struct instances.
+        :type structs: Iterable[Struct]
+        :return: The structured array.
+        :rtype: np.ndarray
+        :raises TypeError: If a field has no bit-vector default value.
+        """
+        cls._check_layout_()
+        row = cls._row_
+        return np.array([row(s) for s in structs], dtype=cls._dtype_)
+
+    @classmethod
+    def from_numpy(cls, array: np.ndarray) -> list[Struct]:
+        """
+        Create Struct instances from a NumPy structured array (see to_numpy()).
+
+        :param array: The structured array, with a column per field.
+        :type array: np.ndarray
+        :return: The Struct instances.
+        :rtype: list[Struct]
+        :raises TypeError: If a field has no bit-vector default value.
+        """
+        cls._check_layout_()
+        fields = [(name, getattr(cls, name)) for name, _, _, _ in cls._layout_]
+        columns = [array[name].tolist() for name, _ in fields]
+
+        structs = []
+        for values in zip(*columns, strict=True):
+            s = cls()
+            for (name, _), value in zip(fields, values, strict=True):
+                getattr(s, name).value = value
+            structs.append(s)
+        return structs
+
+    @classmethod
+    def pack_numpy(cls, array: np.ndarray, byteorder: str = "little") -> bytes:
+        """
+        Pack a NumPy structured array (see to_numpy()) into a buffer of packed structs.
+
+        Each struct takes the bytes needed for its width (see to_bits()), in the given byte order.
+
+        :param array: The structured array, with a column per field.
+        :type array: np.ndarray
+        :param byteorder: Byte order of each struct - "little" or "big".
+        :type byteorder: str
+        :return: The packed structs.
+        :rtype: bytes
+        :raises TypeError: If a field has no bit-vector default value.
+        """
+        cls._check_layout_()
+        nbytes = max(1, (cls._width_ + 7) // 8)
+
+        if cls._width_ > 64:
+            packed = [0] * len(array)
+            for name, offset, width, _ in cls._layout_:
+                mask = (1 << width) - 1
+                packed = [p | ((int(v) & mask) << offset) for p, v in zip(packed, array[name].tolist(), strict=True)]
+            return b"".join(p.to_bytes(nbytes, byteorder) for p in packed)
+
+        packed = np.zeros(len(array), dtype=np.uint64)
+        for name, offset, width, _ in cls._layout_:
+            column = array[name].astype(np.uint64)
+            packed |= (column & np.uint64((1 << width) - 1)) << np.uint64(offset)
+
+        raw = packed.astype("<u8").view(np.uint8).reshape(-1, 8)[:, :nbytes]
+        if byteorder == "big":
+            raw = raw[:, ::-1]
+        return raw.tobytes()
+
+    @classmethod
+    def unpack_numpy(cls, buffer: bytes, byteorder: str = "little") -> np.ndarray:
+        """
+        Unpack a buffer of packed structs (see pack_numpy()) into a NumPy structured array.
+
+        :param buffer: The packed structs (any object supporting the buffer protocol).
+        :type buffer: bytes
+        :param byteorder: Byte order of each struct - "little" or "big".
+        :type byteorder: str
+        :return: The structured array.
+        :rtype: np.ndarray
+        :raises TypeError: If a field has no bit-vector default value.
+        :raises ValueError: If the buffer isn't a whole number of structs.
+        """
+        cls._check_layout_()
+        nbytes = max(1, (cls._width_ + 7) // 8)
+        raw = np.frombuffer(buffer, dtype=np.uint8)
+        if len(raw) % nbytes:
+            raise ValueError(f"Buffer of {len(raw)} bytes is not a whole number of {nbytes} byte {cls.__name__} structs")
+        raw = raw.reshape(-1, nbytes)
+        array = np.empty(len(raw), dtype=cls._dtype_)
+
+        if cls._width_ > 64:
+            packed = [int.from_bytes(r, byteorder) for r in raw.tolist()]
+            for name, offset, width, signed in cls._layout_:
+                mask = (1 << width) - 1
+                column = [(p >> offset) & mask for p in packed]
+                if signed:
+                    column = [v - (1 << width) if v >> (width - 1) else v for v in column]
+                array[name] = column
+            return array
+
+        if byteorder == "big":
+            raw = raw[:, ::-1]
+        padded = np.zeros((len(raw), 8), dtype=np.uint8)
+        padded[:, :nbytes] = raw
+        packed = padded.view("<u8").ravel().astype(np.uint64)
+
+        for name, offset, width, signed in cls._layout_:
+            column = (packed >> np.uint64(offset)) & np.uint64((1 << width) - 1)
+            if signed and width:
+                # Sign extend - wraps modulo 2 ** 64, so the int64 view is the signed value
+                sign = np.uint64(1 << (width - 1))
+                column = ((column ^ sign) - sign).view(np.int64)
+            array[name] = column
+        return array
+
+    @classmethod
+    def pack(cls, structs: Iterable[Struct], byteorder: str = "little") -> bytes:
+        """
+        Pack Struct instances into a buffer of packed structs (see pack_numpy()).
+
+        :param structs: The Struct instances.
+        :type structs: Iterable[Struct]
+        :param byteorder: Byte order of each struct - "little" or "big".
+        :type byteorder: str
+        :return: The packed structs.
+        :rtype: bytes
+        :raises TypeError: If a field has no bit-vector default value.
+        """
+        return cls.pack_numpy(cls.to_numpy(structs), byteorder)
+
+    @classmethod
+    def unpack(cls, buffer: bytes, byteorder: str = "little") -> list[Struct]:
+        """
+        Unpack a buffer of packed structs into Struct instances (see unpack_numpy()).
+
+        :param buffer: The packed structs (any object supporting the buffer protocol).
+        :type buffer: bytes
+        :param byteorder: Byte order of each struct - "little" or "big".
+        :type byteorder: str
+        :return: The Struct instances.
+        :rtype: list[Struct]
+        :raises TypeError: If a field has no bit-vector default value.
+        :raises ValueError: If the buffer isn't a whole number of structs.
+        """
+        return cls.from_numpy(cls.unpack_numpy(buffer, byteorder))
 
-__all__ = ["Struct"]
+__all__ = ["Struct", "StructBinding", "StructVar"]
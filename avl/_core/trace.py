@@ -11,6 +11,7 @@ import pandas as pd
 from .component import Component
 from .factory import Factory
 from .list import List
+from .var_array import VarArray
 
 
 class Trace(Component):
@@ -101,6 +102,9 @@ class Trace(Component):
             for col in self.df.columns:
                 if hasattr(item, col):
                     row[col] = getattr(item, col)
+                    # Snapshot arrays - the item may be re-randomized before the flush
+                    if isinstance(row[col], VarArray):
+                        row[col] = row[col].to_list()
                 else:
                     row[col] = None
 
@@ -8,22 +8,81 @@ from __future__ import annotations
 import random
 import warnings
 import weakref
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
 from typing import Any
 
-from z3 import BitVecNumRef, BoolRef, IntNumRef, Optimize, RatNumRef, sat
-
+from z3 import BitVecNumRef, BoolRef, IntNumRef, Optimize, RatNumRef, is_bv, sat
+
+from .native import _compile_native_
+
+# Live z3 solvers (see _track_solver_)
+_solvers_ = weakref.WeakSet()
+
+def _track_solver_(solver: Any) -> Any:
+    """
+    Track a z3 solver, so live solvers can be counted.
+
+    :param solver: The solver.
+    :type solver: Any
+    :return: The solver.
+    :rtype: Any
+    """
+    _solvers_.add(solver)
+    return solver
+
+def _root_var_(var: Var) -> Var:
+    """
+    Get the Var randomized in place of a variable - the owner of a field view (see StructVar), otherwise the variable.
+
+    :param var: The variable.
+    :type var: Var
+    :return: The randomized Var.
+    :rtype: Var
+    """
+    return var if var._owner_ is None else var._owner_[0]
+
+def _arg_vars_(args: list[Any]) -> Iterator[Var]:
+    """
+    Get the randomized Vars of constraint arguments, including the elements of list and tuple arguments.
+
+    :param args: The constraint arguments.
+    :type args: list[Any]
+    :return: The randomized Vars (see _root_var_()).
+    :rtype: Iterator[Var]
+    """
+    for a in args:
+        if isinstance(a, Var):
+            yield _root_var_(a)
+        elif isinstance(a, list | tuple):
+            yield from _arg_vars_(a)
 
 class Var:
     _deprecated_name_warning_ = True
+    _range_constraints_ = ()
+    # (Var, field name) when this Var is a field view of another random Var (see StructVar)
+    _owner_ = None
     _count_ = 0
+    _free_ = []
     _lookup_ = weakref.WeakValueDictionary()
 
     @staticmethod
     def _register_(cls : Var) -> None:
-        Var._lookup_[Var._count_] = cls
-        cls._idx_ = Var._count_
-        Var._count_ += 1
+        # Recycle the indices (and so the z3 symbol names) of released Vars
+        # z3 never frees symbol names, so fresh names would grow its symbol table forever
+        if Var._free_:
+            idx = Var._free_.pop()
+        else:
+            idx = Var._count_
+            Var._count_ += 1
+        Var._lookup_[idx] = cls
+        cls._idx_ = idx
+        weakref.finalize(cls, Var._free_.append, idx)
+
+    def _release_(self) -> None:
+        """
+        Release the z3 representation of the variable. It is re-created on next use.
+        """
+        self.__dict__.pop("_rand_", None)
 
     def __copy__(self) -> Var:
         """
@@ -32,11 +91,19 @@ class Var:
         :return: Copied Var.
         :rtype: Var
         """
-        new_obj = self.__class__(self.value, auto_random=self._auto_random_, fmt=self._fmt_)
+        cls = self.__class__
+        new_obj = cls.__new__(cls)
+        new_obj.__dict__.update(self.__dict__)
+
+        # The copy gets its own lookup index and z3 representation on first use, and is not a view
+        new_obj.__dict__.pop("_idx_", None)
+        new_obj.__dict__.pop("_rand_", None)
+        new_obj.__dict__.pop("_owner_", None)
+
         new_obj._constraints_ = {
             k: v.copy() for k, v in self._constraints_.items()
         }
-        return  new_obj
+        return new_obj
 
     def __deepcopy__(self, memo) -> Var:
         """
@@ -69,20 +136,35 @@ class Var:
             )
             self.__class__._deprecated_name_warning_ = False
 
-        # Lookup
-        Var._register_(self)
-
         self.name = "**deprecated**"
         self.value = args[-1]
         self._auto_random_ = auto_random
         self._fmt_ = fmt
 
         # Randomness and constraints
-        self._rand_ = None
+        # The lookup index (_idx_) and z3 representation (_rand_) are created on first use - see __getattr__
         self._constraints_ = {True : {}, False: {}}
 
-        if self._auto_random_:
-            self._rand_ = self._z3_()
+    def __getattr__(self, name: str) -> Any:
+        """
+        Create the lookup index and z3 representation of the variable on first use.
+
+        Most Vars (e.g. arithmetic results) are never randomized or constrained, so never pay for
+        registration or a z3 symbol. Once created, both are plain instance attributes.
+
+        :param name: The attribute name.
+        :type name: str
+        :return: The attribute value.
+        :rtype: Any
+        :raises AttributeError: If the attribute doesn't exist.
+        """
+        if name == "_idx_":
+            Var._register_(self)
+            return self._idx_
+        if name == "_rand_":
+            self._rand_ = self._z3_() if self.__dict__.get("_auto_random_", False) else None
+            return self._rand_
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
 
     @property
     def value(self):
@@ -325,6 +407,36 @@ class Var:
         if name in self._constraints_[False]:
             del self._constraints_[False][name]
 
+    def _has_constraints_(self) -> bool:
+        """
+        Check if any user constraints are applied to the variable.
+
+        Constraints listed in _range_constraints_ only restate the range of the type
+        and are ignored, as native sampling from _range_() already honours them.
+
+        :return: True if the variable has any hard or soft user constraints.
+        :rtype: bool
+        """
+        for constraints in self._constraints_.values():
+            for name in constraints:
+                if name not in self._range_constraints_:
+                    return True
+        return False
+
+    def _signature_(self) -> tuple:
+        """
+        Get the structural signature of the variable - type, range and constraint functions.
+
+        Variables with the same signature can share compiled constraints.
+
+        :return: The signature.
+        :rtype: tuple
+        """
+        constraints = tuple(
+            (hard, name, fn.__code__, fn.__defaults__) for hard, c in self._constraints_.items() for name, fn in c.items()
+        )
+        return (type(self), self._range_(), constraints)
+
     def pre_randomize(self) -> None:
         """
         Pre-randomization function.
@@ -372,7 +484,7 @@ class Var:
         """
 
         def new_solver():
-            solver = Optimize()
+            solver = _track_solver_(Optimize())
             self._apply_constraints(solver)
 
             return solver
@@ -382,7 +494,7 @@ class Var:
                 model = solver.model()
                 val = model.eval(obj.value() if hasattr(obj, "value") else obj, model_completion=True)
                 if isinstance(val, RatNumRef):
-                    cast_value = self._cast_(val.as_decimal(20).rstrip("?"))
+                    cast_value = self._cast_(val.numerator_as_long() / val.denominator_as_long())
                 elif isinstance(val, (IntNumRef | BitVecNumRef)):
                     cast_value = self._cast_(val.as_long())
                 else:
@@ -394,6 +506,12 @@ class Var:
         # User defined pre-randomization function
         self.pre_randomize()
 
+        # Unconstrained variables are sampled natively - no need for the solver
+        if hard is None and soft is None and not self._has_constraints_():
+            self.value = self._random_value_()
+            self.post_randomize()
+            return
+
         # Constraints
         constraints = self._constraints_.copy()
 
@@ -408,6 +526,29 @@ class Var:
                 self.add_constraint(f"_c_soft_{idx}", c, hard=False, target=constraints[False])
                 idx += 1
 
+        # Simple constraints are sampled natively - no need for the solver
+        if not self._constraints_[False]:
+            plan = _compile_native_([c(self._rand_) for c in self._constraints_[True].values()], [self], [self._rand_])
+            values = plan.sample() if plan is not None else None
+            if values is not None:
+                self.value = self._cast_(values[0])
+                self.post_randomize()
+                return
+
+        # Seeded bit-vector solver - no range calculation needed
+        # Imported here as the solver module depends on Var
+        from . import solver as _solver_
+
+        if _solver_.RANDOMIZE_ENGINE == "solver" and not self._constraints_[False] and is_bv(self._rand_):
+            solver = _solver_._seeded_solver_([c(self._rand_) for c in self._constraints_[True].values()])
+            # Move away from the previous value when possible
+            if not (random.choice([True, False]) and solver.check(self._rand_ != self.value) == sat):
+                if solver.check() != sat:
+                    raise Exception("Solver failed to randomize")
+            self.value = self._cast_(solver.model().eval(self._rand_, model_completion=True).as_long())
+            self.post_randomize()
+            return
+
         # Calculate the range of the random variable
         max_solver = new_solver()
         obj_max = max_solver.maximize(self._rand_)
@@ -0,0 +1,496 @@
+# Copyright 2024 Apheleia
+#
+# Description:
+# Apheleia Verification Library Variable Array
+
+from __future__ import annotations
+
+import random
+from collections.abc import Callable, Iterator
+from typing import Any
+
+import numpy as np
+from z3 import BitVec, BoolRef, Optimize, sat
+
+from .logic import Logic
+from .native import _compile_native_
+from .solver import _seeded_solver_
+from .var import Var, _track_solver_
+
+
+def _storage_(width: int, signed: bool) -> type:
+    """
+    Get the smallest NumPy type holding values of the given width.
+
+    :param width: The width in bits.
+    :type width: int
+    :param signed: True for signed values.
+    :type signed: bool
+    :return: The NumPy type (object for widths over 64 bits).
+    :rtype: type
+    """
+    for bits, s, u in ((8, np.int8, np.uint8), (16, np.int16, np.uint16), (32, np.int32, np.uint32), (64, np.int64, np.uint64)):
+        if width <= bits:
+            return s if signed else u
+    return object
+
+def _sample_intervals_(ivs: list[tuple[int, int]], n: int) -> np.ndarray:
+    """
+    Sample n values uniformly from a set of disjoint intervals of raw (unsigned, < 2 ** 64) values.
+
+    :param ivs: The intervals, as inclusive (start, end) pairs.
+    :type ivs: list[tuple[int, int]]
+    :param n: Number of values.
+    :type n: int
+    :return: The values.
+    :rtype: np.ndarray
+    """
+    starts = np.array([start for start, _ in ivs], dtype=np.uint64)
+    sizes = [end - start + 1 for start, end in ivs]
+    total = sum(sizes)
+    if total == 1 << 64:
+        return np.random.randint(0, 1 << 64, size=n, dtype=np.uint64)
+
+    offsets = np.random.randint(0, total, size=n, dtype=np.uint64)
+    if len(ivs) == 1:
+        return starts[0] + offsets
+
+    ends = np.cumsum(np.array(sizes, dtype=np.uint64))
+    i = np.searchsorted(ends, offsets, side="right")
+    return starts[i] + offsets - (ends[i] - np.array(sizes, dtype=np.uint64)[i])
+
+class VarArray:
+    def __init__(
+        self,
+        dtype: type[Logic],
+        n: int,
+        value: Any = 0,
+        width: int = None,
+        auto_random: bool = True,
+        fmt: Callable[..., str] = None,
+    ) -> None:
+        """
+        Initialize an array of n random variables, held in a NumPy array rather than as individual Vars.
+
+        :param dtype: The type of each element - a bit-vector Var type (Logic, Uint*, Int*, Bool).
+        :type dtype: type[Logic]
+        :param n: Number of elements.
+        :type n: int
+        :param value: Initial value of the elements - a scalar or a sequence of n values. Defaults to 0.
+        :type value: Any, optional
+        :param width: Width of each element, for types with a width argument (e.g. Logic). Defaults to the type default.
+        :type width: int, optional
+        :param auto_random: Flag to enable or disable automatic randomness. Defaults to True.
+        :type auto_random: bool, optional
+        :param fmt: Format of each element. Defaults to the format of the type.
+        :type fmt: Callable[..., str], optional
+        :raises TypeError: If the type isn't a bit-vector Var type.
+        :raises ValueError: If n is negative.
+        """
+        if not (isinstance(dtype, type) and issubclass(dtype, Logic)):
+            raise TypeError("VarArray elements must be a bit-vector Var type (Logic, Uint*, Int*, Bool)")
+        if n < 0:
+            raise ValueError("VarArray size must not be negative")
+
+        self._proto_ = dtype(0, auto_random=False) if width is None else dtype(0, auto_random=False, width=width)
+        self.width = self._proto_.width
+        self._signed_ = self._proto_.get_min() < 0
+        self._dtype_ = _storage_(self.width, self._signed_)
+        self._auto_random_ = auto_random
+        self._fmt_ = fmt if fmt is not None else self._proto_._fmt_
+
+        self._values_ = np.zeros(n, dtype=self._dtype_)
+        self.values = value
+
+        # Randomness and constraints
+        # Array constraints are called with the list of z3 elements, element constraints with each element (and index)
+        self._rand_ = None
+        self._constraints_ = {True: {}, False: {}}
+        self._element_constraints_ = {True: {}, False: {}}
+
+    def __copy__(self) -> VarArray:
+        """
+        Copy the VarArray - always make a copy of the values to ensure randomness is preserved.
+
+        :return: Copied VarArray.
+        :rtype: VarArray
+        """
+        cls = self.__class__
+        new_obj = cls.__new__(cls)
+        new_obj.__dict__.update(self.__dict__)
+        new_obj._values_ = self._values_.copy()
+        new_obj._rand_ = None
+        new_obj._constraints_ = {k: v.copy() for k, v in self._constraints_.items()}
+        new_obj._element_constraints_ = {k: v.copy() for k, v in self._element_constraints_.items()}
+        new_obj.__dict__.pop("_idx_", None)
+        return new_obj
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> VarArray:
+        """
+        Deep copy the VarArray.
+
+        :param memo: Dictionary to keep track of already copied objects.
+        :type memo: dict
+        :return: Deep copied VarArray.
+        :rtype: VarArray
+        """
+        new_obj = self.__copy__()
+        memo[id(self)] = new_obj
+        return new_obj
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        The values of the elements - the underlying NumPy array, not a copy.
+        """
+        return self._values_
+
+    @values.setter
+    def values(self, v: Any) -> None:
+        """
+        Assign the values of the elements, cast to the element type.
+
+        :param v: A scalar, or a sequence of n values.
+        :type v: Any
+        """
+        self._values_[:] = self._cast_(v)
+
+    # Alias, so VarArrays can be handled like Vars (e.g. by RandomizationPool)
+    value = values
+
+    def _cast_(self, v: Any) -> Any:
+        """
+        Cast values to the element type, wrapping to the width of the element.
+
+        :param v: A scalar or a sequence of values.
+        :type v: Any
+        :return: The cast values.
+        :rtype: Any
+        """
+        if isinstance(v, VarArray):
+            v = v._values_
+
+        if self._dtype_ is object:
+            if np.ndim(v) == 0:
+                return self._proto_._cast_(v)
+            return np.array([self._proto_._cast_(x) for x in v], dtype=object)
+
+        raw = np.asarray(v).astype(np.int64 if self._signed_ else np.uint64, copy=False).view(np.uint64)
+        if self.width < 64:
+            raw = raw & np.uint64((1 << self.width) - 1)
+        return self._from_raw_(raw)
+
+    def _from_raw_(self, raw: np.ndarray) -> np.ndarray:
+        """
+        Convert raw (unsigned bit-pattern) values to the element type.
+
+        :param raw: The raw values.
+        :type raw: np.ndarray
+        :return: The values.
+        :rtype: np.ndarray
+        """
+        if self._dtype_ is object:
+            return np.array([self._proto_._cast_(int(x)) for x in raw], dtype=object)
+
+        raw = np.asarray(raw, dtype=np.uint64)
+        if not self._signed_:
+            return raw.astype(self._dtype_)
+        values = raw.view(np.int64)
+        if self.width < 64:
+            values = values - ((values >> (self.width - 1)) << self.width)
+        return values.astype(self._dtype_)
+
+    def __len__(self) -> int:
+        return len(self._values_)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._values_.tolist())
+
+    def __getitem__(self, i: int | slice) -> Any:
+        """
+        Get an element as a Python int, or a slice as a NumPy view.
+
+        :param i: The index or slice.
+        :type i: int | slice
+        :return: The value(s).
+        :rtype: Any
+        """
+        v = self._values_[i]
+        return v if isinstance(v, np.ndarray) else int(v)
+
+    def __setitem__(self, i: int | slice, v: Any) -> None:
+        self._values_[i] = self._cast_(v)
+
+    def __eq__(self, other: Any) -> bool:
+        other = other._values_ if isinstance(other, VarArray) else other
+        return bool(np.array_equal(self._values_, other))
+
+    def __ne__(self, other: Any) -> bool:
+        return not self.__eq__(other)
+
+    # Mutable container - not hashable
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"[{', '.join(self._fmt_(v) for v in self._values_.tolist())}]"
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    def compare(self, rhs: Any) -> bool:
+        """
+        Compare the values with another VarArray (or sequence of values).
+
+        :param rhs: The VarArray to compare with.
+        :type rhs: Any
+        :return: True if all values match.
+        :rtype: bool
+        """
+        return self.__eq__(rhs)
+
+    def to_list(self) -> list[int]:
+        """
+        Get the values as a list of Python ints.
+
+        :return: The values.
+        :rtype: list[int]
+        """
+        return self._values_.tolist()
+
+    def get_min(self) -> int:
+        """
+        Get the minimum value of an element.
+
+        :return: The minimum value.
+        :rtype: int
+        """
+        return self._proto_.get_min()
+
+    def get_max(self) -> int:
+        """
+        Get the maximum value of an element.
+
+        :return: The maximum value.
+        :rtype: int
+        """
+        return self._proto_.get_max()
+
+    def add_constraint(self, name: str, constraint: Callable[[list[Any]], BoolRef], hard: bool = True) -> None:
+        """
+        Add a constraint on the whole array.
+
+        The constraint is called with the list of z3 elements, e.g. lambda a: Sum(a) < 100 or lambda a: Distinct(a).
+
+        :param name: The name of the constraint.
+        :type name: str
+        :param constraint: The constraint function.
+        :type constraint: Callable[[list[Any]], BoolRef]
+        :param hard: Flag to indicate if the constraint is hard or soft. Defaults to True.
+        :type hard: bool, optional
+        :raises ValueError: If the array isn't random.
+        """
+        if not self._auto_random_:
+            raise ValueError("Cannot add constraints to non-random variables")
+        self._constraints_[hard][name] = constraint
+
+    def add_element_constraint(self, name: str, constraint: Callable[..., BoolRef], hard: bool = True) -> None:
+        """
+        Add a constraint applied to every element.
+
+        The constraint is called with each z3 element, e.g. lambda x: x < 100, or with the element and its index
+        if it takes two arguments without defaults, e.g. lambda x, i: x == i.
+
+        :param name: The name of the constraint.
+        :type name: str
+        :param constraint: The constraint function.
+        :type constraint: Callable[..., BoolRef]
+        :param hard: Flag to indicate if the constraint is hard or soft. Defaults to True.
+        :type hard: bool, optional
+        :raises ValueError: If the array isn't random.
+        """
+        if not self._auto_random_:
+            raise ValueError("Cannot add constraints to non-random variables")
+        self._element_constraints_[hard][name] = constraint
+
+    def remove_constraint(self, name: str) -> None:
+        """
+        Remove an array or element constraint.
+
+        :param name: The name of the constraint to remove.
+        :type name: str
+        :raises ValueError: If the array isn't random.
+        """
+        if not self._auto_random_:
+            raise ValueError("Cannot remove constraints from non-random variables")
+
+        for constraints in (self._constraints_, self._element_constraints_):
+            for c in constraints.values():
+                c.pop(name, None)
+
+    def _has_constraints_(self) -> bool:
+        """
+        Check if any constraints are applied to the array.
+
+        :return: True if the array has any array or element constraints.
+        :rtype: bool
+        """
+        return any(self._constraints_.values()) or any(self._element_constraints_.values())
+
+    def _indexed_(self, fn: Callable[..., BoolRef]) -> bool:
+        """
+        Check if an element constraint takes the index of the element.
+
+        :param fn: The constraint function.
+        :type fn: Callable[..., BoolRef]
+        :return: True if called with (element, index).
+        :rtype: bool
+        """
+        return fn.__code__.co_argcount - len(fn.__defaults__ or ()) >= 2
+
+    def _symbols_(self) -> list[Any]:
+        """
+        Get the z3 representation of the elements, created on first use.
+
+        :return: The z3 elements.
+        :rtype: list[Any]
+        """
+        if self._rand_ is None:
+            self._rand_ = [BitVec(f"{self._name_()}[{i}]", self.width) for i in range(len(self))]
+        return self._rand_
+
+    def _name_(self) -> str:
+        """
+        Get the z3 name of the array - its lookup index, shared with (and recycled like) Vars.
+
+        :return: The name.
+        :rtype: str
+        """
+        if "_idx_" not in self.__dict__:
+            Var._register_(self)
+        return str(self._idx_)
+
+    def _release_(self) -> None:
+        """
+        Release the z3 representation of the elements. It is re-created on next use.
+        """
+        self._rand_ = None
+
+    def _elements_(self, hard: bool, symbols: list[Any]) -> list[BoolRef]:
+        """
+        Evaluate the element constraints for each element.
+
+        :param hard: Hard or soft constraints.
+        :type hard: bool
+        :param symbols: The z3 elements.
+        :type symbols: list[Any]
+        :return: The constraints.
+        :rtype: list[BoolRef]
+        """
+        exprs = []
+        for fn in self._element_constraints_[hard].values():
+            if self._indexed_(fn):
+                exprs.extend(fn(s, i) for i, s in enumerate(symbols))
+            else:
+                exprs.extend(fn(s) for s in symbols)
+        return exprs
+
+    def pre_randomize(self) -> None:
+        """
+        Pre-randomization function.
+        """
+        pass
+
+    def post_randomize(self) -> None:
+        """
+        Post-randomization function.
+        """
+        pass
+
+    def randomize(self) -> None:
+        """
+        Randomize all elements as one unit.
+
+        - Unconstrained arrays are sampled in a single vectorized draw.
+        - Arrays with only simple element constraints (e.g. ranges or sets, without the index) are sampled in a single
+          vectorized draw from the intervals allowed by the constraints.
+        - Otherwise the elements are sampled by the native solver where possible, or solved with z3.
+
+        :raises Exception: If the solver fails to randomize.
+        """
+        self.pre_randomize()
+
+        n = len(self)
+        if not self._has_constraints_():
+            if self._dtype_ is object:
+                lo, hi = self.get_min(), self.get_max()
+                self._values_[:] = [random.randint(lo, hi) for _ in range(n)]
+            else:
+                self._values_[:] = self._sample_uniform_(n)
+        elif not self._randomize_vectorized_():
+            self._randomize_solver_()
+
+        self.post_randomize()
+
+    def _sample_uniform_(self, n: int) -> np.ndarray:
+        """
+        Sample n values uniformly over the range of the element type.
+
+        :param n: Number of values.
+        :type n: int
+        :return: The values.
+        :rtype: np.ndarray
+        """
+        return self._from_raw_(_sample_intervals_([(0, (1 << self.width) - 1)], n))
+
+    def _randomize_vectorized_(self) -> bool:
+        """
+        Sample all elements in one draw, if only index-free hard element constraints apply.
+
+        :return: True if sampled.
+        :rtype: bool
+        """
+        if self._constraints_[True] or self._constraints_[False] or self._element_constraints_[False]:
+            return False
+        if self._dtype_ is object or any(self._indexed_(fn) for fn in self._element_constraints_[True].values()):
+            return False
+
+        x = BitVec(f"{self._name_()}[*]", self.width)
+        plan = _compile_native_(self._elements_(True, [x]), [self._proto_], [x])
+        if plan is None:
+            return False
+
+        self._values_[:] = self._from_raw_(_sample_intervals_(plan.sets[0], len(self)))
+        return True
+
+    def _randomize_solver_(self) -> None:
+        """
+        Randomize the elements with the native solver, or z3.
+
+        :raises Exception: If the solver fails to randomize.
+        """
+        symbols = self._symbols_()
+        hard = self._elements_(True, symbols)
+        hard.extend(c(symbols) for c in self._constraints_[True].values())
+        soft = self._elements_(False, symbols)
+        soft.extend(c(symbols) for c in self._constraints_[False].values())
+
+        if not soft:
+            plan = _compile_native_(hard, [self._proto_] * len(symbols), symbols)
+            values = plan.sample() if plan is not None else None
+            if values is not None:
+                self._values_[:] = self._from_raw_(np.array(values, dtype=object if self._dtype_ is object else np.uint64))
+                return
+            solver = _seeded_solver_(hard)
+        else:
+            solver = _track_solver_(Optimize())
+            solver.add(hard)
+            for expr in soft:
+                solver.add_soft(expr, weight=100)
+
+        if solver.check() != sat:
+            raise Exception("Failed to randomize")
+        model = solver.model()
+        values = [model.eval(s, model_completion=True).as_long() for s in symbols]
+        self._values_[:] = self._from_raw_(np.array(values, dtype=object if self._dtype_ is object else np.uint64))
+
+__all__ = ["VarArray"]
@@ -26,6 +26,10 @@ class example_env(avl.Env):
 
         assert self.a0.compare(self.a1, verbose=True)
 
+        # Digest comparison - no mismatch report
+        assert self.a0.compare(self.a1, digest=True)
+        assert self.a0.digest() == self.a1.digest()
+
 
 @cocotb.test
 async def test(dut):
@@ -54,3 +54,18 @@ async def test(dut):
     for i in range(2048):
         assert e.a[i] == i
     print(f"Time taken (Int32 + constraint): {end - start:.2f} seconds")
+
+    # The same as a VarArray - one numpy array rather than 2048 Vars
+    e.a = avl.VarArray(avl.Logic, 2048, width=32, fmt=hex)
+    start = time.time()
+    e.randomize()
+    end = time.time()
+    print(f"Time taken (VarArray logic32): {end - start:.4f} seconds")
+
+    e.a = avl.VarArray(avl.Int32, 2048)
+    e.a.add_element_constraint("c", lambda x, i: x == i)
+    start = time.time()
+    e.randomize()
+    end = time.time()
+    assert e.a.to_list() == list(range(2048))
+    print(f"Time taken (VarArray Int32 + constraint): {end - start:.2f} seconds")
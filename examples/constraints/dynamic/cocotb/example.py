@@ -6,6 +6,7 @@
 
 import avl
 import cocotb
+from z3 import ULT, And, URem
 
 
 class example_env(avl.Env):
@@ -18,6 +19,16 @@ class example_env(avl.Env):
         self.add_constraint("c_0", lambda x: x >= 10, self.a)
 
 
+class limit_env(avl.Env):
+    def __init__(self, name, parent):
+        super().__init__(name, parent)
+
+        # Constraint reading an attribute, which changes between randomizations
+        self.limit = 30
+        self.b = avl.Uint16(0)
+        self.add_constraint("c_0", lambda x: And(ULT(x, self.limit), URem(x, 3) == 0), self.b)
+
+
 @cocotb.test
 async def test(dut):
     e = example_env("env", None)
@@ -50,3 +61,16 @@ async def test(dut):
     for _ in range(100):
         e.a.randomize(hard=[lambda x: x == 13])
         assert e.a == 13
+
+    # Change an attribute read by a constraint - the new range is used
+    e = limit_env("limit_env", None)
+    for _ in range(10):
+        e.randomize()
+        assert e.b < 30
+    e.limit = 60000
+    values = []
+    for _ in range(50):
+        e.randomize()
+        assert e.b < 60000 and e.b % 3 == 0
+        values.append(int(e.b))
+    assert sum(v >= 30 for v in values) > 40
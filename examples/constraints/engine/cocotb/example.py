@@ -0,0 +1,119 @@
+# Copyright 2024 Apheleia
+#
+# Description:
+# Apheleia randomization engine example
+
+
+import time
+
+import avl
+import avl._core.solver
+import cocotb
+from z3 import And, If, Implies, Or
+
+
+class simple_env(avl.Env):
+    def __init__(self, name, parent):
+        super().__init__(name, parent)
+
+        self.a = avl.Logic(0, width=8, fmt=hex)
+        self.b = avl.Logic(0, width=8, fmt=hex)
+
+        self.add_constraint("c_0", lambda x: Or(x == 0, x == 100), self.a)
+        self.add_constraint("c_1", lambda x: And(x >= 5, x <= 100), self.b)
+        self.add_constraint("c_2", lambda x, y: Implies(x == 0, y == 10), self.a, self.b)
+
+    def check(self):
+        assert self.a == 0 or self.a == 100
+        assert self.b >= 5 and self.b <= 100
+        assert self.b == 10 if self.a == 0 else True
+
+    def key(self):
+        return (int(self.a), int(self.b))
+
+
+class dynamic_list_env(avl.Env):
+    def __init__(self, name, parent):
+        super().__init__(name, parent)
+
+        self.a = [avl.Int32(0) for i in range(8)]
+        self.size = avl.Int32(0)
+
+        self.add_constraint("size_c", lambda x: And(x > 0, x <= 8), self.size)
+        self.add_constraint("a0_c", lambda x: And(x >= 0, x <= 100), self.a[0])
+        for i in range(1, len(self.a)):
+            self.add_constraint(
+                f"a{i}_c",
+                lambda x, y, z, idx=i: If(idx < z, x == y + 1, x == 0),
+                self.a[i],
+                self.a[i - 1],
+                self.size
+            )
+
+    def check(self):
+        assert self.size > 0 and self.size <= 8
+        assert self.a[0] >= 0 and self.a[0] <= 100
+        for i in range(1, int(self.size)):
+            assert self.a[i] == self.a[i - 1] + 1
+
+    def key(self):
+        return (int(self.size), *[int(v) for v in self.a])
+
+
+class list_env(avl.Env):
+    def __init__(self, name, parent):
+        super().__init__(name, parent)
+
+        self.a = [avl.Uint16(0) for i in range(64)]
+        for i in range(len(self.a)):
+            self.a[i].add_constraint("c", lambda x: And(x >= 16, x <= 1024))
+        for i in range(1, len(self.a)):
+            self.add_constraint(f"c_{i}", lambda x, y: x != y, self.a[i], self.a[i - 1])
+
+    def check(self):
+        for i in range(len(self.a)):
+            assert self.a[i] >= 16 and self.a[i] <= 1024
+            assert i == 0 or self.a[i] != self.a[i - 1]
+
+    def key(self):
+        return tuple(int(v) for v in self.a)
+
+
+@cocotb.test
+async def test(dut):
+    n = 20
+    results = []
+    for cls in [simple_env, dynamic_list_env, list_env]:
+        row = [cls.__name__]
+        for engine in ["optimize", "solver"]:
+            e = cls("env", None)
+            e.set_randomize_engine(engine)
+
+            values = set()
+            start = time.time()
+            for _ in range(n):
+                e.randomize()
+                e.check()
+                values.add(e.key())
+            end = time.time()
+            row.append(f"{end - start:.2f}s ({len(values)} unique)")
+        results.append(row)
+
+    print(f"{'Example':<20}{'optimize':<25}{'solver':<25}")
+    for row in results:
+        print(f"{row[0]:<20}{row[1]:<25}{row[2]:<25}")
+
+    # Batch sessions block at most AVL_SOLUTIONS_BLOCK_LIMIT solutions - solutions stay valid and distinct across rebuilds
+    limit = avl._core.solver.SOLUTIONS_BLOCK_LIMIT
+    avl._core.solver.SOLUTIONS_BLOCK_LIMIT = 16
+    try:
+        e = list_env("env", None)
+        e.set_randomize_engine("solver")
+        keys = []
+        for item in e.solutions(4 * 16):
+            item.check()
+            keys.append(item.key())
+        for i in range(0, len(keys), 16):
+            assert len(set(keys[i:i + 16])) == 16
+    finally:
+        avl._core.solver.SOLUTIONS_BLOCK_LIMIT = limit
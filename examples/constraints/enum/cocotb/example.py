@@ -16,10 +16,23 @@ class example_env(avl.Env):
         self.e = avl.Enum("A", {"A": 0, "B": 1, "C": 2})
         self.add_constraint("c_0", lambda x: Or(x == self.e.B, x == self.e.C), self.e)
 
+        # Enums with different values can be compared
+        self.a = avl.Enum("A0", {"A0": 0, "A1": 1})
+        self.b = avl.Enum("B0", {"B0": 0, "B1": 1, "B2": 5})
+        self.add_constraint("c_1", lambda x, y: x == y, self.a, self.b)
+
+        # Constants outside the values aren't truncated
+        self.c = avl.Enum("A0", {"A0": 0, "A1": 1})
+        self.add_constraint("c_2", lambda x: x != 5, self.c)
+
 
 @cocotb.test
 async def test(dut):
     e = example_env("env", None)
-    for _ in range(10):
+    seen = set()
+    for _ in range(50):
         e.randomize()
         assert e.e != e.e.A
+        assert int(e.a) == int(e.b)
+        seen.add(str(e.c))
+    assert seen == {"A0", "A1"}
@@ -6,6 +6,7 @@
 
 import avl
 import cocotb
+import numpy as np
 from z3 import And
 
 
@@ -20,11 +21,21 @@ class example_env(avl.Env):
         self.fp32.add_constraint("c_0", lambda x: And(x >= -1.1, x <= 1.1))
         self.fp64.add_constraint("c_1", lambda x: And(x >= 100.0, x <= 200.0))
 
+        # Unconstrained - sampled as bit patterns, including special values
+        self.special = avl.Fp32(0.0)
+        self.special.set_class_weights({"normal": 80, "subnormal": 5, "zero": 5, "inf": 5, "nan": 5})
+
 
 @cocotb.test
 async def test(dut):
     e = example_env("env", None)
+    nans = 0
     for _ in range(100):
         e.randomize()
         assert e.fp64.value >= 100 and e.fp64.value <= 200
         assert e.fp32.value >= -1.1 and e.fp32.value <= 1.1
+        nans += np.isnan(e.special.value)
+
+    # Range constraints are sampled natively
+    assert e.get_randomize_paths()["native"] == 2
+    assert nans > 0
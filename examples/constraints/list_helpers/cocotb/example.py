@@ -0,0 +1,84 @@
+# Copyright 2024 Apheleia
+#
+# Description:
+# Apheleia list constraints example
+
+
+import time
+
+import avl
+import cocotb
+from avl import ListConstraints as L
+from z3 import ULT
+
+
+class unique_env(avl.Env):
+    def __init__(self, name, parent, n):
+        super().__init__(name, parent)
+        self.a = [avl.Uint32(0, fmt=hex) for _ in range(n)]
+        self.add_constraint("c_unique", L.unique, self.a)
+
+    def check(self):
+        return len({int(x) for x in self.a}) == len(self.a)
+
+class sorted_env(avl.Env):
+    def __init__(self, name, parent, n):
+        super().__init__(name, parent)
+        self.a = [avl.Uint32(0, fmt=hex) for _ in range(n)]
+        self.add_constraint("c_sorted", lambda a: L.ascending(a, strict=True), self.a)
+
+    def check(self):
+        return all(self.a[i] < self.a[i + 1] for i in range(len(self.a) - 1))
+
+class sum_env(avl.Env):
+    def __init__(self, name, parent, n):
+        super().__init__(name, parent)
+        self.a = [avl.Uint8(0) for _ in range(n)]
+        self.add_constraint("c_sum", lambda a: L.sum(a) == 100 * len(a), self.a)
+
+    def check(self):
+        return sum(int(x) for x in self.a) == 100 * len(self.a)
+
+class count_env(avl.Env):
+    def __init__(self, name, parent, n):
+        super().__init__(name, parent)
+        self.a = [avl.Uint8(0) for _ in range(n)]
+        self.add_constraint("c_count", lambda a: L.count(a, lambda x: ULT(x, 16)) == 5, self.a)
+
+    def check(self):
+        return sum(int(x) < 16 for x in self.a) == 5
+
+class length_env(avl.Env):
+    def __init__(self, name, parent, n):
+        super().__init__(name, parent)
+        # Randomized length - n slots, of which the first size are in use
+        self.a = [avl.Uint16(0) for _ in range(n)]
+        self.size = avl.Uint16(0)
+        self.add_constraint("c_length", lambda a, s: L.length(a, s), self.a, self.size)
+        self.add_constraint("c_unique", lambda a, s: L.unique(a, s), self.a, self.size)
+        self.add_constraint("c_sum", lambda a, s: L.sum(a, s) > 1000, self.a, self.size)
+
+    def check(self):
+        size = int(self.size)
+        values = [int(x) for x in self.a]
+        return (
+            size <= len(values)
+            and all(x == 0 for x in values[size:])
+            and len(set(values[:size])) == size
+            and sum(values[:size]) > 1000
+        )
+
+@cocotb.test
+async def test(dut):
+    for n in [256, 1024, 4096]:
+        for cls in [unique_env, sorted_env, sum_env, count_env, length_env]:
+            e = cls("env", None, n)
+            e.freeze_constraints()
+
+            start = time.time()
+            for _ in range(3):
+                e.randomize()
+                assert e.check()
+            end = time.time()
+            assert e.get_randomize_paths()["native"] > 0
+            print(f"Time taken ({cls.__name__} n={n}): {(end - start) / 3:.3f} seconds")
@@ -4,8 +4,12 @@
 # Apheleia attributes example
 
 
+import copy
+import pickle
+
 import avl
 import cocotb
+import numpy as np
 
 
 class example_env(avl.Env):
@@ -39,6 +43,155 @@ class example_env(avl.Env):
         assert mem.read(0x0ff8) == 0x0ff8
         self.info("Test 3 passed: Uninitialized memory returns address")
 
+    def test_pages(self):
+        self.info("Testing memory page operations...")
+
+        # Test 1 : Accesses spanning pages
+        mem = avl.Memory(width=32, page_size=16)
+        mem.add_range(0x0000, 0x1000)
+
+        mem.write(0x000e, 0x12345678)
+        assert mem.read(0x000e, 4) == 0x12345678
+        assert mem.read(0x0010, 2) == 0x1234
+        assert len(mem.pages) == 2
+        self.info("Test 1 passed: Accesses spanning pages successful.")
+
+        # Test 2 : Pages are initialized on first access
+        mem.set_init_fn(lambda address: address & 0xFF)
+        assert mem.read(0x0020, 4) == 0x23222120
+        assert mem.read(0x0000, 1) == 0x00
+        self.info("Test 2 passed: Pages initialized on first access.")
+
+    def test_contents(self):
+        self.info("Testing memory contents view...")
+
+        mem = avl.Memory(width=32)
+        mem.add_range(0x0000, 0x1000)
+
+        # Test 1 : Only bytes written or read are in the contents
+        mem.write(0x0100, 0x01234567)
+        mem.write(0x0104, 0x89abcdef, strobe=0b0101)
+        mem.read(0x0200, 2)
+        assert sorted(mem.memory) == [0x0100, 0x0101, 0x0102, 0x0103, 0x0104, 0x0106, 0x0200, 0x0201]
+        assert len(mem.memory) == 8 and 0x0105 not in mem.memory
+        self.info("Test 1 passed: Contents hold the touched bytes.")
+
+        # Test 2 : Assignments write through to the memory
+        mem.memory[0x0300] = 0x5a
+        assert mem.read(0x0300, 1) == 0x5a
+        mem.memory = {0x0010: 0x01, 0x0011: 0x02}
+        assert dict(mem.memory) == {0x0010: 0x01, 0x0011: 0x02}
+        assert mem.read(0x0010, 2) == 0x0201
+        self.info("Test 2 passed: Contents assignments write through.")
+
+    def test_copy(self):
+        self.info("Testing memory copy operations...")
+
+        mem = avl.Memory(width=32)
+        mem.add_range(0x0000, 0x1000)
+        mem.write(0x0100, 0x01234567)
+
+        # Test 1 : Deep copies and pickles are independent of the original
+        for other in [copy.deepcopy(mem), pickle.loads(pickle.dumps(mem))]:
+            assert other.read(0x0100) == 0x01234567
+            assert sorted(other.memory) == sorted(mem.memory)
+            other.write(0x0100, 0x89abcdef)
+            assert mem.read(0x0100) == 0x01234567
+        self.info("Test 1 passed: Deep copy and pickle successful.")
+
+    def test_blocks(self):
+        self.info("Testing memory block operations...")
+
+        mem = avl.Memory(width=32)
+        mem.add_range(0x0000, 0x10000)
+
+        # Test 1 : Write and read back a NumPy buffer across pages
+        data = np.arange(4096, dtype=np.uint16)
+        mem.write_block(0x0f00, data)
+        assert (np.frombuffer(mem.read_block(0x0f00, data.nbytes), dtype=np.uint16) == data).all()
+        assert mem.read(0x0f02, 2) == 1
+        self.info("Test 1 passed: Block write and read back successful.")
+
+        # Test 2 : Write with strobe (bit i enables byte i)
+        mem.write_block(0x0000, bytes([0xff] * 8), strobe_mask=0b10100101)
+        assert bytes(mem.read_block(0x0000, 8)) == bytes([0xff, 0, 0xff, 0, 0, 0xff, 0, 0xff])
+        self.info("Test 2 passed: Block write strobe successful.")
+
+        # Test 3 : Scatter-gather
+        mem.write_scatter([(0x2000, 4), (0x3000, 2)], b"abcdef")
+        assert mem.read_gather([(0x3000, 2), (0x2000, 4)]) == b"efabcd"
+        self.info("Test 3 passed: Scatter-gather successful.")
+
+    def test_mapped(self):
+        self.info("Testing memory mapped file operations...")
+
+        # Test 1 : Write through to a sparse file
+        mem = avl.Memory(width=32)
+        mem.add_range(0x0000, 0x100000)
+        mem.map_file("test_image.bin", size=0x100000)
+        mem.write(0x0100, 0x01234567)
+        mem.close()
+
+        with open("test_image.bin", "rb") as f:
+            f.seek(0x0100)
+            assert f.read(4) == bytes([0x67, 0x45, 0x23, 0x01])
+        self.info("Test 1 passed: Mapped file written successfully.")
+
+        # Test 2 : Copy-on-write image leaves the file unchanged
+        mem = avl.Memory(width=32)
+        mem.add_range(0x0000, 0x100000)
+        mem.map_file("test_image.bin", mode="c")
+        assert mem.read(0x0100) == 0x01234567
+        mem.write(0x0100, 0x89abcdef)
+        assert mem.read(0x0100) == 0x89abcdef
+        mem.close()
+
+        image = avl.Memory(width=32)
+        image.add_range(0x0000, 0x100000)
+        image.map_file("test_image.bin", mode="r")
+        assert image.read(0x0100) == 0x01234567
+        try:
+            image.write(0x0100, 0)
+        except ValueError:
+            self.info("Test 2 passed: Copy-on-write and read-only images successful.")
+        image.close()
+
+        # Test 3 : Files which aren't a whole number of pages
+        tail = 2 * 4096
+        with open("test_tail.bin", "wb") as f:
+            f.write(bytes(tail) + bytes([1, 2, 3]))
+
+        mem = avl.Memory(width=32)
+        mem.add_range(0x0000, 0x100000)
+        mem.map_file("test_tail.bin", mode="r")
+        assert mem.read(tail, 3) == 0x030201
+        try:
+            mem.write(tail, 0)
+            raise AssertionError("Write to a read-only file succeeded")
+        except ValueError:
+            pass
+        mem.close()
+
+        mem = avl.Memory(width=32)
+        mem.add_range(0x0000, 0x100000)
+        mem.map_file("test_tail.bin", mode="c")
+        mem.write(tail, 0x89abcdef)
+        assert mem.read(tail) == 0x89abcdef
+        mem.close()
+
+        mem = avl.Memory(width=32)
+        mem.add_range(0x0000, 0x100000)
+        mem.map_file("test_tail.bin")
+        assert mem.read(tail, 3) == 0x030201
+        mem.write(tail, 0x01234567)
+        mem.close()
+
+        with open("test_tail.bin", "rb") as f:
+            data = f.read()
+        assert len(data) == 3 * 4096
+        assert data[tail:tail + 4] == bytes([0x67, 0x45, 0x23, 0x01])
+        self.info("Test 3 passed: Partial page files successful.")
+
     def test_range(self):
         self.info("Testing memory range operations...")
 
@@ -51,6 +204,26 @@ class example_env(avl.Env):
         except KeyError:
             self.info("Test 1 passed: Out of range access correctly raised KeyError")
 
+    def test_regions(self):
+        self.info("Testing memory region operations...")
+
+        mem = avl.Memory(width=32)
+        mem.add_range(0x0000, 0x1000, name="rom")
+        mem.add_range(0x8000, 0x9000, name="regs")
+
+        # Test 1 : Range attributes
+        assert mem.get_region(0x8010)["name"] == "regs"
+        assert mem.get_region(0x4000) is None
+        self.info("Test 1 passed: Region lookup successful.")
+
+        # Test 2 : Watch callbacks
+        writes = []
+        mem.add_watch(0x8000, 0x8004, on_write=lambda address, data: writes.append((address, bytes(data))))
+        mem.write(0x8000, 0x1)
+        mem.write(0x8004, 0x2)
+        assert writes == [(0x8000, bytes([1, 0, 0, 0]))]
+        self.info("Test 2 passed: Watch callbacks successful.")
+
     def test_little_endian(self):
         self.info("Testing little-endian memory operations...")
 
@@ -145,17 +318,62 @@ class example_env(avl.Env):
 
             self.info(f"Test passed: {e} Endian Memory loaded from {fmt} file successfully.")
 
+    def test_export_sparse(self):
+        self.info("Testing memory export of sparse writes...")
+
+        mem = avl.Memory(width=32)
+        mem.add_range(0x0000, 0x10000)
+        mem.map_file("test_image.bin", base=0x8000, size=0x8000)
+
+        # Write some data - partial words are padded, mapped and unwritten bytes are not exported
+        mem.write(0x0100, 0x01234567)
+        mem.write(0x0104, 0x89abcdef)
+        mem.write(0x0301, 0x5a, 1)
+        mem.write(0x8000, 0xcafebabe)
+
+        # Test 1 : Verilog hex of the written words
+        mem.export_to_file("test_sparse.vhex")
+        with open("test_sparse.vhex") as f:
+            assert f.read() == "@0100\n01234567\n89abcdef\n@0300\n00005a00\n@8000\ncafebabe\n"
+        self.info("Test 1 passed: Verilog hex export of written words successful.")
+
+        # Test 2 : CSV of the written bytes
+        mem.export_to_file("test_sparse.csv")
+        with open("test_sparse.csv") as f:
+            assert f.read() == "addr,data\n" + "".join(f"{a},{d}\n" for a, d in [
+                (0x0100, 0x67), (0x0101, 0x45), (0x0102, 0x23), (0x0103, 0x01),
+                (0x0104, 0xef), (0x0105, 0xcd), (0x0106, 0xab), (0x0107, 0x89),
+                (0x0301, 0x5a),
+                (0x8000, 0xbe), (0x8001, 0xba), (0x8002, 0xfe), (0x8003, 0xca),
+            ])
+        self.info("Test 2 passed: CSV export of written bytes successful.")
+        mem.close()
+
     def __init__(self, name, parent):
         super().__init__(name, parent)
 
         self.test_init()
 
+        self.test_pages()
+
+        self.test_contents()
+
+        self.test_copy()
+
+        self.test_blocks()
+
+        self.test_mapped()
+
         self.test_range()
 
+        self.test_regions()
+
         self.test_little_endian()
 
         self.test_big_endian()
 
+        self.test_export_sparse()
+
         for fmt in ["vhex", "vbin", "csv", "json", "ihex", "srec", "ti-txt", "vmem"]:
             self.test_import_export(fmt=fmt)
 
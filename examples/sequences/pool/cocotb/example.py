@@ -0,0 +1,98 @@
+# Copyright 2024 Apheleia
+#
+# Description:
+# Apheleia randomization pool example
+
+
+import avl
+import cocotb
+from cocotb.triggers import Timer
+from z3 import ULT, And
+
+
+class example_item(avl.SequenceItem):
+    def __init__(self, name, parent):
+        super().__init__(name, parent)
+        self.addr = avl.Uint32(0, fmt=hex)
+        self.data = [avl.Uint16(0, fmt=hex) for _ in range(8)]
+
+        self.add_constraint("c_addr", lambda x: And(x & 0x3 == 0, ULT(x, 0x1000)), self.addr)
+        for i in range(1, len(self.data)):
+            self.add_constraint(f"c_data_{i}", lambda x, y: ULT(x + y, 0x8000), self.data[i], self.data[i - 1])
+
+
+class example_sequence(avl.Sequence):
+    def __init__(self, name, parent):
+        super().__init__(name, parent)
+        self.n_items = 50
+
+    async def body(self):
+        # Randomize items in 2 background processes, up to 8 items ahead each
+        with avl.RandomizationPool(example_item, workers=2, lookahead=8) as pool:
+            for i in range(self.n_items):
+                item = pool.get(f"item_{i}", self)
+                await self.start_item(item)
+                await self.finish_item(item)
+
+
+class example_driver(avl.Driver):
+    def __init__(self, name, parent):
+        super().__init__(name, parent)
+        self.count = 0
+
+    async def run_phase(self):
+        while True:
+            item = await self.seq_item_port.blocking_get()
+            assert item.addr & 0x3 == 0 and item.addr < 0x1000
+            self.debug(f"Driving item :\n{item}")
+            await Timer(10, "ns")
+            item.set_event("done")
+            self.count += 1
+
+    async def report_phase(self):
+        if self.count != 50:
+            self.error(f"Expected 50 items, got {self.count}")
+        else:
+            self.info("All items driven")
+
+
+class example_sequencer(avl.Sequencer):
+    def __init__(self, name, parent):
+        super().__init__(name, parent)
+
+
+class example_env(avl.Env):
+    def __init__(self, name, parent):
+        super().__init__(name, parent)
+
+        self.driver = example_driver("driver", self)
+        self.sequencer = example_sequencer("sequencer", self)
+
+        self.sequencer.seq_item_export.connect(self.driver.seq_item_port)
+
+    async def run_phase(self):
+        self.raise_objection()
+
+        seq = example_sequence("sequence", self.sequencer)
+        await seq.start()
+
+        await Timer(1000, "ns")
+
+        self.drop_objection()
+
+
+@cocotb.test
+async def test(dut):
+    e = example_env("env", None)
+    await e.start()
+
+
+@cocotb.test
+async def test_many(dut):
+    # Many items from one pool - each worker restarts its solver session every 16 * lookahead items
+    with avl.RandomizationPool(example_item, workers=2, lookahead=4, seed=1) as pool:
+        for i in range(1000):
+            item = pool.get(f"item_{i}", None)
+            assert item.addr & 0x3 == 0 and item.addr < 0x1000
+            for j in range(1, len(item.data)):
+                assert item.data[j] + item.data[j - 1] < 0x8000
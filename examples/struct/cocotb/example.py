@@ -57,15 +57,19 @@ class example_env(avl.Env):
         self.s0.multi_bit.value = 0
         self.s0.state_enum.value = "S0"
 
+        # Bind the structs to the HDL once - repeated transfers re-use the resolved handles
+        s0_hdl = self.s0.bind(self.dut)
+        s1_hdl = self.s1.bind(self.dut)
+
         for _ in range(10):
 
             await Timer(10, units="ns")
             self.randomize()
 
-            self.s0.to_hdl(self.dut)
+            s0_hdl.to_hdl()
 
             await Timer(1, "ns")
-            self.s1.from_hdl(self.dut)
+            s1_hdl.from_hdl()
 
             assert self.s0.single_bit == self.s1.single_bit
             assert self.s0.multi_bit == self.s1.multi_bit
@@ -73,6 +77,15 @@ class example_env(avl.Env):
             assert self.s0.state_enum == self.s1.state_enum
 
             assert self.s0_copy.multi_bit.value == 200
+
+        # Test bulk packing / unpacking
+        buffer = packed_struct_t.pack([self.s0, self.s1])
+        unpacked = packed_struct_t.unpack(buffer)
+        assert [s.to_bits() for s in unpacked] == [self.s0.to_bits(), self.s1.to_bits()]
+
+        array = packed_struct_t.unpack_numpy(buffer)
+        assert array["multi_bit"][0] == self.s0.multi_bit
+
         await Timer(10, units="ns")
         self.drop_objection()
 
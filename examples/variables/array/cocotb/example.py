@@ -0,0 +1,70 @@
+# Copyright 2024 Apheleia
+#
+# Description:
+# Apheleia variable array example
+
+
+import copy
+import time
+
+import avl
+import cocotb
+from z3 import ULT, And, Or, Sum
+
+
+class payload_item(avl.SequenceItem):
+    def __init__(self, name, parent):
+        super().__init__(name, parent)
+
+        self.length = avl.Uint16(0)
+        self.data = avl.VarArray(avl.Logic, 4096, width=32, fmt=hex)
+
+        # Element constraints apply to every element
+        self.data.add_element_constraint("c_range", lambda x: Or(ULT(x, 0x100), x == 0xFFFFFFFF))
+
+        # Constraints between the array and other variables see the randomized values of the array
+        self.add_constraint("c_length", lambda length, data: length == data[0] & 0xFF, self.length, self.data)
+
+
+@cocotb.test
+async def test(dut):
+    item = payload_item("item", None)
+
+    start = time.time()
+    for _ in range(100):
+        item.randomize()
+        assert item.length == item.data[0] & 0xFF
+        assert all(v < 0x100 or v == 0xFFFFFFFF for v in item.data)
+    print(f"Time taken (100 x 4096 constrained elements): {time.time() - start:.2f} seconds")
+    print(item.get_randomize_paths())
+
+    # Values are a numpy array - no copy
+    assert item.data.values.dtype == "uint32"
+    print(f"Mean element value: {item.data.values.mean():.1f}")
+
+    # Copies are independent, and compare element by element
+    other = copy.copy(item)
+    assert other.compare(item)
+    other.data[0] = 0x1234
+    assert other.data != item.data
+
+    # Element constraints can use the index of the element
+    ramp = avl.VarArray(avl.Int8, 64)
+    ramp.add_element_constraint("c_ramp", lambda x, i: x == i - 32)
+    ramp.randomize()
+    assert ramp.to_list() == list(range(-32, 32))
+
+    # Array constraints see the list of all elements
+    total = avl.VarArray(avl.Uint8, 8)
+    total.add_element_constraint("c_max", lambda x: ULT(x, 16))
+    total.add_constraint("c_sum", lambda a: Sum([x for x in a]) == 100)
+    total.randomize()
+    assert sum(total) == 100
+    print(total)
+
+    # Or sorted
+    ordered = avl.VarArray(avl.Uint16, 32)
+    ordered.add_constraint("c_sorted", lambda a: And([ULT(a[i], a[i + 1]) for i in range(len(a) - 1)]))
+    ordered.randomize()
+    assert ordered.to_list() == sorted(set(ordered.to_list()))
+    print(ordered)